@@ -1,16 +1,42 @@
+from typing import Optional
+
 from fastapi import APIRouter, Depends, HTTPException, Path, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.background.tasks import celery_generate_summary
+from app.background.streaming import relay_summary_events
+from app.background.tasks import enqueue_summary, make_job_key, new_job_task_ids, revoke_summary_job
+from app.config import get_settings
 from app.crud import crud_summary, crud_user
-from app.database import get_db
+from app.database import async_session, get_db
+from app.models import Summary
 from app.schemas.summary import SummaryPayloadSchema, SummarySchema, SummarySchemaList
 from app.schemas.user import UserInDBSchema
 from app.security.auth import get_current_active_user
 
+settings = get_settings()
 router = APIRouter(prefix="/summaries", tags=["summaries"])
 
 
+async def start_summary_job(summary_id: int, user_id: int, payload: SummaryPayloadSchema, db: AsyncSession) -> None:
+    # Counted before the new job is marked as in flight.
+    jobs_in_flight = await crud_summary.count_jobs_in_flight(user_id=user_id, db=db)
+    # The new job version is committed before the job is sent, so that the workers never see it as stale.
+    url, task_ids = str(payload.url), new_job_task_ids()
+    job_key = make_job_key(url, payload.profile, payload.mode)
+    version = await crud_summary.start_job(summary_id=summary_id, job_key=job_key, task_ids=task_ids, db=db)
+    enqueue_summary(
+        summary_id,
+        url,
+        profile=payload.profile,
+        mode=payload.mode,
+        version=version,
+        task_ids=task_ids,
+        lane=payload.lane,
+        jobs_in_flight=jobs_in_flight,
+    )
+
+
 @router.post(
     "/",
     response_model=SummarySchema,
@@ -22,8 +48,20 @@ async def create_summary(
     current_user: UserInDBSchema = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db),
 ):
+    if settings.SUMMARY_FRESHNESS_SECONDS > 0:
+        # Copy a fresh summary of the same article instead of summarizing it again.
+        fresh = await crud_summary.get_fresh_by_url(
+            url=str(payload.url),
+            max_age=settings.SUMMARY_FRESHNESS_SECONDS,
+            profile=payload.profile,
+            mode=payload.mode,
+            db=db,
+        )
+        if fresh:
+            return await crud_summary.post(user_id=current_user.id, payload=payload, summary_text=fresh.summary, db=db)
+
     summary = await crud_summary.post(user_id=current_user.id, payload=payload, db=db)
-    celery_generate_summary.delay(summary.id, str(payload.url))
+    await start_summary_job(summary.id, current_user.id, payload, db)
     return summary
 
 
@@ -35,6 +73,26 @@ async def read_summary(id: int = Path(...), db: AsyncSession = Depends(get_db)):
     return summary
 
 
+@router.get("/{id}/stream", response_class=StreamingResponse)
+async def stream_summary(id: int = Path(...)):
+    # The stream outlives the request, so every check uses a short-lived session of its own
+    # instead of holding a connection of the pool for the whole stream.
+    async with async_session() as db:
+        summary = await crud_summary.get(summary_id=id, db=db)
+    if not summary:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Summary not found")
+
+    async def get_summary() -> Optional[Summary]:
+        async with async_session() as db:
+            return await crud_summary.get(summary_id=id, db=db)
+
+    return StreamingResponse(
+        relay_summary_events(summary_id=id, get_summary=get_summary),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/", response_model=SummarySchemaList)
 async def read_all_summaries(db: AsyncSession = Depends(get_db)):
     return await crud_summary.get_all(db=db)
@@ -52,8 +110,12 @@ async def update_summary(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Summary not found")
     if user := await crud_user.get(user_id=current_user.id, db=db):
         if (summary.user_id == current_user.id) or user.is_superuser:
+            job_key, job_task_ids = summary.job_key, summary.job_task_ids
             updated = await crud_summary.put(summary_id=id, payload=payload, db=db)
-            celery_generate_summary.delay(id, str(payload.url))
+            # An identical job in flight is kept, any other is superseded by a new one.
+            if job_key != make_job_key(str(payload.url), payload.profile, payload.mode):
+                revoke_summary_job(job_task_ids)
+                await start_summary_job(id, summary.user_id, payload, db)
             return updated
         else:
             raise HTTPException(
@@ -72,6 +134,7 @@ async def delete_summary(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Summary not found")
     if user := await crud_user.get(user_id=current_user.id, db=db):
         if (summary.user_id == current_user.id) or user.is_superuser:
+            revoke_summary_job(summary.job_task_ids)
             await crud_summary.remove(summary_id=id, db=db)
             return summary
         else:
@@ -0,0 +1,232 @@
+import asyncio
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import urlsplit
+
+import httpx
+from newspaper import Article
+
+from app.config import get_settings
+
+settings = get_settings()
+
+# <meta charset="..."> or <meta http-equiv="Content-Type" content="text/html; charset=...">.
+META_CHARSET_PATTERN = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([\w.:-]+)""", re.IGNORECASE)
+# Browsers only look for the declaration at the beginning of the page.
+META_CHARSET_SNIFF_BYTES = 4096
+
+
+class ArticleFetchError(Exception):
+    """Raised when an article can't be downloaded."""
+
+
+@dataclass
+class FetchedPage:
+    url: str
+    html: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    # Whether the server confirmed that the previously downloaded page is still current.
+    not_modified: bool = False
+
+
+def decode_page(content: bytes, declared_encoding: Optional[str] = None) -> str:
+    """Decodes a downloaded page with the encoding declared for it.
+
+    The encoding is taken from the Content-Type header, or else from a <meta>
+    declaration at the beginning of the page, where e.g. many windows-1251
+    pages declare it only. It defaults to UTF-8, and undecodable bytes are
+    replaced.
+
+    Args:
+        content (bytes): Body of the response.
+        declared_encoding (Optional[str]): Charset of the Content-Type header.
+
+    Returns:
+        str: The decoded page.
+    """
+    candidates = [declared_encoding]
+    if match := META_CHARSET_PATTERN.search(content[:META_CHARSET_SNIFF_BYTES]):
+        candidates.append(match.group(1).decode("ascii", errors="ignore"))
+
+    for encoding in candidates:
+        if not encoding:
+            continue
+        try:
+            return content.decode(encoding, errors="replace")
+        except LookupError:
+            continue
+    return content.decode("utf-8", errors="replace")
+
+
+class ArticleFetcher:
+    """Downloads articles with a shared asynchronous HTTP connection pool.
+
+    Connections are kept alive and reused between the downloads of the same
+    process, while the number of concurrent connections to a single host is
+    limited. Pages are downloaded up to a maximum size, and the recently
+    downloaded ones are revalidated with conditional requests (ETag and
+    Last-Modified), so unchanged pages aren't transferred again.
+
+    Attributes:
+        max_connections (int): Maximum number of connections of the pool.
+        max_connections_per_host (int): Maximum number of concurrent requests to the same host.
+        timeout (httpx.Timeout): Connect and read timeouts of the requests.
+        max_body_size (int): Maximum size of a page in bytes.
+        user_agent (str): User-Agent header of the requests.
+        max_revalidation_items (int): Number of downloaded pages kept for conditional requests.
+        max_revalidation_chars (int): Total number of characters of the downloaded pages kept for conditional requests.
+    """
+
+    def __init__(
+        self,
+        max_connections: int,
+        max_connections_per_host: int,
+        connect_timeout: float,
+        read_timeout: float,
+        max_body_size: int,
+        user_agent: str,
+        max_revalidation_items: int = 0,
+        max_revalidation_chars: int = 0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.max_body_size = max_body_size
+        self.user_agent = user_agent
+        self.max_revalidation_items = max_revalidation_items
+        self.max_revalidation_chars = max_revalidation_chars
+        self._transport = transport
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_semaphores: dict[str, asyncio.Semaphore] = {}
+        self._pages: OrderedDict[str, FetchedPage] = OrderedDict()
+        self._pages_size = 0
+
+    async def fetch(self, url: str) -> FetchedPage:
+        """Downloads the page of an article.
+
+        Args:
+            url (str): URL of the article.
+
+        Returns:
+            FetchedPage: The downloaded page.
+
+        Raises:
+            ArticleFetchError: If the request fails, the response isn't successful or the page is too large.
+        """
+        client = self._get_client()
+        cached = self._pages.get(url)
+        headers = {}
+        if cached and cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached and cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+
+        host = urlsplit(url).hostname or ""
+        semaphore = self._host_semaphores.setdefault(host, asyncio.Semaphore(self.max_connections_per_host))
+        async with semaphore:
+            try:
+                async with client.stream("GET", url, headers=headers) as response:
+                    if response.status_code == httpx.codes.NOT_MODIFIED and cached:
+                        self._remember(url, cached)
+                        return FetchedPage(cached.url, cached.html, cached.etag, cached.last_modified, True)
+                    if not response.is_success:
+                        raise ArticleFetchError(f"Failed to download {url}: HTTP {response.status_code}")
+                    content = await self._read(response)
+            except httpx.HTTPError as exc:
+                raise ArticleFetchError(f"Failed to download {url}: {exc}") from exc
+
+        page = FetchedPage(
+            url=str(response.url),
+            html=decode_page(content, response.charset_encoding),
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+        if page.etag or page.last_modified:
+            self._remember(url, page)
+        return page
+
+    async def aclose(self) -> None:
+        if self._client is not None and self._pid == os.getpid():
+            await self._client.aclose()
+            self._client = None
+
+    async def _read(self, response: httpx.Response) -> bytes:
+        if int(response.headers.get("Content-Length") or 0) > self.max_body_size:
+            raise ArticleFetchError(f"Page {response.url} is larger than {self.max_body_size} bytes")
+        chunks, size = [], 0
+        async for chunk in response.aiter_bytes():
+            size += len(chunk)
+            if size > self.max_body_size:
+                raise ArticleFetchError(f"Page {response.url} is larger than {self.max_body_size} bytes")
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    def _remember(self, url: str, page: FetchedPage) -> None:
+        self._forget(url)
+        if not self.max_revalidation_items or len(page.html) > self.max_revalidation_chars:
+            return
+        self._pages[url] = page
+        self._pages_size += len(page.html)
+        # The least recently downloaded pages are dropped first.
+        while len(self._pages) > self.max_revalidation_items or self._pages_size > self.max_revalidation_chars:
+            self._forget(next(iter(self._pages)))
+
+    def _forget(self, url: str) -> None:
+        if page := self._pages.pop(url, None):
+            self._pages_size -= len(page.html)
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Connections can't be shared with the parent process, so a forked child opens its own pool.
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._host_semaphores = {}
+                self._client = None
+            if self._client is None:
+                self._client = httpx.AsyncClient(
+                    headers={"User-Agent": self.user_agent},
+                    timeout=self.timeout,
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections, max_keepalive_connections=self.max_connections
+                    ),
+                    follow_redirects=True,
+                    transport=self._transport,
+                )
+            return self._client
+
+
+def get_article_fetcher() -> ArticleFetcher:
+    return ArticleFetcher(
+        max_connections=settings.FETCH_MAX_CONNECTIONS,
+        max_connections_per_host=settings.FETCH_MAX_CONNECTIONS_PER_HOST,
+        connect_timeout=settings.FETCH_CONNECT_TIMEOUT_SECONDS,
+        read_timeout=settings.FETCH_READ_TIMEOUT_SECONDS,
+        max_body_size=settings.FETCH_MAX_BODY_BYTES,
+        user_agent=settings.FETCH_USER_AGENT,
+        max_revalidation_items=settings.FETCH_REVALIDATION_MAX_ITEMS,
+        max_revalidation_chars=settings.FETCH_REVALIDATION_MAX_CHARS,
+    )
+
+
+def parse_article(url: str, html: str) -> Article:
+    """Extracts the article from its downloaded page with newspaper.
+
+    Args:
+        url (str): URL of the article.
+        html (str): HTML of the page.
+
+    Returns:
+        Article: The parsed article.
+    """
+    article = Article(url)
+    article.download(input_html=html)
+    article.parse()
+    return article
@@ -0,0 +1,125 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Optional
+
+from billiard import process as billiard_process
+
+from app.config import get_settings
+
+from .fetcher import ArticleFetchError, parse_article
+
+settings = get_settings()
+
+log = logging.getLogger(__name__)
+
+
+def extract_text(url: str, html: str) -> str:
+    """Extracts the text of the article from its page, in the process of the parsing pool."""
+    return parse_article(url, html).text
+
+
+def can_have_children() -> bool:
+    # Daemonic processes, e.g. the children of the prefork pool of the workers, can't start processes.
+    return not multiprocessing.current_process().daemon and not billiard_process.current_process().daemon
+
+
+class ArticleParser:
+    """Extracts the article texts from their pages in a pool of processes.
+
+    The extraction with lxml is CPU-bound, so it is run in separate processes,
+    leaving the process of the task free to run the inference or to download
+    the next articles in the meantime. Pages are truncated to a maximum size,
+    and a page taking longer than the timeout to parse is given up on by
+    restarting the pool. Where processes can't be started, e.g. in a daemonic
+    process, the pages are parsed inline without the timeout.
+
+    Attributes:
+        max_workers (int): Number of processes of the pool, 0 parses the pages inline.
+        timeout (float): Time in seconds a page may take to parse.
+        max_html_size (int): Maximum number of characters of a page to parse.
+        max_tasks_per_worker (Optional[int]): Number of pages a process parses before it is replaced.
+    """
+
+    def __init__(
+        self, max_workers: int, timeout: float, max_html_size: int, max_tasks_per_worker: Optional[int] = None
+    ):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.max_html_size = max_html_size
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def parse(self, url: str, html: str) -> str:
+        """Extracts the text of an article from its page.
+
+        Args:
+            url (str): URL of the article.
+            html (str): HTML of the page.
+
+        Returns:
+            str: Text of the article, empty if none was found.
+
+        Raises:
+            ArticleFetchError: If parsing the page takes longer than the timeout.
+        """
+        if len(html) > self.max_html_size:
+            log.info("Truncating the page of %s from %d to %d characters", url, len(html), self.max_html_size)
+            html = html[: self.max_html_size]
+
+        executor = self._get_executor()
+        if executor is None:
+            return extract_text(url, html)
+
+        future = executor.submit(extract_text, url, html)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # A running extraction can't be cancelled, so its process is killed along with the pool.
+            self._reset(executor)
+            raise ArticleFetchError(f"Parsing {url} took longer than {self.timeout} seconds")
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        if not self.max_workers or not can_have_children():
+            return None
+        with self._lock:
+            # The processes of the pool belong to the process that started them, so a forked child starts its own.
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._executor = None
+            if self._executor is None:
+                # Spawned processes don't inherit the models and threads of the worker.
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    max_tasks_per_child=self.max_tasks_per_worker,
+                )
+            return self._executor
+
+    def _reset(self, executor: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        for process in list(getattr(executor, "_processes", {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def get_article_parser() -> ArticleParser:
+    return ArticleParser(
+        max_workers=settings.PARSE_MAX_WORKERS,
+        timeout=settings.PARSE_TIMEOUT_SECONDS,
+        max_html_size=settings.PARSE_MAX_HTML_CHARS,
+        max_tasks_per_worker=settings.PARSE_MAX_TASKS_PER_WORKER or None,
+    )
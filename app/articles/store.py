@@ -0,0 +1,180 @@
+import time
+import zlib
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Optional
+
+import redis
+
+from app.config import get_settings
+from app.disk_store import DiskStore
+from app.urls import hash_url
+
+settings = get_settings()
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the installed extras
+    zstandard = None
+
+# Errors of the entries that can't be read, e.g. corrupt ones or zstd-compressed ones without zstandard installed.
+UNREADABLE_ENTRY_ERRORS = (ValueError, zlib.error) + ((zstandard.ZstdError,) if zstandard is not None else ())
+
+
+@dataclass
+class StoredArticle:
+    text: Optional[str] = None
+    # Set instead of the text for the URLs that failed to fetch or parse.
+    error: Optional[str] = None
+
+
+def compress(data: bytes) -> bytes:
+    """Compresses data with zstd if it is installed, zlib otherwise, prefixed with the codec marker."""
+    if zstandard is not None:
+        return b"s" + zstandard.ZstdCompressor(level=3).compress(data)
+    return b"z" + zlib.compress(data, 6)
+
+
+def decompress(data: bytes) -> bytes:
+    codec, payload = data[:1], data[1:]
+    if codec == b"s":
+        if zstandard is None:
+            raise ValueError("The entry is zstd-compressed but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(payload)
+    if codec == b"z":
+        return zlib.decompress(payload)
+    raise ValueError(f"Unknown compression codec: {codec!r}")
+
+
+def encode_entry(entry: StoredArticle) -> bytes:
+    kind, value = (b"E", entry.error) if entry.error is not None else (b"T", entry.text or "")
+    return compress(kind + value.encode())
+
+
+def decode_entry(data: bytes) -> StoredArticle:
+    payload = decompress(data)
+    kind, value = payload[:1], payload[1:].decode()
+    return StoredArticle(error=value) if kind == b"E" else StoredArticle(text=value)
+
+
+class ArticleStore(ABC):
+    """Abstract base class for the stores of the parsed article texts.
+
+    The entries are keyed by the canonical URL of the article, so that the
+    variants of the same URL share them. Failures are stored as well, for a
+    shorter time, so that dead links aren't fetched over and over again.
+
+    Attributes:
+        ttl (int): Time in seconds the article texts are kept for.
+        negative_ttl (int): Time in seconds the failures are kept for.
+        hits (int): Number of lookups that found a stored entry.
+        misses (int): Number of lookups that didn't find a stored entry.
+    """
+
+    def __init__(self, ttl: int, negative_ttl: int):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, url: str) -> Optional[StoredArticle]:
+        """Looks up the stored text or failure of an article.
+
+        Args:
+            url (str): URL of the article.
+
+        Returns:
+            Optional[StoredArticle]: The stored entry or None.
+        """
+        entry = self._get(hash_url(url))
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def set_text(self, url: str, text: str) -> None:
+        self._set(hash_url(url), StoredArticle(text=text), self.ttl)
+
+    def set_failure(self, url: str, error: str) -> None:
+        self._set(hash_url(url), StoredArticle(error=error), self.negative_ttl)
+
+    @abstractmethod
+    def _get(self, key: str) -> Optional[StoredArticle]:
+        pass
+
+    @abstractmethod
+    def _set(self, key: str, entry: StoredArticle, ttl: int) -> None:
+        pass
+
+
+class DiskArticleStore(ArticleStore):
+    """On-disk store shared by all worker processes of a node.
+
+    Every entry is compressed into its own file. Expired entries are removed
+    when they are read, and entries that can't be read are treated as missing.
+    The oldest entries are evicted once the files take more than the maximum
+    number of bytes.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, ttl: int, negative_ttl: int):
+        super().__init__(ttl, negative_ttl)
+        self.files = DiskStore(directory, ".article", max_bytes, entry_size=lambda size: size)
+
+    def _get(self, key: str) -> Optional[StoredArticle]:
+        path = self.files.path(key)
+        try:
+            age = time.time() - path.stat().st_mtime
+            entry = decode_entry(path.read_bytes())
+        except (OSError, *UNREADABLE_ENTRY_ERRORS):
+            return None
+        if age > (self.negative_ttl if entry.error is not None else self.ttl):
+            path.unlink(missing_ok=True)
+            return None
+        return entry
+
+    def _set(self, key: str, entry: StoredArticle, ttl: int) -> None:
+        self.files.write(key, encode_entry(entry))
+
+
+class RedisArticleStore(ArticleStore):
+    """Redis store shared by all workers, the entries expire with their TTL."""
+
+    prefix = "article-store:"
+
+    def __init__(self, url: str, ttl: int, negative_ttl: int):
+        super().__init__(ttl, negative_ttl)
+        self.client = redis.Redis.from_url(url)
+
+    def _get(self, key: str) -> Optional[StoredArticle]:
+        data = self.client.get(self.prefix + key)
+        try:
+            return decode_entry(data) if data is not None else None
+        except UNREADABLE_ENTRY_ERRORS:
+            return None
+
+    def _set(self, key: str, entry: StoredArticle, ttl: int) -> None:
+        self.client.set(self.prefix + key, encode_entry(entry), ex=ttl)
+
+
+def get_article_store() -> Optional[ArticleStore]:
+    """Creates the article store selected with ARTICLE_STORE_BACKEND.
+
+    Returns:
+        Optional[ArticleStore]: The configured store or None if storing is disabled.
+    """
+    backend = settings.ARTICLE_STORE_BACKEND
+    if backend == "disk":
+        return DiskArticleStore(
+            settings.ARTICLE_STORE_DIR,
+            settings.ARTICLE_STORE_MAX_BYTES,
+            settings.ARTICLE_STORE_TTL_SECONDS,
+            settings.ARTICLE_STORE_NEGATIVE_TTL_SECONDS,
+        )
+    if backend == "redis":
+        return RedisArticleStore(
+            settings.ARTICLE_STORE_REDIS_URL or settings.RESULT_BACKEND,
+            settings.ARTICLE_STORE_TTL_SECONDS,
+            settings.ARTICLE_STORE_NEGATIVE_TTL_SECONDS,
+        )
+    return None
@@ -0,0 +1,157 @@
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Optional
+
+from transformers.generation.streamers import BaseStreamer
+
+from app.summarization.summarizer import SummarizerFactory
+
+
+@dataclass
+class PendingSummary:
+    lang: str
+    text: str
+    profile: Optional[str] = None
+    streamer: Optional[BaseStreamer] = None
+    future: Future = field(default_factory=Future)
+
+
+class MicroBatcher:
+    """Dynamic micro-batching scheduler for the summarization models.
+
+    Tasks running concurrently in the same worker process submit their articles
+    to the batcher instead of calling the summarizer directly. A background thread
+    collects the pending articles until either the batch is full or the oldest
+    article has waited long enough, groups them by language and generation profile
+    and runs every group through the summarizer as a single batch. Streamers handle
+    a single sequence only, so the articles submitted with one are generated on
+    their own, still by the same thread, as the models and tokenizers don't support
+    concurrent calls. The streamers of the profiles that can't be streamed are
+    ignored, and their articles batched with the others. The results are
+    delivered back to the submitting tasks through futures.
+
+    Attributes:
+        factory (SummarizerFactory): Factory providing the summarizers per language.
+        max_batch_size (int): Maximum number of articles collected into one batch.
+        max_wait (float): Maximum time in seconds to wait for a batch to fill up.
+        max_submitters (Optional[int]): Number of tasks of the process that can submit concurrently, if known.
+            A batch holding one item from each of them can't grow any further and is processed right away.
+        model_lock (threading.Lock): Lock held while the summarizers run, to be taken by anything else using
+            their tokenizers, which don't support concurrent calls.
+    """
+
+    def __init__(
+        self, factory: SummarizerFactory, max_batch_size: int, max_wait_ms: int, max_submitters: Optional[int] = None
+    ):
+        self.factory = factory
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_submitters = max_submitters
+        self.model_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._queue: queue.Queue[PendingSummary] = queue.Queue()
+
+    def submit(
+        self, lang: str, text: str, profile: Optional[str] = None, streamer: Optional[BaseStreamer] = None
+    ) -> Future:
+        """Schedules an article for summarization.
+
+        Args:
+            lang (str): Language code of the article.
+            text (str): Text of the article.
+            profile (Optional[str]): Name of the generation profile to use.
+            streamer (Optional[BaseStreamer]): Streamer receiving the tokens as they are generated.
+
+        Returns:
+            Future: Future resolved with the summary once its batch is processed.
+        """
+        self._ensure_running()
+        pending = PendingSummary(lang, text, profile, streamer)
+        self._queue.put(pending)
+        return pending.future
+
+    def summarize(
+        self, lang: str, text: str, profile: Optional[str] = None, streamer: Optional[BaseStreamer] = None
+    ) -> str:
+        """Schedules an article for summarization and waits for the result.
+
+        Args:
+            lang (str): Language code of the article.
+            text (str): Text of the article.
+            profile (Optional[str]): Name of the generation profile to use.
+            streamer (Optional[BaseStreamer]): Streamer receiving the tokens as they are generated.
+
+        Returns:
+            str: Summarized text.
+        """
+        return self.submit(lang, text, profile, streamer).result()
+
+    def _ensure_running(self) -> None:
+        # Threads don't survive a fork, so a child process starts its own collector.
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._queue = queue.Queue()
+                threading.Thread(target=self._run, name="summarizer-micro-batcher", daemon=True).start()
+
+    def _run(self) -> None:
+        while True:
+            self._process(self._collect())
+
+    def _collect(self) -> list[PendingSummary]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        # Every submitter waits for its result, so there are never more pending items than submitters.
+        max_batch_size = min(self.max_batch_size, self.max_submitters or self.max_batch_size)
+        while len(batch) < max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _process(self, batch: list[PendingSummary]) -> None:
+        groups: defaultdict[tuple[str, Optional[str]], list[PendingSummary]] = defaultdict(list)
+        for pending in batch:
+            if pending.streamer is not None and self._can_stream(pending):
+                self._process_streamed(pending)
+            else:
+                groups[pending.lang, pending.profile].append(pending)
+
+        for (lang, profile), group in groups.items():
+            try:
+                summarizer = self.factory.get_summarizer(lang)
+                with self.model_lock:
+                    summaries = summarizer.summarize_batch([pending.text for pending in group], profile=profile)
+            except Exception as exc:
+                for pending in group:
+                    pending.future.set_exception(exc)
+            else:
+                for pending, summary in zip(group, summaries):
+                    pending.future.set_result(summary)
+
+    def _can_stream(self, pending: PendingSummary) -> bool:
+        try:
+            return self.factory.get_summarizer(pending.lang).can_stream(pending.profile)
+        except Exception:
+            # The error is raised to the submitter along with the rest of its group.
+            return False
+
+    def _process_streamed(self, pending: PendingSummary) -> None:
+        try:
+            summarizer = self.factory.get_summarizer(pending.lang)
+            with self.model_lock:
+                summary = summarizer.summarize(pending.text, streamer=pending.streamer, profile=pending.profile)
+        except Exception as exc:
+            pending.future.set_exception(exc)
+        else:
+            pending.future.set_result(summary)
@@ -0,0 +1,111 @@
+import asyncio
+import os
+import threading
+from typing import Any, Coroutine, Optional, TypeVar
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from app.config import get_settings
+
+settings = get_settings()
+
+T = TypeVar("T")
+
+
+class WorkerRuntime:
+    """Event loop and database engine of a worker process.
+
+    The coroutines of the tasks run on one long-lived event loop in a thread of
+    its own, instead of a loop per task, so the connections of the database
+    pool and of the HTTP client bound to it are reused between the tasks. Both
+    the loop and the engine belong to the process that created them, so a
+    forked child creates its own on first use, and the workers create them
+    eagerly right after the fork.
+
+    Attributes:
+        database_url (str): URL of the database.
+        pool_size (int): Number of connections kept open in the pool.
+        max_overflow (int): Number of connections opened beyond the pool size under load.
+        pool_recycle (int): Time in seconds after which a connection is replaced.
+        pool_timeout (float): Time in seconds to wait for a connection of the pool.
+    """
+
+    def __init__(self, database_url: str, pool_size: int, max_overflow: int, pool_recycle: int, pool_timeout: float):
+        self.database_url = database_url
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.pool_recycle = pool_recycle
+        self.pool_timeout = pool_timeout
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._engine: Optional[AsyncEngine] = None
+        self._sessionmaker: Optional[async_sessionmaker[AsyncSession]] = None
+
+    def start(self) -> None:
+        """Starts the event loop and creates the engine of the current process."""
+        with self._lock:
+            if self._pid == os.getpid() and self._loop is not None:
+                return
+            # Whatever was inherited from the parent process belongs to a thread that doesn't exist here.
+            self._pid = os.getpid()
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._loop.run_forever, name="worker-event-loop", daemon=True)
+            self._thread.start()
+            self._engine = self._create_engine()
+            self._sessionmaker = async_sessionmaker(self._engine, expire_on_commit=False)
+
+    def run(self, coroutine: Coroutine[Any, Any, T], timeout: Optional[float] = None) -> T:
+        """Runs a coroutine on the event loop and waits for its result.
+
+        Args:
+            coroutine (Coroutine): Coroutine to run.
+            timeout (Optional[float]): Time in seconds to wait for the result.
+
+        Returns:
+            The result of the coroutine.
+        """
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result(timeout)
+
+    def session(self) -> AsyncSession:
+        """Creates a session of the worker's engine, to be used by the coroutines run on the loop."""
+        self.start()
+        return self._sessionmaker()
+
+    def shutdown(self) -> None:
+        """Closes the connections of the pool and stops the event loop."""
+        with self._lock:
+            if self._pid != os.getpid() or self._loop is None:
+                return
+            loop, thread, engine = self._loop, self._thread, self._engine
+            self._loop = self._thread = self._engine = self._sessionmaker = None
+        asyncio.run_coroutine_threadsafe(engine.dispose(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+    def _create_engine(self) -> AsyncEngine:
+        if make_url(self.database_url).get_backend_name() == "sqlite":
+            # SQLite databases aren't pooled.
+            return create_async_engine(self.database_url)
+        return create_async_engine(
+            self.database_url,
+            pool_size=self.pool_size,
+            max_overflow=self.max_overflow,
+            pool_recycle=self.pool_recycle,
+            pool_timeout=self.pool_timeout,
+            pool_pre_ping=True,
+        )
+
+
+def get_worker_runtime() -> WorkerRuntime:
+    return WorkerRuntime(
+        database_url=settings.DATABASE_URL,
+        pool_size=settings.WORKER_DB_POOL_SIZE,
+        max_overflow=settings.WORKER_DB_MAX_OVERFLOW,
+        pool_recycle=settings.WORKER_DB_POOL_RECYCLE_SECONDS,
+        pool_timeout=settings.WORKER_DB_POOL_TIMEOUT_SECONDS,
+    )
@@ -0,0 +1,172 @@
+import asyncio
+import json
+import logging
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+import redis
+import redis.asyncio as aioredis
+from transformers import PreTrainedTokenizerBase, TextStreamer
+
+from app.config import get_settings
+from app.models import Summary
+
+settings = get_settings()
+
+log = logging.getLogger(__name__)
+
+
+def get_channel(summary_id: int) -> str:
+    return f"summaries:{summary_id}:stream"
+
+
+def get_redis_url() -> str:
+    return settings.STREAM_REDIS_URL or settings.RESULT_BACKEND
+
+
+def format_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class SummaryStreamPublisher:
+    """Publishes the progress of summary generation to the Redis channel of the summary.
+
+    Publishing is best effort: if Redis is unavailable, the summary is still
+    generated and stored, the clients just have to read it from the database.
+
+    Attributes:
+        url (str): URL of the Redis server used for publishing.
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        self._client: Optional[redis.Redis] = None
+
+    @property
+    def client(self) -> redis.Redis:
+        if self._client is None:
+            self._client = redis.Redis.from_url(self.url)
+        return self._client
+
+    def has_listeners(self, summary_id: int) -> bool:
+        """Checks whether any client is streaming the summary.
+
+        Args:
+            summary_id (int): ID of the summary record in the database.
+
+        Returns:
+            bool: True if the summary channel has subscribers.
+        """
+        try:
+            return any(count for _, count in self.client.pubsub_numsub(get_channel(summary_id)))
+        except redis.RedisError as exc:
+            log.warning("Failed to check summary stream listeners: %s", exc)
+            return False
+
+    def publish(self, summary_id: int, event: str, data: dict, version: Optional[int] = None) -> None:
+        """Publishes an event to the summary channel.
+
+        Args:
+            summary_id (int): ID of the summary record in the database.
+            event (str): Event name, "token", "summary" or "error".
+            data (dict): Event payload.
+            version (Optional[int]): Job version the event belongs to.
+        """
+        message = {"event": event, "data": data}
+        if version is not None:
+            message["version"] = version
+        try:
+            self.client.publish(get_channel(summary_id), json.dumps(message))
+        except redis.RedisError as exc:
+            log.warning("Failed to publish summary stream event: %s", exc)
+
+    def streamer(
+        self, summary_id: int, tokenizer: PreTrainedTokenizerBase, version: Optional[int] = None
+    ) -> "SummaryTokenStreamer":
+        return SummaryTokenStreamer(self, summary_id, tokenizer, version)
+
+
+class SummaryTokenStreamer(TextStreamer):
+    """Streamer relaying the text generated by the model as "token" events, word by word."""
+
+    def __init__(
+        self,
+        publisher: SummaryStreamPublisher,
+        summary_id: int,
+        tokenizer: PreTrainedTokenizerBase,
+        version: Optional[int] = None,
+    ):
+        super().__init__(tokenizer, skip_prompt=True, skip_special_tokens=True)
+        self.publisher = publisher
+        self.summary_id = summary_id
+        self.version = version
+
+    def on_finalized_text(self, text: str, stream_end: bool = False) -> None:
+        if text:
+            self.publisher.publish(self.summary_id, "token", {"text": text}, self.version)
+
+
+def format_final_event(summary: Optional[Summary]) -> Optional[str]:
+    # Only a finished job ends the stream, the text of a summary being summarized again is outdated.
+    if summary is None:
+        return format_event("error", {"error": "Summary not found"})
+    if summary.status == "done":
+        return format_event("summary", {"summary": summary.summary})
+    if summary.status == "failed":
+        return format_event("error", {"error": summary.error})
+    return None
+
+
+async def relay_summary_events(
+    summary_id: int, get_summary: Callable[[], Awaitable[Optional[Summary]]]
+) -> AsyncIterator[str]:
+    """Relays the events of a summary from its Redis channel as Server-Sent Events.
+
+    The stream ends once the current job of the summary is finished, with a
+    "summary" event carrying the final text or an "error" event if the job
+    failed, or after SUMMARY_STREAM_TIMEOUT_SECONDS. Events of the jobs
+    superseded by the current one are skipped. Comments are sent while the
+    worker is silent to keep the connection alive.
+
+    Args:
+        summary_id (int): ID of the summary record in the database.
+        get_summary (Callable[[], Awaitable[Optional[Summary]]]): Reads the current summary from the database.
+
+    Yields:
+        str: Formatted Server-Sent Events.
+    """
+    summary = await get_summary()
+    if event := format_final_event(summary):
+        yield event
+        return
+
+    client = aioredis.Redis.from_url(get_redis_url())
+    try:
+        async with client.pubsub() as pubsub:
+            await pubsub.subscribe(get_channel(summary_id))
+
+            # The job may have been finished before the subscription took effect.
+            summary = await get_summary()
+            if event := format_final_event(summary):
+                yield event
+                return
+
+            version = summary.job_version
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + settings.SUMMARY_STREAM_TIMEOUT_SECONDS
+            while loop.time() < deadline:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=15)
+                if message is None:
+                    yield ": keep-alive\n\n"
+                    continue
+
+                payload = json.loads(message["data"])
+                if payload.get("version") is not None:
+                    if payload["version"] < version:
+                        continue
+                    # The summary was submitted again in the meantime.
+                    version = payload["version"]
+                yield format_event(payload["event"], payload["data"])
+                if payload["event"] in ("summary", "error"):
+                    return
+    finally:
+        await client.aclose()
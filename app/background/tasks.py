@@ -1,58 +1,504 @@
-import asyncio
+import hashlib
+import json
+import logging
+import time
+from typing import Any, Optional
 
-from newspaper import Article
-from sqlalchemy import select
+from celery import Task, chain
+from celery.exceptions import Ignore
+from celery.utils import uuid
+from newspaper.article import ArticleException
+from sqlalchemy import update
 
+from app.articles.fetcher import ArticleFetchError, get_article_fetcher
+from app.articles.parser import get_article_parser
+from app.articles.store import get_article_store
 from app.config import get_settings
-from app.database import async_session
 from app.language_detection import LanguageDetector
 from app.models import Summary
+from app.summarization.cache import get_summary_cache, make_cache_key
 from app.summarization.summarizer import SummarizerFactory
 
+from .batching import MicroBatcher
+from .runtime import get_worker_runtime
+from .streaming import SummaryStreamPublisher, get_redis_url
 from .worker import celery
+from .writeback import SummaryWriter
 
 settings = get_settings()
 
+log = logging.getLogger(__name__)
+
+runtime = get_worker_runtime()
 factory = SummarizerFactory()
 detector = LanguageDetector()
+fetcher = get_article_fetcher()
+parser = get_article_parser()
+article_store = get_article_store()
+batcher = MicroBatcher(factory, settings.SUMMARIZER_BATCH_SIZE, settings.SUMMARIZER_BATCH_MAX_WAIT_MS)
+summary_cache = get_summary_cache()
+publisher = SummaryStreamPublisher(get_redis_url())
+writer = SummaryWriter(runtime, settings.WRITEBACK_BATCH_SIZE, settings.WRITEBACK_FLUSH_INTERVAL_MS)
 
 
-@celery.task(name="celery_generate_summary")
-def celery_generate_summary(summary_id: int, url: str) -> None:
-    """Celery task to generate a summary for the given article URL.
+def get_queue_depth() -> int:
+    """Gets the number of messages waiting in the inference queue of the broker.
+
+    Returns:
+        int: Number of waiting messages, 0 if the broker can't be asked.
+    """
+    try:
+        with celery.connection_for_read() as connection:
+            queue = connection.default_channel.queue_declare(queue=settings.INFERENCE_QUEUE, passive=True)
+            return queue.message_count
+    except Exception:
+        log.warning("Failed to get the depth of the task queue", exc_info=True)
+        return 0
+
+
+def is_overloaded(enqueued_at: Optional[float]) -> bool:
+    """Checks whether the workers fall behind, so that the summaries should be extractive.
+
+    Args:
+        enqueued_at (Optional[float]): Time the task was sent at.
+
+    Returns:
+        bool: True if the task waited too long or too many tasks are waiting.
+    """
+    if settings.EXTRACTIVE_FALLBACK_WAIT_SECONDS and enqueued_at:
+        if time.time() - enqueued_at > settings.EXTRACTIVE_FALLBACK_WAIT_SECONDS:
+            return True
+    if settings.EXTRACTIVE_FALLBACK_QUEUE_DEPTH:
+        return get_queue_depth() > settings.EXTRACTIVE_FALLBACK_QUEUE_DEPTH
+    return False
+
+
+def generate_abstractive_summary(
+    summary_id: int, text: str, profile: Optional[str], lang: Optional[str] = None, version: Optional[int] = None
+) -> str:
+    """Generates the summary of an article with the summarization model of its language.
+
+    Args:
+        summary_id (int): ID of the summary record in the database.
+        text (str): Text of the article.
+        profile (Optional[str]): Name of the generation profile, defaults to the one configured for the language.
+        lang (Optional[str]): Language code of the article, detected if not given.
+        version (Optional[int]): Job version the summary is generated for, sent along with the streamed tokens.
+
+    Returns:
+        str: Generated summary text.
+    """
+    # Detect the language of the article text.
+    lang = lang or detector.detect(text)
+    profile = profile or factory.get_model_config(lang).profile or settings.DEFAULT_GENERATION_PROFILE
+
+    # Reuse the summary of an identical article made with the same model and parameters.
+    cache_key = make_cache_key(text, factory.get_summarizer(lang), profile)
+    summary = summary_cache.get(cache_key) if summary_cache else None
+
+    if summary is None:
+        streamer = None
+        if not settings.SUMMARIZER_CHUNKING and publisher.has_listeners(summary_id):
+            # The tokens are streamed if the profile allows it, the summary is the same either way.
+            streamer = publisher.streamer(summary_id, factory.get_summarizer(lang).tokenizer, version)
+        # Generate the summary together with the articles of concurrently running tasks.
+        summary = batcher.summarize(lang, text, profile, streamer)
+        if summary_cache:
+            summary_cache.set(cache_key, summary)
+
+    return summary
+
+
+def make_job_key(url: str, profile: Optional[str], mode: str) -> str:
+    """Makes the key identifying the parameters of a summarization job, to coalesce the identical ones.
+
+    Args:
+        url (str): URL of the article.
+        profile (Optional[str]): Name of the generation profile.
+        mode (str): Summarization mode.
+
+    Returns:
+        str: SHA-256 hex digest of the parameters.
+    """
+    return hashlib.sha256(json.dumps([url, profile, mode]).encode()).hexdigest()
+
+
+def get_job_priority(lane: str, jobs_in_flight: int = 0, tokens: int = 0) -> int:
+    """Computes the message priority of a job within its lane.
+
+    Args:
+        lane (str): "interactive" or "bulk".
+        jobs_in_flight (int): Number of other jobs of the same user in flight, for the fair share.
+        tokens (int): Estimated number of tokens of the article, for the shortest jobs to run first.
+
+    Returns:
+        int: Message priority, higher runs first.
+    """
+    top = settings.INTERACTIVE_PRIORITY if lane == "interactive" else settings.BULK_PRIORITY
+    demotion = 0
+    if settings.FAIR_SHARE_JOBS_PER_LEVEL:
+        demotion += max(jobs_in_flight - settings.FAIR_SHARE_FREE_JOBS, 0) // settings.FAIR_SHARE_JOBS_PER_LEVEL
+    if settings.SJF_TOKENS_PER_LEVEL:
+        demotion += tokens // settings.SJF_TOKENS_PER_LEVEL
+    return max(top - min(demotion, settings.PRIORITY_LANE_LEVELS - 1), 0)
+
+
+def estimate_tokens(text: str) -> int:
+    # Roughly four characters per token, good enough to order the jobs without running the tokenizer.
+    return len(text) // 4
+
+
+def count_tokens(text: str, lang: Optional[str] = None) -> int:
+    """Counts the tokens of a text with the tokenizer of the summarizer of its language.
+
+    Args:
+        text (str): Text to count the tokens of.
+        lang (Optional[str]): Language code of the text.
+
+    Returns:
+        int: Number of tokens, estimated without the language or a local tokenizer.
+    """
+    tokenizer = factory.get_summarizer(lang).tokenizer if lang else None
+    if tokenizer is None:
+        return estimate_tokens(text)
+    # The batcher may be running the same tokenizer with other truncation settings on its thread.
+    with batcher.model_lock:
+        return len(tokenizer(text, add_special_tokens=False)["input_ids"])
+
+
+def get_queue_wait(task: Task) -> float:
+    # Time the task waited in the queue of the broker, from the time stamped when it was sent.
+    enqueued_at = task.request.get("enqueued_at")
+    return max(time.time() - enqueued_at, 0.0) if enqueued_at else 0.0
+
+
+def new_job_task_ids() -> list[str]:
+    # The IDs are known before the job is sent, so that it can be recorded (and revoked) before a worker gets it.
+    return [uuid() for _ in range(3)]
+
+
+def enqueue_summary(
+    summary_id: int,
+    url: str,
+    profile: Optional[str] = None,
+    mode: str = "auto",
+    version: Optional[int] = None,
+    task_ids: Optional[list[str]] = None,
+    lane: str = "interactive",
+    jobs_in_flight: int = 0,
+    countdown: Optional[float] = None,
+    backfill: bool = False,
+) -> None:
+    """Sends an article through the summarization pipeline.
+
+    The stages run on their own queues, so that they can be scaled independently:
+    the I/O-bound fetching, the CPU-bound detection and summarization, and the
+    light database write-back. Only the extracted article text is passed on
+    from the fetching stage.
 
     Args:
         summary_id (int): ID of the summary record in the database.
         url (str): URL of the article to summarize.
+        profile (Optional[str]): Name of the generation profile, defaults to the one configured for the language.
+        mode (str): "abstractive", "extractive" or "auto" to fall back to extractive when overloaded.
+        version (Optional[int]): Job version of the summary the job belongs to, None skips the staleness checks.
+        task_ids (Optional[list[str]]): IDs of the fetching, summarization and write-back tasks.
+        lane (str): Priority lane of the job, "interactive" or "bulk".
+        jobs_in_flight (int): Number of other jobs of the same user in flight, to share the workers fairly.
+        countdown (Optional[float]): Delay in seconds before the article is fetched.
+        backfill (bool): Whether the job replaces a finished extractive summary, which stays done meanwhile.
     """
-    loop = asyncio.get_event_loop()
+    fetch_id, summarize_id, store_id = task_ids or new_job_task_ids()
+    # The priority of the summarization is adjusted to the length of the article once it is fetched.
+    priority = get_job_priority(lane, jobs_in_flight)
+    pipeline = chain(
+        fetch_article.s(summary_id, url, profile, mode, version, lane, jobs_in_flight, backfill).set(
+            task_id=fetch_id, priority=priority
+        ),
+        summarize_article.s().set(task_id=summarize_id, priority=priority),
+        store_summary.s().set(task_id=store_id, priority=priority),
+    )
+    if version is not None:
+        # Failed jobs are recorded and no longer count as in flight, so that an identical job can be started again.
+        pipeline = pipeline.on_error(fail_summary_job.s(summary_id, version, backfill))
+    pipeline.apply_async(countdown=countdown)
 
-    # Download and parse the article.
-    article = Article(url)
-    article.download()
-    article.parse()
 
-    # Detect the language of the article text.
-    lang = detector.detect(article.text)
+def revoke_summary_job(task_ids: Optional[str]) -> None:
+    """Revokes the tasks of a superseded or orphaned job that haven't started yet.
+
+    Running tasks aren't terminated, the workers drop their results as stale.
+
+    Args:
+        task_ids (Optional[str]): Space-separated IDs of the tasks of the job.
+    """
+    if task_ids:
+        try:
+            celery.control.revoke(task_ids.split())
+        except Exception:
+            log.warning("Failed to revoke the tasks %s", task_ids, exc_info=True)
+
+
+def enter_stage(summary_id: int, version: Optional[int], status: str) -> bool:
+    """Sets the status of the summary to the stage its job is in, unless the job is stale.
+
+    Args:
+        summary_id (int): ID of the summary record in the database.
+        version (Optional[int]): Job version the task belongs to.
+        status (str): Status of the stage.
+
+    Returns:
+        bool: False if the job has been superseded by a newer one or its summary deleted.
+    """
+
+    async def update_status() -> int:
+        statement = update(Summary).where(Summary.id == summary_id).values(status=status)
+        if version is not None:
+            statement = statement.where(Summary.job_version == version)
+        async with runtime.session() as db:
+            result = await db.execute(statement.execution_options(synchronize_session=False))
+            await db.commit()
+            return result.rowcount
+
+    return runtime.run(update_status()) > 0
+
+
+def record_job_task_ids(summary_id: int, version: Optional[int], task_ids: list[str]) -> bool:
+    """Records the tasks of a follow-up job of the summary, so that they are revoked along with the job.
+
+    Args:
+        summary_id (int): ID of the summary record in the database.
+        version (Optional[int]): Job version the follow-up job belongs to.
+        task_ids (list[str]): IDs of the tasks of the follow-up job.
+
+    Returns:
+        bool: False if the job has been superseded by a newer one or its summary deleted.
+    """
+
+    async def update_task_ids() -> int:
+        statement = update(Summary).where(Summary.id == summary_id).values(job_task_ids=" ".join(task_ids))
+        if version is not None:
+            statement = statement.where(Summary.job_version == version)
+        async with runtime.session() as db:
+            result = await db.execute(statement.execution_options(synchronize_session=False))
+            await db.commit()
+            return result.rowcount
+
+    return runtime.run(update_task_ids()) > 0
+
+
+def drop_if_stale(summary_id: int, version: Optional[int], status: str) -> None:
+    # The status update doubles as the staleness check, so the stages don't read the row before writing it.
+    if not enter_stage(summary_id, version, status):
+        log.info("Dropping the job version %s of the summary %s, it is stale", version, summary_id)
+        # Ignoring the task stops the chain without marking the job as failed.
+        raise Ignore()
+
+
+# The stages pass the article text on through the chain, storing it in the result backend would only waste memory.
+@celery.task(bind=True, name="fetch_article", ignore_result=True)
+def fetch_article(
+    self: Task,
+    summary_id: int,
+    url: str,
+    profile: Optional[str],
+    mode: str,
+    version: Optional[int] = None,
+    lane: str = "interactive",
+    jobs_in_flight: int = 0,
+    backfill: bool = False,
+) -> dict[str, Any]:
+    """Celery task downloading and parsing the article, unless its text or failure is already stored.
+
+    Args:
+        summary_id (int): ID of the summary record in the database.
+        url (str): URL of the article to summarize.
+        profile (Optional[str]): Name of the generation profile.
+        mode (str): Summarization mode.
+        version (Optional[int]): Job version the task belongs to.
+        lane (str): Priority lane of the job.
+        jobs_in_flight (int): Number of other jobs of the same user in flight when the job was sent.
+        backfill (bool): Whether the job replaces a finished extractive summary.
+
+    Returns:
+        dict[str, Any]: The article text along with the summary parameters.
+    """
+    # The extractive summary a backfill replaces stays done until the abstractive one is written.
+    drop_if_stale(summary_id, version, "done" if backfill else "fetching")
+    stats = {"queue_wait_seconds": get_queue_wait(self), "fetch_seconds": 0.0, "parse_seconds": 0.0}
+
+    start = time.perf_counter()
+    stored = article_store.get(url) if article_store else None
+    if stored and stored.error is not None:
+        raise ArticleFetchError(f"{stored.error} (remembered failure)")
+
+    if stored:
+        text = stored.text
+        stats["fetch_seconds"] = time.perf_counter() - start
+    else:
+        try:
+            page = runtime.run(fetcher.fetch(url))
+            stats["fetch_seconds"] = time.perf_counter() - start
+            start = time.perf_counter()
+            text = parser.parse(url, page.html)
+            stats["parse_seconds"] = time.perf_counter() - start
+            if not text:
+                raise ArticleFetchError(f"No article text found at {url}")
+        except (ArticleFetchError, ArticleException) as exc:
+            if article_store:
+                article_store.set_failure(url, str(exc))
+            raise
+        if article_store:
+            article_store.set_text(url, text)
+
+    if settings.SJF_TOKENS_PER_LEVEL and self.request.chain:
+        # Short articles overtake the long ones of the same lane in the inference queue. The remaining
+        # signatures of the chain are sent by the worker after this task returns, the next one being the last.
+        priority = get_job_priority(lane, jobs_in_flight, estimate_tokens(text))
+        self.request.chain[-1].setdefault("options", {})["priority"] = priority
+
+    return {
+        "summary_id": summary_id,
+        "url": url,
+        "profile": profile,
+        "mode": mode,
+        "version": version,
+        "text": text,
+        "stats": stats,
+        "backfill": backfill,
+    }
 
-    # Get the appropriate summarizer based on the detected language.
-    summarizer = factory.get_summarizer(lang)
 
-    # Generate the summary.
-    summary = summarizer.summarize(article.text)
+@celery.task(bind=True, name="summarize_article", ignore_result=True)
+def summarize_article(self: Task, article: dict[str, Any]) -> dict[str, Any]:
+    """Celery task detecting the language of the article and summarizing it.
 
-    async def update_summary(summary_id: int, summary: str) -> None:
-        """Asynchronous function to update the summary record in the database.
+    Args:
+        article (dict[str, Any]): Result of the fetching stage.
+
+    Returns:
+        dict[str, Any]: The summary along with whether it is an extractive fallback.
+    """
+    # The summary may have been updated or deleted while the article was fetched.
+    drop_if_stale(article["summary_id"], article.get("version"), "done" if article.get("backfill") else "summarizing")
+    text, stats = article["text"], dict(article.get("stats", {}))
+    stats["queue_wait_seconds"] = stats.get("queue_wait_seconds", 0.0) + get_queue_wait(self)
+
+    fallback = article["mode"] == "auto" and is_overloaded(self.request.get("enqueued_at"))
+    lang = None
+    start = time.perf_counter()
+    if article["mode"] == "extractive" or fallback:
+        summary = factory.get_extractive_summarizer().summarize(text)
+    else:
+        lang = detector.detect(text)
+        stats["detect_seconds"] = time.perf_counter() - start
+        start = time.perf_counter()
+        summary = generate_abstractive_summary(
+            article["summary_id"], text, article["profile"], lang, article.get("version")
+        )
+    stats["generate_seconds"] = time.perf_counter() - start
+    stats["input_tokens"] = count_tokens(text, lang)
+    stats["output_tokens"] = count_tokens(summary, lang)
+
+    return {
+        "summary_id": article["summary_id"],
+        "url": article["url"],
+        "profile": article["profile"],
+        "version": article.get("version"),
+        "summary": summary,
+        "fallback": fallback,
+        "stats": stats,
+    }
+
+
+@celery.task(bind=True, name="store_summary", ignore_result=True)
+def store_summary(self: Task, result: dict[str, Any]) -> None:
+    """Celery task writing the summary and its job statistics to the database and notifying the streaming clients.
+
+    Args:
+        result (dict[str, Any]): Result of the summarization stage.
+    """
+    summary_id, summary, version = result["summary_id"], result["summary"], result.get("version")
+    stats = dict(result.get("stats", {}))
+    stats["queue_wait_seconds"] = stats.get("queue_wait_seconds", 0.0) + get_queue_wait(self)
+    # The write is conditional on the version, so it doubles as the staleness check.
+    if not writer.write(summary_id, summary, version, stats):
+        log.info("Dropping the job version %s of the summary %s, it is stale", version, summary_id)
+        return
+
+    # Let the streaming clients know the final text.
+    publisher.publish(summary_id, "summary", {"summary": summary}, version)
+
+    if result["fallback"] and settings.EXTRACTIVE_BACKFILL_DELAY_SECONDS >= 0:
+        # Replace the extractive summary once the workers have caught up. The backfill is recorded as the tasks
+        # of the job, so that it is revoked if the summary is updated or deleted in the meantime.
+        task_ids = new_job_task_ids()
+        if record_job_task_ids(summary_id, version, task_ids):
+            enqueue_summary(
+                summary_id,
+                result["url"],
+                result["profile"],
+                "abstractive",
+                version,
+                task_ids,
+                lane="bulk",
+                countdown=settings.EXTRACTIVE_BACKFILL_DELAY_SECONDS,
+                backfill=True,
+            )
+
+
+@celery.task(name="fail_summary_job", ignore_result=True)
+def fail_summary_job(
+    request: Any, exc: Exception, traceback: Any, summary_id: int, version: int, backfill: bool = False
+) -> None:
+    """Error callback of the jobs recording the failure, unless the job has been superseded already.
+
+    The failed job no longer counts as in flight, so that an identical one can be started again,
+    and the streaming clients are sent the error. A failed backfill leaves the extractive summary
+    it was to replace as it is.
 
-        Args:
-            summary_id (int): ID of the summary record in the database.
-            summary (str): Generated summary text.
-        """
-        async with async_session() as db:
-            result = await db.execute(select(Summary).where(Summary.id == summary_id))
-            summary_to_update = result.scalar_one()
-            summary_to_update.summary = summary
+    Args:
+        request (Any): Request of the failed task.
+        exc (Exception): Exception the task failed with.
+        traceback (Any): Traceback of the exception.
+        summary_id (int): ID of the summary record in the database.
+        version (int): Job version of the failed job.
+        backfill (bool): Whether the failed job is the backfill of an extractive summary.
+    """
+
+    error = str(exc) or type(exc).__name__
+    if backfill:
+        log.warning("Failed to backfill the extractive summary %s: %s", summary_id, error)
+
+    async def record_failure() -> int:
+        async with runtime.session() as db:
+            values = {} if backfill else {"status": "failed", "error": error, "job_key": None}
+            result = await db.execute(
+                update(Summary)
+                .where(Summary.id == summary_id, Summary.job_version == version)
+                .values(job_task_ids=None, **values)
+                .execution_options(synchronize_session=False)
+            )
             await db.commit()
+            return result.rowcount
+
+    if runtime.run(record_failure()) and not backfill:
+        publisher.publish(summary_id, "error", {"error": error}, version)
+
 
-    # Run the asynchronous function to update the summary record.
-    loop.run_until_complete(update_summary(summary_id, summary))
+@celery.task(name="celery_generate_summary", ignore_result=True)
+def celery_generate_summary(
+    summary_id: int, url: str, profile: Optional[str] = None, mode: str = "auto", version: Optional[int] = None
+) -> None:
+    """Celery task to generate a summary for the given article URL.
+
+    Kept for compatibility, it runs all stages of the pipeline in the same worker.
+
+    Args:
+        summary_id (int): ID of the summary record in the database.
+        url (str): URL of the article to summarize.
+        profile (Optional[str]): Name of the generation profile, defaults to the one configured for the language.
+        mode (str): "abstractive", "extractive" or "auto" to fall back to extractive when overloaded.
+        version (Optional[int]): Job version of the summary the job belongs to.
+    """
+    store_summary(summarize_article(fetch_article(summary_id, url, profile, mode, version)))
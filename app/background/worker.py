@@ -1,12 +1,155 @@
+import gc
+import logging
+import time
+from datetime import datetime
+from typing import Optional
+
 from celery import Celery
+from celery.utils.dispatch import Signal
+from celery.worker import WorkController
+from celery.concurrency import get_implementation
+from celery.signals import (
+    before_task_publish,
+    worker_init,
+    worker_process_init,
+    worker_process_shutdown,
+    worker_shutdown,
+)
 
 from app.config import get_settings
 
 settings = get_settings()
 
+log = logging.getLogger(__name__)
+
 celery = Celery(
     main=__name__,
     backend=settings.RESULT_BACKEND,
     broker=settings.BROKER_URL,
     include=["app.background.tasks"],
 )
+# The stages of the summarization pipeline are consumed by workers scaled for their kind of load.
+celery.conf.task_routes = {
+    "fetch_article": {"queue": settings.FETCH_QUEUE},
+    "summarize_article": {"queue": settings.INFERENCE_QUEUE},
+    "store_summary": {"queue": settings.WRITE_QUEUE},
+}
+# Priorities only order the messages waiting in the broker, so the workers don't reserve more than they run.
+celery.conf.task_queue_max_priority = settings.TASK_QUEUE_MAX_PRIORITY
+celery.conf.task_default_priority = settings.BULK_PRIORITY
+celery.conf.worker_prefetch_multiplier = 1
+
+
+@worker_init.connect
+def preload_models(**kwargs) -> None:
+    """Loads the models in the main worker process before the pool is started.
+
+    With the prefork pool the children are forked after this point, so they
+    share the already loaded weights copy-on-write instead of each loading its
+    own copy, and the first task of every child doesn't pay for the model load.
+    """
+    if not settings.WORKER_PRELOAD_MODELS or settings.INFERENCE_SERVER_SOCKET:
+        # With the inference server the models are loaded there and not in the workers at all.
+        return
+
+    from .tasks import detector, factory
+
+    log.info("Preloading models for languages: %s...", ", ".join(settings.WORKER_PRELOAD_LANGUAGES))
+    detector.get_detector()
+    for lang in settings.WORKER_PRELOAD_LANGUAGES:
+        factory.get_summarizer(lang)
+
+    # Move the loaded objects out of the garbage collector's reach, so that
+    # collections in the children don't write to (and thus copy) shared pages.
+    gc.collect()
+    gc.freeze()
+
+
+def get_pool_name(worker: WorkController) -> str:
+    # The pool class may still be given by its name or alias, e.g. "prefork" or "threads".
+    return get_implementation(worker.pool_cls).__module__.rsplit(".", 1)[-1]
+
+
+@worker_init.connect
+def limit_batch_submitters(sender, **kwargs) -> None:
+    """Tells the batchers how many tasks of a worker process can submit to them concurrently.
+
+    The children of the prefork pool, like the solo pool, run one task at a
+    time, so their batches never hold more than one item and are processed
+    without waiting for others. Their articles are only batched together by
+    the inference server, which collects the requests of all processes of the
+    node. The threads and green pools run as many tasks at once as their
+    concurrency.
+    """
+    from .tasks import batcher, writer
+
+    single_task = get_pool_name(sender) in ("prefork", "solo")
+    batcher.max_submitters = writer.max_submitters = 1 if single_task else sender.concurrency
+
+    consumed_queues = sender.app.amqp.queues.consume_from
+    if single_task and not settings.INFERENCE_SERVER_SOCKET and settings.INFERENCE_QUEUE in consumed_queues:
+        log.warning(
+            "The %s queue is consumed by a pool running one task per process without an inference server, "
+            "so the articles are summarized one at a time. Use the threads pool or set INFERENCE_SERVER_SOCKET "
+            "to batch them.",
+            settings.INFERENCE_QUEUE,
+        )
+
+
+@worker_process_init.connect
+def start_runtime(**kwargs) -> None:
+    """Starts the event loop and creates the database engine of a worker process right after it is forked."""
+    from .tasks import runtime
+
+    runtime.start()
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def stop_runtime(sender: Optional[WorkController] = None, signal: Optional[Signal] = None, **kwargs) -> None:
+    """Closes the connections of the worker process and stops its event loop.
+
+    The prefork children are shut down with worker_process_shutdown, while the
+    other pools run the tasks in the main process, shut down with worker_shutdown.
+    """
+    if signal is worker_shutdown and get_pool_name(sender) == "prefork":
+        # The parent of the prefork children doesn't run tasks, there is nothing to stop.
+        return
+
+    from .tasks import fetcher, parser, runtime
+
+    try:
+        runtime.run(fetcher.aclose())
+        parser.shutdown()
+        runtime.shutdown()
+    except Exception:
+        log.warning("Failed to shut down the worker runtime", exc_info=True)
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def log_lookup_stats(**kwargs) -> None:
+    """Logs how much work the caches and the language pre-detector of the worker process saved."""
+    from .tasks import article_store, detector, summary_cache
+
+    if article_store and article_store.hits + article_store.misses:
+        log.info("Article store: %d hits, %d misses", article_store.hits, article_store.misses)
+    if summary_cache and summary_cache.hits + summary_cache.misses:
+        log.info("Summary cache: %d hits, %d misses", summary_cache.hits, summary_cache.misses)
+    if detector.stats["predetected"] + detector.stats["model"]:
+        log.info(
+            "Language detection: %d predetected, %d by the model",
+            detector.stats["predetected"],
+            detector.stats["model"],
+        )
+
+
+@before_task_publish.connect
+def stamp_enqueue_time(headers: dict, **kwargs) -> None:
+    """Records when a task was sent, so that the worker knows how long it waited in the queue.
+
+    A task sent with a countdown or an ETA, like the backfills, only starts waiting once it is due.
+    """
+    eta = headers.get("eta")
+    due_at = datetime.fromisoformat(eta).timestamp() if eta else 0.0
+    headers.setdefault("enqueued_at", max(time.time(), due_at))
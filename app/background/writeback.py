@@ -0,0 +1,194 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from sqlalchemy import bindparam, select, update
+
+from app.models import Summary
+
+from .runtime import WorkerRuntime
+
+# Statistics of the jobs written along with the summaries.
+SUMMARY_STATS = (
+    "queue_wait_seconds",
+    "fetch_seconds",
+    "parse_seconds",
+    "detect_seconds",
+    "generate_seconds",
+    "input_tokens",
+    "output_tokens",
+)
+
+
+@dataclass
+class PendingWrite:
+    summary_id: int
+    summary: str
+    version: Optional[int] = None
+    stats: dict[str, Any] = field(default_factory=dict)
+    future: Future = field(default_factory=Future)
+
+
+class SummaryWriter:
+    """Batched write-back of the generated summaries to the database.
+
+    Tasks completing concurrently in the same worker process hand their summaries
+    to the writer instead of updating the rows one by one. A background thread
+    collects them until either the batch is full or the oldest one has waited
+    for the flush interval, and writes the whole batch with a single executemany
+    UPDATE by primary key in one transaction, without reading the rows first.
+    A summary of a job is only written if the job hasn't been superseded, i.e.
+    its version is still the current one, together with the statistics of the
+    job. The time the batch took to write, up to the commit, is then set on the
+    written rows within the same transaction. The tasks wait for their batch to
+    be committed through futures, which tell whether their summary was written.
+    The rows of superseded jobs are only looked up when the number of updated
+    rows shows that some weren't written.
+
+    Attributes:
+        runtime (WorkerRuntime): Runtime providing the event loop and the database sessions.
+        max_batch_size (int): Maximum number of summaries written in one transaction.
+        flush_interval (float): Maximum time in seconds a summary waits for the batch to fill up.
+        max_submitters (Optional[int]): Number of tasks of the process that can submit concurrently, if known.
+            A batch holding one item from each of them can't grow any further and is processed right away.
+    """
+
+    def __init__(
+        self,
+        runtime: WorkerRuntime,
+        max_batch_size: int,
+        flush_interval_ms: int,
+        max_submitters: Optional[int] = None,
+    ):
+        self.runtime = runtime
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_submitters = max_submitters
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._queue: queue.Queue[PendingWrite] = queue.Queue()
+
+    def submit(
+        self, summary_id: int, summary: str, version: Optional[int] = None, stats: Optional[dict[str, Any]] = None
+    ) -> Future:
+        """Schedules a summary to be written to its row.
+
+        Args:
+            summary_id (int): ID of the summary record in the database.
+            summary (str): Generated summary text.
+            version (Optional[int]): Job version the summary was generated by, None writes it unconditionally.
+            stats (Optional[dict[str, Any]]): Statistics of the job, named after the columns in SUMMARY_STATS.
+
+        Returns:
+            Future: Future resolved once the batch of the summary is committed, with whether it was written.
+        """
+        self._ensure_running()
+        pending = PendingWrite(summary_id, summary, version, stats or {})
+        self._queue.put(pending)
+        return pending.future
+
+    def write(
+        self, summary_id: int, summary: str, version: Optional[int] = None, stats: Optional[dict[str, Any]] = None
+    ) -> bool:
+        """Schedules a summary to be written to its row and waits for the commit.
+
+        Args:
+            summary_id (int): ID of the summary record in the database.
+            summary (str): Generated summary text.
+            version (Optional[int]): Job version the summary was generated by, None writes it unconditionally.
+            stats (Optional[dict[str, Any]]): Statistics of the job, named after the columns in SUMMARY_STATS.
+
+        Returns:
+            bool: False if the job has been superseded by a newer one or its summary deleted.
+        """
+        return self.submit(summary_id, summary, version, stats).result()
+
+    def _ensure_running(self) -> None:
+        # Threads don't survive a fork, so a child process starts its own writer.
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._queue = queue.Queue()
+                threading.Thread(target=self._run, name="summary-writer", daemon=True).start()
+
+    def _run(self) -> None:
+        while True:
+            self._flush(self._collect())
+
+    def _collect(self) -> list[PendingWrite]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        # Every submitter waits for its result, so there are never more pending items than submitters.
+        max_batch_size = min(self.max_batch_size, self.max_submitters or self.max_batch_size)
+        while len(batch) < max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush(self, batch: list[PendingWrite]) -> None:
+        # The latest summary of a job wins if it was completed twice within the batch.
+        rows = {
+            (pending.summary_id, pending.version): {
+                "row_id": pending.summary_id,
+                "row_summary": pending.summary,
+                "row_version": pending.version,
+                **{f"row_{name}": pending.stats.get(name) for name in SUMMARY_STATS},
+            }
+            for pending in batch
+        }
+        try:
+            written = self.runtime.run(self._update(list(rows.values())))
+        except Exception as exc:
+            for pending in batch:
+                pending.future.set_exception(exc)
+        else:
+            for pending in batch:
+                pending.future.set_result(pending.version is None or (pending.summary_id, pending.version) in written)
+
+    async def _update(self, rows: list[dict]) -> set[tuple[int, int]]:
+        versioned = [row for row in rows if row["row_version"] is not None]
+        unversioned = [row for row in rows if row["row_version"] is None]
+        statement = (
+            update(Summary.__table__)
+            .where(Summary.id == bindparam("row_id"))
+            .values(
+                summary=bindparam("row_summary"),
+                status="done",
+                error=None,
+                job_key=None,
+                job_task_ids=None,
+                **{name: bindparam(f"row_{name}") for name in SUMMARY_STATS},
+            )
+        )
+        written = {(row["row_id"], row["row_version"]) for row in versioned}
+        started = time.monotonic()
+        async with self.runtime.session() as db:
+            if versioned:
+                # Rows of superseded jobs (or deleted summaries) simply don't match.
+                result = await db.execute(statement.where(Summary.job_version == bindparam("row_version")), versioned)
+                if result.rowcount != len(versioned):
+                    # The versions of the written rows are still the current ones.
+                    current = await db.execute(
+                        select(Summary.id, Summary.job_version).where(Summary.id.in_([id for id, _ in written]))
+                    )
+                    written &= set(current.tuples())
+            if unversioned:
+                await db.execute(statement, unversioned)
+            written_ids = [id for id, _ in written] + [row["row_id"] for row in unversioned]
+            if written_ids:
+                await db.execute(
+                    update(Summary.__table__)
+                    .where(Summary.id.in_(written_ids))
+                    .values(write_seconds=time.monotonic() - started)
+                )
+            await db.commit()
+        return written
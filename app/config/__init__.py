@@ -1,13 +1,35 @@
 import logging
 from functools import lru_cache
-from typing import List
+from typing import Dict, List, Literal, Optional
 
-from pydantic import Field
+from pydantic import BaseModel, Field, model_validator
 from pydantic_settings import BaseSettings
 
 log = logging.getLogger("uvicorn")
 
 
+class GenerationProfile(BaseModel):
+    """Generation parameters overriding the summarizer's defaults, unset ones are left as they are."""
+
+    num_beams: Optional[int] = None
+    max_new_tokens: Optional[int] = None
+    min_new_tokens: Optional[int] = None
+    early_stopping: Optional[bool] = None
+    # Scale max_new_tokens down to this share of the input tokens.
+    length_ratio: Optional[float] = None
+
+
+class SummarizerModel(BaseModel):
+    """Summarization model of a language."""
+
+    model: str
+    # Summarizer implementation the model is used with.
+    summarizer: Literal["english", "russian"] = "english"
+    # Default to the SUMMARIZER_BACKEND and the DEFAULT_GENERATION_PROFILE.
+    backend: Optional[Literal["torch", "onnx", "onnx-int8"]] = None
+    profile: Optional[str] = None
+
+
 class Settings(BaseSettings):
     ENVIRONMENT: str
     TESTING: bool
@@ -24,10 +46,144 @@ class Settings(BaseSettings):
     AUTH_TOKEN_URL: str = "/api/token"
     ORIGINS: List[str] = Field(["http://localhost", "https://localhost"])
 
+    # Redis used to relay generated tokens from the worker to the streaming endpoint, defaults to the RESULT_BACKEND.
+    STREAM_REDIS_URL: Optional[str] = None
+    SUMMARY_STREAM_TIMEOUT_SECONDS: int = 5 * 60
+
+    # Reuse summaries of the same article younger than this instead of generating new ones, 0 disables.
+    SUMMARY_FRESHNESS_SECONDS: int = 24 * 60 * 60
+
+    # Queues of the summarization pipeline stages: I/O-bound fetching, CPU-bound inference and database write-back.
+    FETCH_QUEUE: str = "fetch"
+    INFERENCE_QUEUE: str = "inference"
+    WRITE_QUEUE: str = "write"
+    # Jobs are ordered by message priority (0-TASK_QUEUE_MAX_PRIORITY, higher first, RabbitMQ semantics) in two
+    # lanes: interactive submissions start at INTERACTIVE_PRIORITY and bulk ones (and the backfills) at
+    # BULK_PRIORITY, each lane spanning PRIORITY_LANE_LEVELS levels below its start. Within a lane, a job is demoted
+    # one level per FAIR_SHARE_JOBS_PER_LEVEL jobs its user already has in flight beyond FAIR_SHARE_FREE_JOBS, and
+    # its inference one more level per SJF_TOKENS_PER_LEVEL estimated tokens of the article (0 disables either).
+    TASK_QUEUE_MAX_PRIORITY: int = 9
+    INTERACTIVE_PRIORITY: int = 9
+    BULK_PRIORITY: int = 4
+    PRIORITY_LANE_LEVELS: int = 5
+    FAIR_SHARE_FREE_JOBS: int = 3
+    FAIR_SHARE_JOBS_PER_LEVEL: int = 10
+    SJF_TOKENS_PER_LEVEL: int = 512
+
+    # Load the models in the main worker process, so that prefork children share them and start warm.
+    WORKER_PRELOAD_MODELS: bool = True
+    WORKER_PRELOAD_LANGUAGES: List[str] = Field(["en", "ru"])
+    # Database pool of every worker process, created after the fork and kept for the lifetime of the process.
+    WORKER_DB_POOL_SIZE: int = 2
+    WORKER_DB_MAX_OVERFLOW: int = 2
+    WORKER_DB_POOL_RECYCLE_SECONDS: int = 30 * 60
+    WORKER_DB_POOL_TIMEOUT_SECONDS: float = 30
+    # Completed summaries are written to the database in batches of up to WRITEBACK_BATCH_SIZE, flushed at the
+    # latest after WRITEBACK_FLUSH_INTERVAL_MS. Batches form from the concurrent tasks of a worker process, so the
+    # write queue is best consumed by a threads or gevent pool. The children of the prefork pool run one task at a
+    # time and write every summary right away.
+    WRITEBACK_BATCH_SIZE: int = 64
+    WRITEBACK_FLUSH_INTERVAL_MS: int = 200
+
+    # Confidence above which the language guessed from the script and character trigrams is taken without
+    # running the detection model, above 1 always runs the model.
+    LANGUAGE_PREDETECTION_THRESHOLD: float = 0.9
+
+    # Unix socket of the local inference server (python -m app.inference.server) owning the models. When set,
+    # the workers send detection and summarization requests to it instead of loading the models themselves.
+    INFERENCE_SERVER_SOCKET: Optional[str] = None
+
+    # Summarization models per language, en and ru default to the SUMMARIZER_MODEL_EN and SUMMARIZER_MODEL_RU.
+    SUMMARIZER_MODELS: Dict[str, SummarizerModel] = Field({})
+    # Memory the loaded summarization models may take, the least recently used ones that have been idle
+    # for SUMMARIZER_MIN_IDLE_SECONDS are evicted to stay within it (0 disables the limit).
+    SUMMARIZER_MEMORY_BUDGET_MB: int = 0
+    SUMMARIZER_MIN_IDLE_SECONDS: int = 60
+
+    # Inference backend of the summarizers, the ONNX ones require the onnx extra to be installed.
+    SUMMARIZER_BACKEND: Literal["torch", "onnx", "onnx-int8"] = "torch"
+    SUMMARIZER_ONNX_DIR: str = "~/.cache/summarizers/onnx"
+    # Maximum number of articles summarized by a single generate call. Batches form from the concurrent tasks of a
+    # threads or gevent worker, or from all prefork children of a node through the inference server.
+    SUMMARIZER_BATCH_SIZE: int = 8
+    # How long the worker waits for concurrent tasks to fill up a batch of articles.
+    SUMMARIZER_BATCH_MAX_WAIT_MS: int = 50
+    # Round padded input lengths up to a multiple of this value (e.g. 8 or 64) for kernel efficiency.
+    SUMMARIZER_PAD_TO_MULTIPLE_OF: Optional[int] = None
+    # Summarize long articles in overlapping token windows instead of truncating them.
+    SUMMARIZER_CHUNKING: bool = False
+    SUMMARIZER_CHUNK_OVERLAP: int = 64
+    SUMMARIZER_MAX_CHUNKS: int = 8
+
+    # Named generation profiles that can be selected per summary, the default one keeps the model defaults.
+    GENERATION_PROFILES: Dict[str, GenerationProfile] = Field(
+        {
+            "fast": GenerationProfile(num_beams=1, max_new_tokens=96, min_new_tokens=16, length_ratio=0.25),
+            "balanced": GenerationProfile(),
+            "quality": GenerationProfile(num_beams=6, max_new_tokens=256, early_stopping=True),
+        }
+    )
+    DEFAULT_GENERATION_PROFILE: str = "balanced"
+
+    # Extractive summaries are made on demand or instead of the abstractive ones when the workers are overloaded,
+    # i.e. when a task waited in the queue or the queue holds more than the threshold (0 disables the check).
+    EXTRACTIVE_SUMMARY_SENTENCES: int = 3
+    EXTRACTIVE_FALLBACK_WAIT_SECONDS: float = 0
+    EXTRACTIVE_FALLBACK_QUEUE_DEPTH: int = 0
+    # Replace the fallback extractive summaries with the abstractive ones after the delay (negative disables).
+    EXTRACTIVE_BACKFILL_DELAY_SECONDS: int = 600
+
+    # Article downloads share a connection pool, with at most FETCH_MAX_CONNECTIONS_PER_HOST to the same host.
+    FETCH_MAX_CONNECTIONS: int = 100
+    FETCH_MAX_CONNECTIONS_PER_HOST: int = 4
+    FETCH_CONNECT_TIMEOUT_SECONDS: float = 5
+    FETCH_READ_TIMEOUT_SECONDS: float = 15
+    FETCH_MAX_BODY_BYTES: int = 5 * 1024 * 1024
+    FETCH_USER_AGENT: str = "Mozilla/5.0 (compatible; ArticleSummarizer/2.0)"
+    # Number and total size of the downloaded pages kept to revalidate them with conditional requests.
+    FETCH_REVALIDATION_MAX_ITEMS: int = 256
+    FETCH_REVALIDATION_MAX_CHARS: int = 32 * 1024 * 1024
+    # Article pages are parsed in a pool of PARSE_MAX_WORKERS processes (0 parses them inline), truncated to
+    # PARSE_MAX_HTML_CHARS and given up on after PARSE_TIMEOUT_SECONDS. The pool can't be started in the children of
+    # the prefork pool, where the pages are parsed inline, so it is meant for the threads, gevent or solo pools.
+    PARSE_MAX_WORKERS: int = 2
+    PARSE_TIMEOUT_SECONDS: float = 10
+    PARSE_MAX_HTML_CHARS: int = 2 * 1024 * 1024
+    # Number of pages a parsing process handles before it is replaced, to bound the memory lxml holds on to.
+    PARSE_MAX_TASKS_PER_WORKER: int = 500
+
+    # Store of the parsed article texts keyed by the canonical URL, consulted before downloading an article.
+    # The entries are zstd-compressed with the zstd extra installed, zlib-compressed otherwise. Failed downloads
+    # are remembered for ARTICLE_STORE_NEGATIVE_TTL_SECONDS.
+    ARTICLE_STORE_BACKEND: Literal["none", "disk", "redis"] = "disk"
+    ARTICLE_STORE_DIR: str = "~/.cache/summarizers/articles"
+    ARTICLE_STORE_MAX_BYTES: int = 512 * 1024 * 1024
+    ARTICLE_STORE_TTL_SECONDS: int = 24 * 60 * 60
+    ARTICLE_STORE_NEGATIVE_TTL_SECONDS: int = 60 * 60
+    # Defaults to the RESULT_BACKEND.
+    ARTICLE_STORE_REDIS_URL: Optional[str] = None
+
+    # Cache of generated summaries keyed by the article text, model and generation parameters.
+    SUMMARY_CACHE_BACKEND: Literal["none", "memory", "disk", "redis"] = "memory"
+    SUMMARY_CACHE_MAX_ITEMS: int = 1024
+    SUMMARY_CACHE_TTL_SECONDS: int = 7 * 24 * 60 * 60
+    SUMMARY_CACHE_DIR: str = "~/.cache/summarizers/summaries"
+    # Defaults to the RESULT_BACKEND.
+    SUMMARY_CACHE_REDIS_URL: Optional[str] = None
+
     class Config:
         env_prefix = ""
         case_sensitive = False
 
+    @model_validator(mode="after")
+    def add_default_summarizer_models(self) -> "Settings":
+        self.SUMMARIZER_MODELS = {
+            "en": SummarizerModel(model=self.SUMMARIZER_MODEL_EN),
+            "ru": SummarizerModel(model=self.SUMMARIZER_MODEL_RU, summarizer="russian"),
+            **self.SUMMARIZER_MODELS,
+        }
+        return self
+
 
 @lru_cache()
 def get_settings() -> Settings:
@@ -1,16 +1,46 @@
 from typing import Dict, List, Optional
 
 from fastapi import Depends
-from sqlalchemy import delete, select, update
+from sqlalchemy import DateTime, delete, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
 
 from app.database import get_db
 from app.models import Summary
 from app.schemas.summary import SummaryPayloadSchema
+from app.urls import hash_url
 
 
-async def post(user_id: int, payload: SummaryPayloadSchema, db: AsyncSession = Depends(get_db)) -> Summary:
-    summary = Summary(url=str(payload.url), summary="", user_id=user_id)
+class SecondsAgo(FunctionElement):
+    type = DateTime()
+    inherit_cache = True
+
+
+@compiles(SecondsAgo)
+def compile_seconds_ago(element, compiler, **kw):
+    return f"NOW() - INTERVAL {compiler.process(element.clauses, **kw)} SECOND"
+
+
+@compiles(SecondsAgo, "sqlite")
+def compile_seconds_ago_sqlite(element, compiler, **kw):
+    return f"DATETIME('now', '-' || {compiler.process(element.clauses, **kw)} || ' seconds')"
+
+
+async def post(
+    user_id: int, payload: SummaryPayloadSchema, summary_text: str = "", db: AsyncSession = Depends(get_db)
+) -> Summary:
+    url = str(payload.url)
+    summary = Summary(
+        url=url,
+        canonical_url_hash=hash_url(url),
+        summary=summary_text,
+        user_id=user_id,
+        profile=payload.profile,
+        mode=payload.mode,
+        # A copied summary is done right away, otherwise the job is yet to be sent.
+        status="done" if summary_text else "queued",
+    )
     db.add(summary)
     await db.commit()
     await db.refresh(summary)
@@ -25,6 +55,29 @@ async def get(summary_id: int, db: AsyncSession = Depends(get_db)) -> Optional[D
     return None
 
 
+async def get_fresh_by_url(
+    url: str, max_age: int, profile: Optional[str] = None, mode: str = "auto", db: AsyncSession = Depends(get_db)
+) -> Optional[Summary]:
+    result = await db.execute(
+        select(Summary)
+        .where(
+            Summary.canonical_url_hash == hash_url(url),
+            # Summaries generated with another profile or mode differ in length and quality.
+            Summary.profile.is_(None) if profile is None else Summary.profile == profile,
+            Summary.mode == mode,
+            Summary.summary != "",
+            # Only finished summaries: a row with a job in flight may be about to summarize another article.
+            Summary.status == "done",
+            Summary.job_key.is_(None),
+            # Compared with the clock of the database, which sets the modification times.
+            Summary.modified_at >= SecondsAgo(max_age),
+        )
+        .order_by(Summary.modified_at.desc())
+        .limit(1)
+    )
+    return result.scalar()
+
+
 async def get_all(db: AsyncSession = Depends(get_db)) -> List[Dict]:
     result = await db.execute(select(Summary))
     summaries = result.scalars().all()
@@ -32,8 +85,13 @@ async def get_all(db: AsyncSession = Depends(get_db)) -> List[Dict]:
 
 
 async def put(summary_id: int, payload: SummaryPayloadSchema, db: AsyncSession = Depends(get_db)) -> Dict:
-    new_data = payload.model_dump(exclude_unset=True, exclude_defaults=True, exclude_none=True)
+    new_data = payload.model_dump(
+        exclude={"profile", "mode", "lane"}, exclude_unset=True, exclude_defaults=True, exclude_none=True
+    )
     new_data["url"] = str(new_data["url"])
+    new_data["canonical_url_hash"] = hash_url(new_data["url"])
+    new_data["profile"] = payload.profile
+    new_data["mode"] = payload.mode
     await db.execute(update(Summary).where(Summary.id == summary_id).values(**new_data))
     await db.commit()
 
@@ -42,6 +100,40 @@ async def put(summary_id: int, payload: SummaryPayloadSchema, db: AsyncSession =
     return updated_summary
 
 
+async def start_job(summary_id: int, job_key: str, task_ids: List[str], db: AsyncSession = Depends(get_db)) -> int:
+    await db.execute(
+        update(Summary)
+        .where(Summary.id == summary_id)
+        .values(
+            job_version=Summary.job_version + 1,
+            job_key=job_key,
+            job_task_ids=" ".join(task_ids),
+            status="queued",
+            error=None,
+            queue_wait_seconds=None,
+            fetch_seconds=None,
+            parse_seconds=None,
+            detect_seconds=None,
+            generate_seconds=None,
+            write_seconds=None,
+            input_tokens=None,
+            output_tokens=None,
+        )
+    )
+    # MySQL has no UPDATE ... RETURNING, the new version is read back within the same transaction instead.
+    result = await db.execute(select(Summary.job_version).where(Summary.id == summary_id))
+    version = result.scalar_one()
+    await db.commit()
+    return version
+
+
+async def count_jobs_in_flight(user_id: int, db: AsyncSession = Depends(get_db)) -> int:
+    result = await db.execute(
+        select(func.count()).select_from(Summary).where(Summary.user_id == user_id, Summary.job_key.is_not(None))
+    )
+    return result.scalar_one()
+
+
 async def remove(summary_id: int, db: AsyncSession = Depends(get_db)) -> None:
     await db.execute(delete(Summary).where(Summary.id == summary_id))
     await db.commit()
@@ -0,0 +1,70 @@
+import os
+from pathlib import Path
+from typing import Callable
+
+# The files of a disk store are scanned for eviction whenever this fraction of its maximum size has been written.
+EVICTION_SCAN_FRACTION = 0.1
+
+
+class DiskStore:
+    """Directory of entry files shared by all worker processes of a node.
+
+    Every entry is written to its own file through a temporary one, so that
+    readers never see a partial entry. Scanning the files is linear in their
+    number, so a process scans them for eviction only after writing a tenth of
+    the maximum size since its last scan, and then removes the least recently
+    modified ones until the rest fit in the maximum size.
+
+    Attributes:
+        directory (Path): Directory of the files.
+        suffix (str): Suffix of the entry files, e.g. ".txt".
+        max_size (int): Maximum total size of the files.
+        entry_size (Callable[[int], int]): Size of an entry of the given number
+            of bytes, e.g. the number itself to bound the bytes on disk or 1 to
+            bound the number of entries.
+    """
+
+    def __init__(self, directory: str, suffix: str, max_size: int, entry_size: Callable[[int], int]):
+        self.directory = Path(directory).expanduser()
+        self.suffix = suffix
+        self.max_size = max_size
+        self.entry_size = entry_size
+        # The first write of the process scans the files, since the other processes may have filled them.
+        self._written_since_scan = max_size
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{key}{self.suffix}"
+
+    def write(self, key: str, data: bytes) -> None:
+        """Atomically replaces the file of an entry, scanning the files for eviction when it's due.
+
+        Args:
+            key (str): Key of the entry.
+            data (bytes): Contents of the entry.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.directory / f".{key}.{os.getpid()}.tmp"
+        tmp_path.write_bytes(data)
+        tmp_path.replace(self.path(key))
+
+        self._written_since_scan += self.entry_size(len(data))
+        if self._written_since_scan >= self.max_size * EVICTION_SCAN_FRACTION:
+            self._written_since_scan = 0
+            self.evict()
+
+    def evict(self) -> None:
+        """Removes the least recently modified files until the rest fit in the maximum size."""
+        entries = []
+        for path in self.directory.glob(f"*{self.suffix}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                # Evicted or expired by another process in the meantime.
+                continue
+            entries.append((stat.st_mtime, self.entry_size(stat.st_size), path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.max_size:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
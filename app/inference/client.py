@@ -0,0 +1,81 @@
+import os
+import threading
+from functools import lru_cache
+from multiprocessing.connection import Client, Connection
+from typing import Any, Optional
+
+from app.config import get_settings
+
+settings = get_settings()
+
+
+class InferenceClient:
+    """Client of the local inference server.
+
+    Every thread of every process keeps its own connection, since the workers
+    fork after the client is created and a connection can't be shared between
+    concurrent requests.
+
+    Attributes:
+        address (str): Path of the Unix socket the server listens on.
+        authkey (bytes): Key authenticating the connections.
+    """
+
+    def __init__(self, address: str, authkey: bytes):
+        self.address = address
+        self.authkey = authkey
+        self._local = threading.local()
+
+    def call(self, method: str, *args: Any) -> Any:
+        """Calls a method of the inference server.
+
+        A request failing on a broken connection is retried once on a new one,
+        e.g. when the server has been restarted.
+
+        Args:
+            method (str): Name of the method.
+            *args (Any): Arguments of the method.
+
+        Returns:
+            Any: The result of the method, its exceptions are raised as they are.
+        """
+        for attempt in range(2):
+            connection = self._get_connection()
+            try:
+                connection.send((method, args))
+                status, result = connection.recv()
+                break
+            except (EOFError, OSError):
+                self._local.connection = None
+                if attempt:
+                    raise
+        if status == "error":
+            raise result
+        return result
+
+    def detect_with_model(self, texts: list[str]) -> list[tuple[str, float]]:
+        return self.call("detect_with_model", texts)
+
+    def summarize(
+        self,
+        lang: str,
+        texts: list[str],
+        profile: Optional[str] = None,
+        stream_summary_id: Optional[int] = None,
+        stream_version: Optional[int] = None,
+    ) -> list[str]:
+        return self.call("summarize", lang, texts, profile, stream_summary_id, stream_version)
+
+    def get_fingerprint(self, lang: str, profile: Optional[str] = None) -> str:
+        return self.call("fingerprint", lang, profile)
+
+    def _get_connection(self) -> Connection:
+        if getattr(self._local, "pid", None) != os.getpid() or self._local.connection is None:
+            self._local.pid = os.getpid()
+            self._local.connection = Client(self.address, family="AF_UNIX", authkey=self.authkey)
+        return self._local.connection
+
+
+@lru_cache
+def get_inference_client() -> InferenceClient:
+    return InferenceClient(settings.INFERENCE_SERVER_SOCKET, settings.SECRET_KEY.encode())
@@ -0,0 +1,155 @@
+import logging
+import os
+import threading
+from multiprocessing.connection import Connection, Listener
+from typing import Any, Optional
+
+from app.background.batching import MicroBatcher
+from app.background.streaming import SummaryStreamPublisher, get_redis_url
+from app.config import get_settings
+from app.language_detection import LanguageDetector
+from app.summarization.summarizer import SummarizerFactory
+
+settings = get_settings()
+
+log = logging.getLogger(__name__)
+
+
+class InferenceServer:
+    """Local inference server owning the models of all workers of a node.
+
+    Every client connection is served by its own thread, and the summarization
+    requests of all of them go through one micro-batcher, so the articles of
+    different worker processes end up in the same batches while only a single
+    copy of every model is kept in memory, used by a single thread.
+
+    Attributes:
+        address (str): Path of the Unix socket to listen on.
+        authkey (bytes): Key authenticating the connections.
+        factory (SummarizerFactory): Factory providing the local summarizers.
+        detector (LanguageDetector): Local language detector.
+        batcher (MicroBatcher): Micro-batcher shared by all connections.
+        publisher (SummaryStreamPublisher): Publisher of the streamed summaries.
+    """
+
+    def __init__(
+        self,
+        address: str,
+        authkey: bytes,
+        factory: SummarizerFactory,
+        detector: LanguageDetector,
+        batcher: MicroBatcher,
+        publisher: SummaryStreamPublisher,
+    ):
+        self.address = address
+        self.authkey = authkey
+        self.factory = factory
+        self.detector = detector
+        self.batcher = batcher
+        self.publisher = publisher
+
+    def serve_forever(self, ready: Optional[threading.Event] = None) -> None:
+        """Accepts the client connections until the process is stopped.
+
+        Args:
+            ready (Optional[threading.Event]): Event set once the socket is listening.
+        """
+        if os.path.exists(self.address):
+            os.remove(self.address)
+        with Listener(self.address, family="AF_UNIX", authkey=self.authkey) as listener:
+            log.info("Inference server listening on %s", self.address)
+            if ready:
+                ready.set()
+            while True:
+                try:
+                    connection = listener.accept()
+                except Exception:
+                    log.warning("Failed to accept an inference client", exc_info=True)
+                    continue
+                threading.Thread(target=self._serve, args=(connection,), daemon=True).start()
+
+    def handle(self, method: str, *args: Any) -> Any:
+        """Executes a request of a client.
+
+        Args:
+            method (str): Name of the method.
+            *args (Any): Arguments of the method.
+
+        Returns:
+            Any: The result of the method.
+        """
+        if method == "detect_with_model":
+            # The detector serializes the calls of the connection threads itself.
+            return self.detector.detect_with_model(*args)
+        if method == "summarize":
+            return self._summarize(*args)
+        if method == "fingerprint":
+            lang, profile = args
+            return self.factory.get_summarizer(lang).get_fingerprint(profile)
+        raise ValueError(f"Unknown inference method: {method}")
+
+    def _summarize(
+        self,
+        lang: str,
+        texts: list[str],
+        profile: Optional[str],
+        stream_summary_id: Optional[int],
+        stream_version: Optional[int] = None,
+    ) -> list[str]:
+        # The models are only run by the thread of the batcher, streamed summaries included.
+        if stream_summary_id is not None:
+            tokenizer = self.factory.get_summarizer(lang).tokenizer
+            # The version lets the clients skip the tokens of superseded jobs.
+            streamer = self.publisher.streamer(stream_summary_id, tokenizer, stream_version)
+            return [self.batcher.summarize(lang, text, profile, streamer) for text in texts]
+        futures = [self.batcher.submit(lang, text, profile) for text in texts]
+        return [future.result() for future in futures]
+
+    def _serve(self, connection: Connection) -> None:
+        with connection:
+            while True:
+                try:
+                    method, args = connection.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    response = ("ok", self.handle(method, *args))
+                except Exception as exc:
+                    response = ("error", exc)
+                try:
+                    connection.send(response)
+                except (EOFError, OSError):
+                    return
+                except Exception as exc:
+                    # The exception may not be picklable, its message still is.
+                    connection.send(("error", RuntimeError(f"{type(exc).__name__}: {exc}")))
+
+
+def main() -> None:
+    if not settings.INFERENCE_SERVER_SOCKET:
+        raise RuntimeError("INFERENCE_SERVER_SOCKET is not set")
+    logging.basicConfig(level=logging.INFO)
+
+    # The server runs the models itself, even though it shares the configuration with the workers.
+    SummarizerFactory.remote = False
+    LanguageDetector.remote = False
+
+    factory, detector = SummarizerFactory(), LanguageDetector()
+    log.info("Loading models for languages: %s...", ", ".join(settings.WORKER_PRELOAD_LANGUAGES))
+    detector.get_detector()
+    for lang in settings.WORKER_PRELOAD_LANGUAGES:
+        factory.get_summarizer(lang)
+
+    server = InferenceServer(
+        address=settings.INFERENCE_SERVER_SOCKET,
+        authkey=settings.SECRET_KEY.encode(),
+        factory=factory,
+        detector=detector,
+        batcher=MicroBatcher(factory, settings.SUMMARIZER_BATCH_SIZE, settings.SUMMARIZER_BATCH_MAX_WAIT_MS),
+        publisher=SummaryStreamPublisher(get_redis_url()),
+    )
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,75 @@
+import re
+import threading
+from collections import Counter
 from typing import Optional
 
+import torch
 from transformers import Pipeline as PipelineType
 from transformers import pipeline
 
 from app.config import get_settings
+from app.inference.client import get_inference_client
 
 settings = get_settings()
 
+# The most frequent character trigrams of the languages the pre-detector recognizes ("_" marks word boundaries),
+# the letters of their alphabets, the share of the trigrams of a typical text that are found in the profile and
+# the letters that set the language apart from the others of its script, at least one of which the text must contain.
+LANGUAGE_PROFILES = {
+    "en": {
+        "alphabet": frozenset("abcdefghijklmnopqrstuvwxyz"),
+        "markers": None,
+        "coverage": 0.28,
+        "trigrams": frozenset(
+            trigram.replace("_", " ")
+            for trigram in """
+            _th the he_ _an and nd_ _of of_ _to to_ _in ing ng_ ed_ er_ es_ is_ _is _a_ _wa was _be ly_ ts_ on_
+            at_ re_ _co _re _ha as_ or_ nt_ en_ al_ st_ _fo for _wh le_ ve_ it_ ce_ se_ _pr ion tio ent ati her
+            ter hat tha ere ate his con res ver all ons nce men ith ted ers pro thi wit are ess not ive ect rea
+            com eve per int est sta cti ica ist ear ain one our iti rat
+            """.split()
+        ),
+    },
+    "ru": {
+        "alphabet": frozenset("абвгдеёжзийклмнопрстуфхцчшщъыьэюя"),
+        # Bulgarian uses the same letters apart from these, and shares many of the frequent trigrams.
+        "markers": frozenset("ыэё"),
+        "coverage": 0.2,
+        "trigrams": frozenset(
+            trigram.replace("_", " ")
+            for trigram in """
+            _по _на _пр _не _в_ _и_ _с_ _за _со _ко _от _до _чт ся_ ть_ ет_ ой_ ые_ ия_ ии_ ом_ ов_ ах_ ий_ ал_
+            ем_ ли_ го_ то_ но_ на_ ка_ ых_ ей_ ую_ ют_ ен_ ени ост про ова ния ого ста ать ско при тор ред пре
+            нов ани ове ров ает тел ные тся льн тво раз ель ных ном ить ком ран лен ств ите его ели ции ент ват
+            иче что это как был кот ото оро
+            """.split()
+        ),
+    },
+}
+WORD_PATTERN = re.compile(r"[^\W\d_]+")
+
 
 class LanguageDetector:
     """Language Detector using a transformer model.
 
     This class provides a language detection feature by utilizing a
-    transformer model from the Hugging Face model hub.
+    transformer model from the Hugging Face model hub. Texts that are
+    unambiguously in one of the LANGUAGE_PROFILES are recognized by their
+    script and character trigrams without running the model. When the
+    inference server is enabled, the model runs on the server.
 
     Attributes:
+        remote (bool): Whether the model is served by the inference server.
         detector (Optional[PipelineType]): A pipeline object for language detection.
+        stats (dict[str, int]): Number of texts detected by the pre-detector and by the model.
     """
 
+    remote: bool = bool(settings.INFERENCE_SERVER_SOCKET)
     detector: Optional[PipelineType] = None
+    stats: dict[str, int] = {"predetected": 0, "model": 0}
+    _stats_lock = threading.Lock()
+    # Fast tokenizers reject concurrent calls ("Already borrowed"), e.g. from the tasks of a threads pool.
+    _model_lock = threading.Lock()
 
     @classmethod
     def get_detector(cls) -> PipelineType:
@@ -32,7 +83,11 @@ class LanguageDetector:
             PipelineType: The loaded or retrieved pipeline object.
         """
         if cls.detector is None:
-            cls.detector = pipeline("text-classification", model=settings.LANGUAGE_DETECTION_MODEL)
+            cls.detector = pipeline(
+                "text-classification",
+                model=settings.LANGUAGE_DETECTION_MODEL,
+                model_kwargs={"low_cpu_mem_usage": True},
+            )
         return cls.detector
 
     @classmethod
@@ -48,27 +103,107 @@ class LanguageDetector:
         Returns:
             str: The detected language.
         """
-        detector = cls.get_detector()
-        tokenizer = detector.tokenizer
-        input_ids = tokenizer(
-            text,
-            max_length=256,
-            padding="max_length",
-            truncation=True,
-            return_tensors="pt",
-        )["input_ids"]
-        truncated_text = tokenizer.decode(input_ids[0])
-
-        lang_info = detector(truncated_text)
-        if not lang_info:
-            raise ValueError("Failed to detect language")
-
-        lang_info_item = lang_info[0]
-        if not isinstance(lang_info_item, dict):
-            raise ValueError("Unexpected type for lang_info_item")
-
-        label = lang_info_item.get("label")
-        if label is None:
-            raise ValueError("Failed to get label from lang_info_item")
-
+        ((label, _),) = cls.detect_many([text])
         return label
+
+    @classmethod
+    def detect_many(cls, texts: list[str], batch_size: int = 32) -> list[tuple[str, float]]:
+        """Detects the languages of the provided texts.
+
+        The texts the pre-detector is confident about are done without the
+        model. The rest are tokenized once, truncated to their first 256 tokens,
+        and fed to the classification model directly in batches, bypassing the
+        pipeline's own preprocessing.
+
+        Args:
+            texts (list[str]): The texts whose languages are to be detected.
+            batch_size (int): Maximum number of texts per forward pass.
+
+        Returns:
+            list[tuple[str, float]]: The detected language and its probability for every text.
+        """
+        results: list[Optional[tuple[str, float]]] = []
+        for text in texts:
+            guess = cls.predetect(text)
+            results.append(guess if guess and guess[1] >= settings.LANGUAGE_PREDETECTION_THRESHOLD else None)
+        ambiguous = [index for index, result in enumerate(results) if result is None]
+        with cls._stats_lock:
+            cls.stats["predetected"] += len(texts) - len(ambiguous)
+            cls.stats["model"] += len(ambiguous)
+
+        if ambiguous:
+            detections = cls.detect_with_model([texts[index] for index in ambiguous], batch_size)
+            for index, detection in zip(ambiguous, detections):
+                results[index] = detection
+        return results
+
+    @staticmethod
+    def predetect(text: str, sample_size: int = 2000) -> Optional[tuple[str, float]]:
+        """Guesses the language of the text from its script and character trigrams.
+
+        The confidence combines the share of the letters belonging to the
+        alphabet of the language with how many trigrams of the text are among
+        the most frequent trigrams of the language. A language whose alphabet
+        is shared with other languages is only guessed if the text contains one
+        of the letters specific to it.
+
+        Args:
+            text (str): The text whose language is to be guessed.
+            sample_size (int): Number of characters from the start of the text to look at.
+
+        Returns:
+            Optional[tuple[str, float]]: The most likely language and the confidence, None if the text is too short.
+        """
+        words = WORD_PATTERN.findall(text[:sample_size].lower())
+        letters = sum(map(len, words))
+        if letters < 20:
+            return None
+
+        characters = Counter("".join(words))
+        trigrams = Counter(
+            padded[start : start + 3] for word in words for padded in (f" {word} ",) for start in range(len(word))
+        )
+        total_trigrams = sum(trigrams.values())
+
+        guesses = []
+        for lang, profile in LANGUAGE_PROFILES.items():
+            in_alphabet = sum(count for char, count in characters.items() if char in profile["alphabet"]) / letters
+            coverage = sum(count for trigram, count in trigrams.items() if trigram in profile["trigrams"])
+            coverage /= total_trigrams
+            # Letters outside the alphabet point to another language of the same script.
+            confidence = max(0.0, 1 - (1 - in_alphabet) * 10) * min(1.0, coverage / profile["coverage"])
+            if profile["markers"] is not None and profile["markers"].isdisjoint(characters):
+                confidence = 0.0
+            guesses.append((lang, confidence))
+        return max(guesses, key=lambda guess: guess[1])
+
+    @classmethod
+    def detect_with_model(cls, texts: list[str], batch_size: int = 32) -> list[tuple[str, float]]:
+        """Detects the languages of the provided texts with the transformer model.
+
+        Args:
+            texts (list[str]): The texts whose languages are to be detected.
+            batch_size (int): Maximum number of texts per forward pass.
+
+        Returns:
+            list[tuple[str, float]]: The detected language and its probability for every text.
+        """
+        if cls.remote:
+            return get_inference_client().detect_with_model(texts)
+
+        detector = cls.get_detector()
+        results = []
+        for start in range(0, len(texts), batch_size):
+            with cls._model_lock, torch.inference_mode():
+                inputs = detector.tokenizer(
+                    texts[start : start + batch_size],
+                    max_length=256,
+                    padding="longest",
+                    truncation=True,
+                    return_tensors="pt",
+                )
+                probabilities = detector.model(**inputs).logits.softmax(dim=-1)
+            confidences, label_ids = probabilities.max(dim=-1)
+            id2label = detector.model.config.id2label
+            results.extend(zip((id2label[label_id] for label_id in label_ids.tolist()), confidences.tolist()))
+        return results
@@ -1,6 +1,7 @@
 import datetime
+from typing import Optional
 
-from sqlalchemy import DateTime, ForeignKey, Integer, String, Text, func
+from sqlalchemy import DateTime, Float, ForeignKey, Integer, String, Text, func
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -27,8 +28,31 @@ class Summary(AbstractBaseModel):
     __tablename__ = "summaries"
 
     url: Mapped[str] = mapped_column(String(255), index=True)
+    # SHA-256 of the canonical URL, used to find summaries of the same article.
+    canonical_url_hash: Mapped[Optional[str]] = mapped_column(String(64), index=True)
     summary: Mapped[str] = mapped_column(Text)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"))
+    # Generation profile requested for the summary, None for the default one of its language.
+    profile: Mapped[Optional[str]] = mapped_column(String(32))
+    # Summarization mode requested for the summary: auto, abstractive or extractive.
+    mode: Mapped[str] = mapped_column(String(16), default="auto", server_default="auto")
+    # Incremented whenever a new summarization job is started, so that the workers drop the superseded ones.
+    job_version: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    # Parameters and Celery task IDs of the job in flight, cleared once it finishes.
+    job_key: Mapped[Optional[str]] = mapped_column(String(64))
+    job_task_ids: Mapped[Optional[str]] = mapped_column(String(255))
+    # Lifecycle of the latest job: queued, fetching, summarizing, done or failed (with the error).
+    status: Mapped[str] = mapped_column(String(16), default="queued", server_default="queued")
+    error: Mapped[Optional[str]] = mapped_column(Text)
+    # Durations of the stages of the latest job in seconds, the queue wait summed over all stages.
+    queue_wait_seconds: Mapped[Optional[float]] = mapped_column(Float)
+    fetch_seconds: Mapped[Optional[float]] = mapped_column(Float)
+    parse_seconds: Mapped[Optional[float]] = mapped_column(Float)
+    detect_seconds: Mapped[Optional[float]] = mapped_column(Float)
+    generate_seconds: Mapped[Optional[float]] = mapped_column(Float)
+    write_seconds: Mapped[Optional[float]] = mapped_column(Float)
+    input_tokens: Mapped[Optional[int]] = mapped_column(Integer)
+    output_tokens: Mapped[Optional[int]] = mapped_column(Integer)
 
     user: Mapped["User"] = relationship(back_populates="summaries")
 
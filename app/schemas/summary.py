@@ -1,6 +1,10 @@
-from typing import List, TypeAlias
+from typing import List, Literal, Optional, TypeAlias
 
-from pydantic import AnyHttpUrl, BaseModel
+from pydantic import AnyHttpUrl, BaseModel, field_validator
+
+from app.config import get_settings
+
+settings = get_settings()
 
 
 class SummarySchema(BaseModel):
@@ -8,6 +12,16 @@ class SummarySchema(BaseModel):
     url: AnyHttpUrl
     summary: str
     user_id: int
+    status: Literal["queued", "fetching", "summarizing", "done", "failed"] = "queued"
+    error: Optional[str] = None
+    queue_wait_seconds: Optional[float] = None
+    fetch_seconds: Optional[float] = None
+    parse_seconds: Optional[float] = None
+    detect_seconds: Optional[float] = None
+    generate_seconds: Optional[float] = None
+    write_seconds: Optional[float] = None
+    input_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
 
     class Config:
         orm_mode = True
@@ -18,3 +32,15 @@ SummarySchemaList: TypeAlias = List[SummarySchema]
 
 class SummaryPayloadSchema(BaseModel):
     url: AnyHttpUrl
+    profile: Optional[str] = None
+    # Abstractive unless the workers are overloaded, in which case the summary is extractive.
+    mode: Literal["auto", "abstractive", "extractive"] = "auto"
+    # Bulk submissions yield to the interactive ones.
+    lane: Literal["interactive", "bulk"] = "interactive"
+
+    @field_validator("profile")
+    @classmethod
+    def check_profile(cls, profile: Optional[str]) -> Optional[str]:
+        if profile is not None and profile not in settings.GENERATION_PROFILES:
+            raise ValueError(f"Unknown generation profile, expected one of: {', '.join(settings.GENERATION_PROFILES)}")
+        return profile
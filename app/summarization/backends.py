@@ -0,0 +1,107 @@
+import logging
+import shutil
+import tempfile
+from pathlib import Path
+
+from transformers import AutoModelForSeq2SeqLM, PreTrainedModel
+
+from app.config import get_settings
+
+settings = get_settings()
+
+log = logging.getLogger(__name__)
+
+ONNX_FILE_NAMES = ("encoder_model", "decoder_model", "decoder_with_past_model")
+
+
+def load_model(model_name_or_path: str, backend: str) -> PreTrainedModel:
+    """Loads a seq2seq model for the selected inference backend.
+
+    The "torch" backend loads the full-precision PyTorch model. The "onnx" and
+    "onnx-int8" backends run the model with ONNX Runtime, the latter with
+    dynamically quantized int8 weights. The ONNX export (and quantization) is
+    done once and cached on disk, so subsequent loads only read the exported files.
+    All backends expose the same generate interface.
+
+    Args:
+        model_name_or_path (str): The name of the pre-trained model or path to load.
+        backend (str): One of "torch", "onnx" or "onnx-int8".
+
+    Returns:
+        PreTrainedModel: The loaded model.
+    """
+    if backend == "torch":
+        # Safetensors checkpoints are memory-mapped, and the weights are materialized only once.
+        return AutoModelForSeq2SeqLM.from_pretrained(model_name_or_path, low_cpu_mem_usage=True)
+    if backend not in ("onnx", "onnx-int8"):
+        raise ValueError(f"Unsupported summarizer backend: {backend}")
+
+    try:
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+    except ImportError as exc:
+        raise RuntimeError(
+            f"The {backend} backend requires the onnx extra: pip install 'optimum[onnxruntime]'"
+        ) from exc
+
+    quantize = backend == "onnx-int8"
+    export_dir = Path(settings.SUMMARIZER_ONNX_DIR).expanduser() / backend / model_name_or_path.replace("/", "--")
+    if not export_dir.exists():
+        export_onnx_model(model_name_or_path, export_dir, quantize)
+
+    suffix = "_quantized" if quantize else ""
+    return ORTModelForSeq2SeqLM.from_pretrained(
+        export_dir,
+        **{f"{name.removesuffix('_model')}_file_name": f"{name}{suffix}.onnx" for name in ONNX_FILE_NAMES},
+    )
+
+
+def export_onnx_model(model_name_or_path: str, export_dir: Path, quantize: bool) -> None:
+    """Exports a seq2seq model to ONNX and optionally quantizes it to int8.
+
+    The model is exported into a temporary directory next to the target one and
+    moved into place at the end, so that worker processes starting concurrently
+    never load a partially written export.
+
+    Args:
+        model_name_or_path (str): The name of the pre-trained model or path to export.
+        export_dir (Path): Directory to store the exported model in.
+        quantize (bool): Whether to apply dynamic int8 quantization to the exported model.
+    """
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+    log.info("Exporting %s to ONNX into %s...", model_name_or_path, export_dir)
+    export_dir.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(dir=export_dir.parent))
+    try:
+        ORTModelForSeq2SeqLM.from_pretrained(model_name_or_path, export=True).save_pretrained(tmp_dir)
+        if quantize:
+            quantization_config = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+            for name in ONNX_FILE_NAMES:
+                quantizer = ORTQuantizer.from_pretrained(tmp_dir, file_name=f"{name}.onnx")
+                quantizer.quantize(save_dir=tmp_dir, quantization_config=quantization_config)
+        tmp_dir.rename(export_dir)
+    except OSError:
+        # Another process has finished the same export first.
+        if not export_dir.exists():
+            raise
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def estimate_model_size(model: PreTrainedModel) -> int:
+    """Estimates the memory taken by a loaded model.
+
+    Args:
+        model (PreTrainedModel): Model loaded with load_model.
+
+    Returns:
+        int: Size of the weights in bytes, 0 if it can't be estimated.
+    """
+    if hasattr(model, "parameters"):
+        tensors = [*model.parameters(), *model.buffers()]
+        return sum(tensor.numel() * tensor.element_size() for tensor in tensors)
+    # ONNX Runtime sessions load the exported files as they are.
+    if model_dir := getattr(model, "model_save_dir", None):
+        return sum(path.stat().st_size for path in Path(model_dir).glob("*.onnx*"))
+    return 0
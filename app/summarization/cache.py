@@ -0,0 +1,183 @@
+import hashlib
+import os
+import re
+import threading
+import time
+import unicodedata
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional
+
+import redis
+
+from app.config import get_settings
+from app.disk_store import DiskStore
+
+from .summarizer import Summarizer
+
+settings = get_settings()
+
+
+def make_cache_key(text: str, summarizer: Summarizer, profile: Optional[str] = None) -> str:
+    """Builds a content-addressed cache key for the summary of a text.
+
+    The text is normalized (Unicode NFC, collapsed whitespace), so that the same
+    article extracted with cosmetic differences maps to the same key. The key also
+    covers the summarizer's fingerprint, so that changing the model or generation
+    parameters never serves stale summaries.
+
+    Args:
+        text (str): Text of the article.
+        summarizer (Summarizer): Summarizer that produces the summary.
+        profile (Optional[str]): Name of the generation profile the summary is produced with.
+
+    Returns:
+        str: Hex digest identifying the summary.
+    """
+    normalized = re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+    digest = hashlib.sha256()
+    digest.update(summarizer.get_fingerprint(profile).encode())
+    digest.update(b"\0")
+    digest.update(normalized.encode())
+    return digest.hexdigest()
+
+
+class SummaryCache(ABC):
+    """Abstract base class for the summary caches.
+
+    Attributes:
+        hits (int): Number of lookups that found a cached summary.
+        misses (int): Number of lookups that didn't find a cached summary.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        """Looks up a cached summary and updates the hit/miss counters.
+
+        Args:
+            key (str): Cache key built with `make_cache_key`.
+
+        Returns:
+            Optional[str]: The cached summary or None.
+        """
+        summary = self._get(key)
+        if summary is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return summary
+
+    def set(self, key: str, summary: str) -> None:
+        """Stores a summary, evicting the least recently used entries if the cache is full.
+
+        Args:
+            key (str): Cache key built with `make_cache_key`.
+            summary (str): Summary to store.
+        """
+        self._set(key, summary)
+
+    @abstractmethod
+    def _get(self, key: str) -> Optional[str]:
+        pass
+
+    @abstractmethod
+    def _set(self, key: str, summary: str) -> None:
+        pass
+
+
+class MemorySummaryCache(SummaryCache):
+    """In-process LRU cache, private to every worker process."""
+
+    def __init__(self, max_items: int):
+        super().__init__()
+        self.max_items = max_items
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, str] = OrderedDict()
+
+    def _get(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            return self._entries.get(key)
+
+    def _set(self, key: str, summary: str) -> None:
+        with self._lock:
+            self._entries[key] = summary
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+
+
+class DiskSummaryCache(SummaryCache):
+    """On-disk cache shared by all worker processes of a node.
+
+    Every summary is stored in its own file, the modification time of which is
+    refreshed on every hit, so that the oldest files are the least recently used.
+    Files that can't be read are treated as missing, and the least recently
+    used ones are evicted once there are more than the maximum number of them.
+    """
+
+    def __init__(self, directory: str, max_items: int, ttl: int):
+        super().__init__()
+        self.files = DiskStore(directory, ".txt", max_items, entry_size=lambda size: 1)
+        self.ttl = ttl
+
+    def _get(self, key: str) -> Optional[str]:
+        path = self.files.path(key)
+        try:
+            if time.time() - path.stat().st_mtime > self.ttl:
+                path.unlink(missing_ok=True)
+                return None
+            summary = path.read_text(encoding="utf-8")
+            os.utime(path)
+            return summary
+        except (OSError, UnicodeDecodeError):
+            return None
+
+    def _set(self, key: str, summary: str) -> None:
+        self.files.write(key, summary.encode())
+
+
+class RedisSummaryCache(SummaryCache):
+    """Redis cache shared by all workers.
+
+    Entries expire after the TTL; the size bound is enforced by the Redis
+    server itself, which should be configured with an LRU maxmemory-policy.
+    """
+
+    prefix = "summary-cache:"
+
+    def __init__(self, url: str, ttl: int):
+        super().__init__()
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+
+    def _get(self, key: str) -> Optional[str]:
+        summary = self.client.get(self.prefix + key)
+        return summary.decode() if summary is not None else None
+
+    def _set(self, key: str, summary: str) -> None:
+        self.client.set(self.prefix + key, summary, ex=self.ttl)
+
+
+def get_summary_cache() -> Optional[SummaryCache]:
+    """Creates the summary cache selected with SUMMARY_CACHE_BACKEND.
+
+    Returns:
+        Optional[SummaryCache]: The configured cache or None if caching is disabled.
+    """
+    backend = settings.SUMMARY_CACHE_BACKEND
+    if backend == "memory":
+        return MemorySummaryCache(settings.SUMMARY_CACHE_MAX_ITEMS)
+    if backend == "disk":
+        return DiskSummaryCache(
+            settings.SUMMARY_CACHE_DIR, settings.SUMMARY_CACHE_MAX_ITEMS, settings.SUMMARY_CACHE_TTL_SECONDS
+        )
+    if backend == "redis":
+        return RedisSummaryCache(
+            settings.SUMMARY_CACHE_REDIS_URL or settings.RESULT_BACKEND, settings.SUMMARY_CACHE_TTL_SECONDS
+        )
+    return None
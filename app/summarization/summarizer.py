@@ -1,63 +1,363 @@
+import copy
+import json
+import logging
+import re
+import threading
+import time
 from abc import ABC, abstractmethod
+from itertools import chain
+from typing import Any, Optional
 
-from transformers import AutoModelForSeq2SeqLM, AutoTokenizer, pipeline
+import numpy as np
+from transformers import AutoTokenizer, GenerationConfig, pipeline
+from transformers.generation.streamers import BaseStreamer
 
-from app.config import get_settings
+from app.config import GenerationProfile, SummarizerModel, get_settings
+from app.inference.client import InferenceClient, get_inference_client
+
+from .backends import estimate_model_size, load_model
 
 settings = get_settings()
 
+log = logging.getLogger(__name__)
+
+
+def get_profile(name: str) -> GenerationProfile:
+    """Gets a generation profile configured with GENERATION_PROFILES.
+
+    Args:
+        name (str): Name of the generation profile.
+
+    Returns:
+        GenerationProfile: The generation profile.
+    """
+    if name not in settings.GENERATION_PROFILES:
+        raise ValueError(f"Unknown generation profile: {name}")
+    return settings.GENERATION_PROFILES[name]
+
 
 class Summarizer(ABC):
     """Abstract base class for Summarizer.
 
     The Summarizer class serves as the base class for different language-specific
     summarizer implementations. It handles the loading of the transformer model
-    and tokenizer based on the provided model name.
+    and tokenizer based on the provided model name, using the inference backend
+    selected with SUMMARIZER_BACKEND unless given explicitly.
 
     Attributes:
+        model_name_or_path (str): The name or path of the loaded pre-trained model.
+        backend (str): Inference backend the model is loaded with.
         tokenizer (AutoTokenizer): Tokenizer for text processing.
-        model (AutoModelForSeq2SeqLM): Transformer model for summarization.
+        model (PreTrainedModel): Transformer model for summarization.
+        generation_config (GenerationConfig): Model generation config with the summarizer's parameters applied.
+        max_input_length (Optional[int]): Maximum number of input tokens, defaults to the tokenizer limit.
+        generation_kwargs (dict[str, Any]): Generation parameters applied on top of the model's defaults.
     """
 
-    def __init__(self, model_name_or_path: str):
+    max_input_length: Optional[int] = None
+    generation_kwargs: dict[str, Any] = {}
+
+    def __init__(self, model_name_or_path: str, backend: Optional[str] = None):
         """Initializes the tokenizer and model.
 
         Args:
             model_name_or_path (str): The name of the pre-trained model or path to load.
+            backend (Optional[str]): Inference backend, defaults to the SUMMARIZER_BACKEND.
         """
+        self.model_name_or_path = model_name_or_path
+        self.backend = backend or settings.SUMMARIZER_BACKEND
         self.tokenizer = AutoTokenizer.from_pretrained(model_name_or_path)
-        self.model = AutoModelForSeq2SeqLM.from_pretrained(model_name_or_path)
+        self.model = load_model(model_name_or_path, self.backend)
+        self.generation_config: GenerationConfig = copy.deepcopy(self.model.generation_config)
+        self.generation_config.update(**self.generation_kwargs)
+
+    def get_fingerprint(self, profile: Optional[str] = None) -> str:
+        """Describes everything that affects the summaries produced by this summarizer.
+
+        Args:
+            profile (Optional[str]): Name of the generation profile the summaries are produced with.
+
+        Returns:
+            str: JSON document with the model, backend and generation parameters.
+        """
+        return json.dumps(
+            {
+                "model": self.model_name_or_path,
+                "backend": self.backend,
+                "max_input_length": self.max_input_length,
+                "generation": self.generation_config.to_diff_dict(),
+                "profile": profile and [profile, get_profile(profile).model_dump(exclude_none=True)],
+                "chunking": settings.SUMMARIZER_CHUNKING
+                and [settings.SUMMARIZER_CHUNK_OVERLAP, settings.SUMMARIZER_MAX_CHUNKS],
+            },
+            sort_keys=True,
+        )
+
+    def get_generation_config(
+        self, profile: Optional[str] = None, input_length: Optional[int] = None
+    ) -> GenerationConfig:
+        """Resolves the generation config for a generation profile.
+
+        The parameters set in the profile override the summarizer's ones. If the
+        profile limits the number of new tokens relative to the input size, the
+        limit is computed from the given input length.
+
+        Args:
+            profile (Optional[str]): Name of the generation profile, None keeps the summarizer's defaults.
+            input_length (Optional[int]): Number of input tokens of the longest text to generate for.
+
+        Returns:
+            GenerationConfig: The generation config to use.
+        """
+        if profile is None:
+            return self.generation_config
+
+        generation_profile = get_profile(profile)
+        updates = generation_profile.model_dump(exclude_none=True, exclude={"length_ratio"})
+        if "max_new_tokens" in updates:
+            if generation_profile.length_ratio and input_length:
+                updates["max_new_tokens"] = max(
+                    updates.get("min_new_tokens", 1),
+                    min(updates["max_new_tokens"], round(input_length * generation_profile.length_ratio)),
+                )
+            # The length limits of the profile replace the summarizer's ones.
+            updates.setdefault("min_length", 0)
+
+        config = copy.deepcopy(self.generation_config)
+        config.update(**updates)
+        return config
+
+    def can_stream(self, profile: Optional[str] = None) -> bool:
+        """Checks whether the summaries of a generation profile can be streamed as they are generated.
+
+        Beam search can't emit partial output, and streaming greedily instead would change the summary.
+
+        Args:
+            profile (Optional[str]): Name of the generation profile, None for the summarizer's defaults.
+
+        Returns:
+            bool: True if the profile decodes greedily.
+        """
+        return self.get_generation_config(profile).num_beams == 1
 
     @abstractmethod
-    def summarize(self, text: str) -> str:
+    def summarize(self, text: str, streamer: Optional[BaseStreamer] = None, profile: Optional[str] = None) -> str:
         """Abstract method to summarize text.
 
         Args:
             text (str): Text to summarize.
+            streamer (Optional[BaseStreamer]): Streamer receiving the tokens as they are generated.
+            profile (Optional[str]): Name of the generation profile to use.
 
         Returns:
             str: Summarized text.
         """
         pass
 
+    def summarize_batch(
+        self, texts: list[str], batch_size: Optional[int] = None, profile: Optional[str] = None
+    ) -> list[str]:
+        """Summarizes several texts with as few model invocations as possible.
+
+        The texts are tokenized once, sorted by their token length and split into
+        buckets, so that every bucket is padded only up to its longest member
+        (optionally rounded up to SUMMARIZER_PAD_TO_MULTIPLE_OF) and is processed
+        with a single generate call. The summaries are returned in the order of
+        the input texts.
+
+        When SUMMARIZER_CHUNKING is enabled, long texts are summarized in full
+        rather than truncated, see `summarize_chunked`.
+
+        Args:
+            texts (list[str]): Texts to summarize.
+            batch_size (Optional[int]): Maximum number of texts per generate call.
+            profile (Optional[str]): Name of the generation profile to use.
+
+        Returns:
+            list[str]: Summarized texts in the input order.
+        """
+        if not texts:
+            return []
+        if settings.SUMMARIZER_CHUNKING:
+            return self.summarize_chunked(texts, batch_size, profile)
+        return self._generate(self._encode(texts), batch_size, profile)
+
+    def summarize_chunked(
+        self, texts: list[str], batch_size: Optional[int] = None, profile: Optional[str] = None
+    ) -> list[str]:
+        """Summarizes texts of any length with a map-reduce approach.
+
+        Every text is split into overlapping token windows of the model's input
+        size, capped at SUMMARIZER_MAX_CHUNKS windows per text. The windows of all
+        texts are summarized together as one batch, then the chunk summaries of
+        every multi-window text are reduced, see `_reduce`. Texts that fit into a
+        single window are summarized only once.
+
+        Args:
+            texts (list[str]): Texts to summarize.
+            batch_size (Optional[int]): Maximum number of chunks per generate call.
+            profile (Optional[str]): Name of the generation profile to use.
+
+        Returns:
+            list[str]: Summarized texts in the input order.
+        """
+        if not texts:
+            return []
+
+        encodings = self._encode(
+            texts,
+            stride=settings.SUMMARIZER_CHUNK_OVERLAP,
+            return_overflowing_tokens=True,
+        )
+        chunk_counts = [0] * len(texts)
+        kept_chunks, chunk_owners = [], []
+        for position, index in enumerate(encodings.pop("overflow_to_sample_mapping")):
+            if chunk_counts[index] < settings.SUMMARIZER_MAX_CHUNKS:
+                chunk_counts[index] += 1
+                kept_chunks.append(position)
+                chunk_owners.append(index)
+        encodings = {key: [values[position] for position in kept_chunks] for key, values in encodings.items()}
+
+        chunk_summaries: list[list[str]] = [[] for _ in texts]
+        for index, summary in zip(chunk_owners, self._generate(encodings, batch_size, profile)):
+            chunk_summaries[index].append(summary)
+
+        return self._reduce(chunk_summaries, batch_size, profile)
+
+    def _reduce(
+        self, chunk_summaries: list[list[str]], batch_size: Optional[int] = None, profile: Optional[str] = None
+    ) -> list[str]:
+        """Combines the chunk summaries of every text into a single summary.
+
+        The chunk summaries are concatenated into groups that fit into the model's
+        input, and every group is summarized again, level by level, until a single
+        summary per text is left. The groups of all texts on a level are
+        summarized as one batch. If no two chunk summaries of a text fit into the
+        input together, each of them is cut to an equal share of it instead, so
+        that every chunk still contributes to the summary.
+
+        Args:
+            chunk_summaries (list[list[str]]): Summaries of the chunks of every text, in the order of the chunks.
+            batch_size (Optional[int]): Maximum number of groups per generate call.
+            profile (Optional[str]): Name of the generation profile to use.
+
+        Returns:
+            list[str]: Summarized texts in the input order.
+        """
+        budget = (
+            self.max_input_length or self.tokenizer.model_max_length
+        ) - self.tokenizer.num_special_tokens_to_add()
+        summaries = [chunks[0] if len(chunks) == 1 else "" for chunks in chunk_summaries]
+        pending = {index: chunks for index, chunks in enumerate(chunk_summaries) if len(chunks) > 1}
+        while pending:
+            groups, group_owners = [], []
+            for index, chunks in pending.items():
+                for group in self._group_chunk_summaries(chunks, budget):
+                    groups.append(group)
+                    group_owners.append(index)
+
+            reduced: dict[int, list[str]] = {index: [] for index in pending}
+            for index, summary in zip(group_owners, self._generate(self._encode(groups), batch_size, profile)):
+                reduced[index].append(summary)
+
+            pending = {}
+            for index, chunks in reduced.items():
+                if len(chunks) == 1:
+                    summaries[index] = chunks[0]
+                else:
+                    pending[index] = chunks
+        return summaries
+
+    def _group_chunk_summaries(self, chunks: list[str], budget: int) -> list[str]:
+        input_ids = self.tokenizer(chunks, add_special_tokens=False)["input_ids"]
+        groups: list[list[str]] = [[]]
+        length = 0
+        for chunk, chunk_ids in zip(chunks, input_ids):
+            if groups[-1] and length + len(chunk_ids) > budget:
+                groups.append([])
+                length = 0
+            groups[-1].append(chunk)
+            length += len(chunk_ids)
+
+        if len(groups) == len(chunks):
+            # Summarizing the chunk summaries one by one wouldn't shorten them, so they are cut instead.
+            share = max(budget // len(chunks), 1)
+            return [" ".join(self.tokenizer.decode(ids[:share], skip_special_tokens=True) for ids in input_ids)]
+        return [" ".join(group) for group in groups]
+
+    def _encode(self, texts: list[str], **kwargs: Any) -> dict[str, list[list[int]]]:
+        return self.tokenizer(
+            texts,
+            max_length=self.max_input_length or self.tokenizer.model_max_length,
+            truncation=True,
+            return_token_type_ids=False,
+            **kwargs,
+        )
+
+    def _generate(
+        self, encodings: dict[str, list[list[int]]], batch_size: Optional[int] = None, profile: Optional[str] = None
+    ) -> list[str]:
+        batch_size = batch_size or settings.SUMMARIZER_BATCH_SIZE
+        count = len(encodings["input_ids"])
+        order = sorted(range(count), key=lambda index: len(encodings["input_ids"][index]))
+
+        summaries = [""] * count
+        for start in range(0, count, batch_size):
+            bucket = order[start : start + batch_size]
+            inputs = self.tokenizer.pad(
+                [{key: encodings[key][index] for key in encodings} for index in bucket],
+                padding="longest",
+                pad_to_multiple_of=settings.SUMMARIZER_PAD_TO_MULTIPLE_OF,
+                return_tensors="pt",
+            )
+            # The bucket is sorted by length, so its last text is the longest one.
+            generation_config = self.get_generation_config(profile, len(encodings["input_ids"][bucket[-1]]))
+            output_ids = self.model.generate(**inputs, generation_config=generation_config)
+            for index, summary in zip(bucket, self.tokenizer.batch_decode(output_ids, skip_special_tokens=True)):
+                summaries[index] = summary
+        return summaries
+
 
 class EnglishSummarizer(Summarizer):
     """English text summarizer.
 
-    This summarizer uses a simplified pipeline approach for English text.
+    This summarizer uses a simplified pipeline approach for English text. The
+    pipeline is built once per summarizer and reused for every article.
+
+    Attributes:
+        pipeline (SummarizationPipeline): Pre-configured summarization pipeline.
     """
 
-    def summarize(self, text: str) -> str:
+    generation_kwargs = {"max_length": 200, "min_length": 50, "do_sample": False}
+
+    def __init__(self, model_name_or_path: str, backend: Optional[str] = None):
+        """Initializes the tokenizer, model and summarization pipeline.
+
+        Args:
+            model_name_or_path (str): The name of the pre-trained model or path to load.
+            backend (Optional[str]): Inference backend, defaults to the SUMMARIZER_BACKEND.
+        """
+        super().__init__(model_name_or_path, backend)
+        self.pipeline = pipeline("summarization", model=self.model, tokenizer=self.tokenizer)
+
+    def summarize(self, text: str, streamer: Optional[BaseStreamer] = None, profile: Optional[str] = None) -> str:
         """Summarizes English text.
 
         Args:
             text (str): Text to summarize.
+            streamer (Optional[BaseStreamer]): Streamer receiving the tokens as they are generated.
+            profile (Optional[str]): Name of the generation profile to use.
 
         Returns:
             str: Summarized text.
         """
-        summarization_pipeline = pipeline("summarization", model=self.model, tokenizer=self.tokenizer)
-        summary = summarization_pipeline(text, max_length=200, min_length=50, do_sample=False)
+        input_length = len(self._encode([text])["input_ids"][0]) if profile else None
+        generation_config = self.get_generation_config(profile, input_length)
+        # Articles longer than the model's maximum input length are truncated, as in the batches.
+        if streamer:
+            summary = self.pipeline(text, truncation=True, generation_config=generation_config, streamer=streamer)
+        else:
+            summary = self.pipeline(text, truncation=True, generation_config=generation_config)
         return summary[0]["summary_text"]
 
 
@@ -65,41 +365,200 @@ class RussianSummarizer(Summarizer):
     """Russian text summarizer.
 
     This summarizer uses a detailed generate and decode approach for Russian text.
+    Inputs are padded only up to their actual length, so short articles cost
+    proportionally less than long ones.
     """
 
-    def summarize(self, text: str) -> str:
+    max_input_length = 600
+    generation_kwargs = {"no_repeat_ngram_size": 4}
+
+    def summarize(self, text: str, streamer: Optional[BaseStreamer] = None, profile: Optional[str] = None) -> str:
         """Summarizes Russian text.
 
         Args:
             text (str): Text to summarize.
+            streamer (Optional[BaseStreamer]): Streamer receiving the tokens as they are generated.
+            profile (Optional[str]): Name of the generation profile to use.
 
         Returns:
             str: Summarized text.
         """
-        input_ids = self.tokenizer(
+        inputs = self.tokenizer(
             text,
-            max_length=600,
-            padding="max_length",
+            max_length=self.max_input_length,
+            padding="longest",
+            pad_to_multiple_of=settings.SUMMARIZER_PAD_TO_MULTIPLE_OF,
             truncation=True,
+            return_token_type_ids=False,
             return_tensors="pt",
-        )["input_ids"]
+        )
 
-        output_ids = self.model.generate(input_ids, no_repeat_ngram_size=4)[0]
+        generation_config = self.get_generation_config(profile, inputs["input_ids"].shape[-1])
+        if streamer:
+            output_ids = self.model.generate(**inputs, generation_config=generation_config, streamer=streamer)[0]
+        else:
+            output_ids = self.model.generate(**inputs, generation_config=generation_config)[0]
         return self.tokenizer.decode(output_ids, skip_special_tokens=True)
 
 
+class RemoteSummarizer(Summarizer):
+    """Summarizer delegating to the model loaded by the local inference server.
+
+    Attributes:
+        lang (str): Language code of the summarized texts.
+        client (InferenceClient): Client of the inference server.
+    """
+
+    tokenizer = None
+
+    def __init__(self, lang: str, client: InferenceClient):
+        self.model_name_or_path = f"remote:{lang}"
+        self.lang = lang
+        self.client = client
+        self._fingerprints: dict[Optional[str], str] = {}
+
+    def get_fingerprint(self, profile: Optional[str] = None) -> str:
+        if profile not in self._fingerprints:
+            self._fingerprints[profile] = self.client.get_fingerprint(self.lang, profile)
+        return self._fingerprints[profile]
+
+    def summarize(self, text: str, streamer: Optional[BaseStreamer] = None, profile: Optional[str] = None) -> str:
+        """Summarizes text with the inference server.
+
+        Args:
+            text (str): Text to summarize.
+            streamer (Optional[BaseStreamer]): Streamer of a summary, whose tokens the server publishes itself.
+            profile (Optional[str]): Name of the generation profile to use.
+
+        Returns:
+            str: Summarized text.
+        """
+        # Streamers can't cross the process boundary, the server streams to the same summary channel instead.
+        stream_summary_id = getattr(streamer, "summary_id", None)
+        if streamer is not None and stream_summary_id is None:
+            raise ValueError("Only summary streams can be relayed by the inference server")
+        stream_version = getattr(streamer, "version", None)
+        return self.client.summarize(self.lang, [text], profile, stream_summary_id, stream_version)[0]
+
+    def summarize_batch(
+        self, texts: list[str], batch_size: Optional[int] = None, profile: Optional[str] = None
+    ) -> list[str]:
+        return self.client.summarize(self.lang, texts, profile) if texts else []
+
+    def can_stream(self, profile: Optional[str] = None) -> bool:
+        # The server streams the summary only if the profile allows it.
+        return True
+
+
+class ExtractiveSummarizer(Summarizer):
+    """Summarizer that extracts the most central sentences of the text.
+
+    The sentences are ranked with TextRank over their TF-IDF vectors, which takes
+    a couple of NumPy operations per article instead of running a model, so it
+    serves as a low-latency tier and as the fallback when the workers are
+    overloaded. It works for any language with whitespace-separated words.
+
+    Attributes:
+        num_sentences (int): Number of sentences in the summary.
+        damping (float): Damping factor of the TextRank random walk.
+        max_iterations (int): Maximum number of power iterations.
+        tolerance (float): Change of the scores at which the power iterations stop.
+    """
+
+    sentence_pattern = re.compile(r"(?<=[.!?…])\s+|\n+")
+    word_pattern = re.compile(r"\w+")
+
+    damping = 0.85
+    max_iterations = 50
+    tolerance = 1e-4
+
+    def __init__(self, num_sentences: int):
+        self.model_name_or_path = "extractive"
+        self.num_sentences = num_sentences
+
+    def get_fingerprint(self, profile: Optional[str] = None) -> str:
+        return json.dumps({"model": self.model_name_or_path, "num_sentences": self.num_sentences}, sort_keys=True)
+
+    def summarize(self, text: str, streamer: Optional[BaseStreamer] = None, profile: Optional[str] = None) -> str:
+        """Summarizes text by extracting its most central sentences.
+
+        Args:
+            text (str): Text to summarize.
+            streamer (Optional[BaseStreamer]): Unused, there are no tokens to stream.
+            profile (Optional[str]): Unused, there is nothing to generate.
+
+        Returns:
+            str: The extracted sentences in their original order.
+        """
+        sentences = [sentence.strip() for sentence in self.sentence_pattern.split(text) if sentence.strip()]
+        if len(sentences) <= self.num_sentences:
+            return " ".join(sentences)
+
+        scores = self._rank(sentences)
+        selected = np.sort(np.argsort(-scores, kind="stable")[: self.num_sentences])
+        return " ".join(sentences[index] for index in selected)
+
+    def summarize_batch(
+        self, texts: list[str], batch_size: Optional[int] = None, profile: Optional[str] = None
+    ) -> list[str]:
+        return [self.summarize(text) for text in texts]
+
+    def _rank(self, sentences: list[str]) -> np.ndarray:
+        words = [self.word_pattern.findall(sentence.lower()) for sentence in sentences]
+        flat_words = list(chain.from_iterable(words))
+        vocabulary = {word: index for index, word in enumerate(dict.fromkeys(flat_words))}
+        term_ids = np.fromiter(map(vocabulary.__getitem__, flat_words), dtype=np.int64, count=len(flat_words))
+        sentence_ids = np.repeat(np.arange(len(sentences)), [len(sentence) for sentence in words])
+
+        # Term counts per sentence, followed by TF-IDF weighting with the sentences as the documents.
+        shape = (len(sentences), len(vocabulary))
+        counts = np.bincount(sentence_ids * shape[1] + term_ids, minlength=shape[0] * shape[1]).reshape(shape)
+        idf = np.log((1 + shape[0]) / (1 + np.count_nonzero(counts, axis=0))) + 1
+        vectors = counts * idf
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+        # Cosine similarity graph, whose rows are normalized into the transition probabilities.
+        similarity = vectors @ vectors.T
+        np.fill_diagonal(similarity, 0)
+        totals = similarity.sum(axis=1, keepdims=True)
+        transitions = np.divide(similarity, totals, out=np.full_like(similarity, 1 / shape[0]), where=totals > 0)
+
+        scores = np.full(shape[0], 1 / shape[0])
+        for _ in range(self.max_iterations):
+            updated = (1 - self.damping) / shape[0] + self.damping * (transitions.T @ scores)
+            converged = np.abs(updated - scores).sum() < self.tolerance
+            scores = updated
+            if converged:
+                break
+        return scores
+
+
 class SummarizerFactory:
     """Factory class to provide summarizer instances based on language.
 
     The SummarizerFactory class manages the creation and caching of Summarizer
-    instances for different languages. It ensures that only one summarizer
-    instance is created per language, thereby conserving resources.
+    instances for the languages configured with SUMMARIZER_MODELS. It ensures
+    that only one summarizer instance is created per language, even when several
+    threads ask for it at once. The loaded models are kept within the
+    SUMMARIZER_MEMORY_BUDGET_MB by evicting the least recently used idle ones.
+    When the inference server is enabled, the summarizers are its clients.
 
     Attributes:
-        _instances (dict[str, Summarizer]): Dictionary to hold created summarizer instances.
+        remote (bool): Whether the models are served by the inference server.
+        summarizer_classes (dict[str, type[Summarizer]]): Summarizer implementations by their config name.
+        stats (dict[str, float]): Number of loads and evictions, time spent loading and memory taken by the models.
+        _instances (dict[str, Summarizer]): Created summarizer instances, the least recently used first.
     """
 
+    remote: bool = bool(settings.INFERENCE_SERVER_SOCKET)
+    summarizer_classes: dict[str, type[Summarizer]] = {"english": EnglishSummarizer, "russian": RussianSummarizer}
+    stats: dict[str, float] = {"loads": 0, "evictions": 0, "load_seconds": 0.0, "resident_bytes": 0}
     _instances: dict[str, Summarizer] = {}
+    _sizes: dict[str, int] = {}
+    _last_used: dict[str, float] = {}
+    _lock = threading.Lock()
+    _loading_locks: dict[str, threading.Lock] = {}
 
     @classmethod
     def get_summarizer(cls, lang: str) -> Summarizer:
@@ -115,14 +574,68 @@ class SummarizerFactory:
         Returns:
             Summarizer: Summarizer instance for the specified language.
         """
-        if lang not in cls._instances:
-            model_name = cls.get_model_name(lang)
-            summarizer_class = RussianSummarizer if lang == "ru" else EnglishSummarizer
-            cls._instances[lang] = summarizer_class(model_name)
-        return cls._instances[lang]
+        with cls._lock:
+            if lang in cls._instances:
+                return cls._touch(lang)
+            config = cls.get_model_config(lang)
+            loading_lock = cls._loading_locks.setdefault(lang, threading.Lock())
+
+        # Only one thread loads the model, the others wait for it instead of loading copies of their own.
+        with loading_lock:
+            with cls._lock:
+                if lang in cls._instances:
+                    return cls._touch(lang)
+                # Make room for the model if its size is known from an earlier load.
+                cls._evict(reserve=cls._sizes.get(lang, 0), keep=lang)
+
+            started = time.monotonic()
+            if cls.remote:
+                summarizer: Summarizer = RemoteSummarizer(lang, get_inference_client())
+                size = 0
+            else:
+                summarizer = cls.summarizer_classes[config.summarizer](config.model, config.backend)
+                size = estimate_model_size(summarizer.model)
+            load_seconds = time.monotonic() - started
+
+            with cls._lock:
+                cls._instances[lang] = summarizer
+                cls._sizes[lang] = size
+                cls.stats["loads"] += 1
+                cls.stats["load_seconds"] += load_seconds
+                cls.stats["resident_bytes"] += size
+                log.info("Loaded summarizer for %s (%d MB) in %.1fs", lang, size >> 20, load_seconds)
+                cls._evict(reserve=0, keep=lang)
+                return cls._touch(lang)
+
+    @classmethod
+    def get_extractive_summarizer(cls) -> Summarizer:
+        """Gets the extractive summarizer, which serves all languages.
+
+        Returns:
+            Summarizer: Extractive summarizer instance.
+        """
+        # It shares the registry with the models, which other threads may be evicting from meanwhile.
+        with cls._lock:
+            if "extractive" not in cls._instances:
+                cls._instances["extractive"] = ExtractiveSummarizer(settings.EXTRACTIVE_SUMMARY_SENTENCES)
+            return cls._instances["extractive"]
 
     @staticmethod
-    def get_model_name(lang: str) -> str:
+    def get_model_config(lang: str) -> SummarizerModel:
+        """Gets the summarization model configured for the specified language.
+
+        Args:
+            lang (str): Language code (e.g., 'en' for English, 'ru' for Russian).
+
+        Returns:
+            SummarizerModel: Model, backend and generation profile for the language.
+        """
+        if lang not in settings.SUMMARIZER_MODELS:
+            raise ValueError(f"Unsupported language: {lang}")
+        return settings.SUMMARIZER_MODELS[lang]
+
+    @classmethod
+    def get_model_name(cls, lang: str) -> str:
         """Gets the model name based on the specified language.
 
         Args:
@@ -131,10 +644,37 @@ class SummarizerFactory:
         Returns:
             str: Model name for the specified language.
         """
-        model_mapping = {
-            "en": settings.SUMMARIZER_MODEL_EN,
-            "ru": settings.SUMMARIZER_MODEL_RU,
-        }
-        if lang not in model_mapping:
-            raise ValueError(f"Unsupported language: {lang}")
-        return model_mapping[lang]
+        return cls.get_model_config(lang).model
+
+    @classmethod
+    def _touch(cls, lang: str) -> Summarizer:
+        # Dictionaries keep the insertion order, so reinserting moves the summarizer to the most recently used end.
+        cls._instances[lang] = cls._instances.pop(lang)
+        cls._last_used[lang] = time.monotonic()
+        return cls._instances[lang]
+
+    @classmethod
+    def _evict(cls, reserve: int, keep: str) -> None:
+        budget = settings.SUMMARIZER_MEMORY_BUDGET_MB << 20
+        if not budget:
+            return
+
+        now = time.monotonic()
+        for lang in list(cls._instances):
+            if cls.stats["resident_bytes"] + reserve <= budget:
+                return
+            idle_seconds = now - cls._last_used.get(lang, 0)
+            if lang == keep or not cls._sizes.get(lang) or idle_seconds < settings.SUMMARIZER_MIN_IDLE_SECONDS:
+                continue
+            # Tasks still holding the summarizer keep it alive until they finish.
+            del cls._instances[lang]
+            cls.stats["evictions"] += 1
+            cls.stats["resident_bytes"] -= cls._sizes[lang]
+            log.info("Evicted summarizer for %s (%d MB) idle for %.0fs", lang, cls._sizes[lang] >> 20, idle_seconds)
+
+        if cls.stats["resident_bytes"] + reserve > budget:
+            log.warning(
+                "Summarization models take %d MB over the budget of %d MB, the others are in use",
+                (cls.stats["resident_bytes"] + reserve - budget) >> 20,
+                settings.SUMMARIZER_MEMORY_BUDGET_MB,
+            )
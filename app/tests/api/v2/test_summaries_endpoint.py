@@ -1,21 +1,66 @@
+import json
+
 import pytest
+from sqlalchemy import update
 
-from app.background.tasks import celery_generate_summary
+from app.api.v2.endpoints import summaries as summaries_endpoint
+from app.background import streaming
 from app.config import get_settings
 from app.main import app
-from app.tests.conftest import TEST_USER
+from app.models import Summary
+from app.tests.conftest import TEST_USER, async_session
 
 TEST_ID = "0987654321"
+# Status and statistics of a summary whose job hasn't been picked up by a worker yet.
+QUEUED_JOB = {
+    "status": "queued",
+    "error": None,
+    "queue_wait_seconds": None,
+    "fetch_seconds": None,
+    "parse_seconds": None,
+    "detect_seconds": None,
+    "generate_seconds": None,
+    "write_seconds": None,
+    "input_tokens": None,
+    "output_tokens": None,
+}
 
 settings = get_settings()
 
 
+class FakePubSub:
+    def __init__(self, messages):
+        self.messages = messages
+        self.channels = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    async def subscribe(self, channel):
+        self.channels.append(channel)
+
+    async def get_message(self, ignore_subscribe_messages=False, timeout=None):
+        message = self.messages.pop(0)
+        return {"data": json.dumps(message)} if message else None
+
+
+class FakeAsyncRedis:
+    def __init__(self, messages):
+        self.pubsub_instance = FakePubSub(messages)
+
+    def pubsub(self):
+        return self.pubsub_instance
+
+    async def aclose(self):
+        pass
+
+
 @pytest.mark.asyncio
 async def test_create_summary(test_client_with_db, monkeypatch):
-    def mock_delay(summary_id, url):
-        return None
-
-    monkeypatch.setattr(celery_generate_summary, "delay", mock_delay)
+    monkeypatch.setattr(summaries_endpoint, "enqueue_summary", lambda *args, **kwargs: None)
 
     async with test_client_with_db as client:
         await client.post(url=app.url_path_for("create_user"), json=TEST_USER)
@@ -41,6 +86,82 @@ async def test_create_summary(test_client_with_db, monkeypatch):
         assert authorized_response.json()["url"] == "https://foo.bar/"
 
 
+@pytest.mark.asyncio
+async def test_create_summary_with_generation_profile(test_client_with_db, monkeypatch):
+    delayed = []
+
+    monkeypatch.setattr(
+        summaries_endpoint, "enqueue_summary", lambda summary_id, url, **kwargs: delayed.append(kwargs["profile"])
+    )
+
+    async with test_client_with_db as client:
+        await client.post(url=app.url_path_for("create_user"), json=TEST_USER)
+        response = await client.post(
+            url=app.url_path_for("issue_access_token"),
+            data={"username": TEST_USER["username"], "password": TEST_USER["password"]},
+        )
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        response = await client.post(
+            url=app.url_path_for("create_summary"), json={"url": "https://foo.bar", "profile": "fast"}, headers=headers
+        )
+        assert response.status_code == 201
+        assert delayed == ["fast"]
+
+        response = await client.post(
+            url=app.url_path_for("create_summary"), json={"url": "https://foo.bar", "profile": "slow"}, headers=headers
+        )
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["loc"] == ["body", "profile"]
+
+
+@pytest.mark.asyncio
+async def test_create_summary_reuses_fresh_summary_of_same_article(test_client_with_db, monkeypatch):
+    delayed = []
+
+    monkeypatch.setattr(
+        summaries_endpoint, "enqueue_summary", lambda summary_id, url, **kwargs: delayed.append(summary_id)
+    )
+
+    async with test_client_with_db as client:
+        await client.post(url=app.url_path_for("create_user"), json=TEST_USER)
+        response = await client.post(
+            url=app.url_path_for("issue_access_token"),
+            data={"username": TEST_USER["username"], "password": TEST_USER["password"]},
+        )
+        tokens = response.json()
+        issued_test_token = tokens["access_token"]
+
+        first_response = await client.post(
+            url=app.url_path_for("create_summary"),
+            json={"url": "https://foo.bar/article"},
+            headers={"Authorization": f"Bearer {issued_test_token}"},
+        )
+        first = first_response.json()
+        async with async_session() as db:
+            await db.execute(
+                update(Summary)
+                .where(Summary.id == first["id"])
+                .values(summary="Generated summary", status="done", job_key=None, job_task_ids=None)
+            )
+            await db.commit()
+
+        second_response = await client.post(
+            url=app.url_path_for("create_summary"),
+            json={"url": "https://FOO.bar/article/?utm_source=newsletter#top"},
+            headers={"Authorization": f"Bearer {issued_test_token}"},
+        )
+        assert second_response.status_code == 201
+        second = second_response.json()
+        assert second["id"] != first["id"]
+        assert delayed == [first["id"]]
+
+        response = await client.get(url=app.url_path_for("read_summary", id=second["id"]))
+        assert response.json()["summary"] == "Generated summary"
+        assert response.json()["url"] == "https://foo.bar/article/?utm_source=newsletter#top"
+        assert response.json()["status"] == "done"
+
+
 @pytest.mark.asyncio
 async def test_create_summaries_invalid_json(test_client_with_db):
     async with test_client_with_db as client:
@@ -83,10 +204,7 @@ async def test_create_summaries_invalid_json(test_client_with_db):
 
 @pytest.mark.asyncio
 async def test_read_summary(test_client_with_db, monkeypatch):
-    def mock_delay(summary_id, url):
-        return None
-
-    monkeypatch.setattr(celery_generate_summary, "delay", mock_delay)
+    monkeypatch.setattr(summaries_endpoint, "enqueue_summary", lambda *args, **kwargs: None)
 
     async with test_client_with_db as client:
         await client.post(url=app.url_path_for("create_user"), json=TEST_USER)
@@ -118,9 +236,159 @@ async def test_read_summary(test_client_with_db, monkeypatch):
             "url": "https://foo.bar/",
             "summary": "",
             "user_id": summary["user_id"],
+            **QUEUED_JOB,
         }
 
 
+@pytest.mark.asyncio
+async def test_stream_summary(test_client_with_db, monkeypatch):
+    monkeypatch.setattr(summaries_endpoint, "enqueue_summary", lambda *args, **kwargs: None)
+    monkeypatch.setattr(summaries_endpoint, "async_session", async_session)
+    messages = [
+        {"event": "token", "data": {"text": "Generated "}},
+        None,
+        {"event": "token", "data": {"text": "summary"}},
+        {"event": "summary", "data": {"summary": "Generated summary"}},
+    ]
+    redis_client = FakeAsyncRedis(messages)
+    monkeypatch.setattr(streaming.aioredis.Redis, "from_url", lambda url: redis_client)
+
+    async with test_client_with_db as client:
+        await client.post(url=app.url_path_for("create_user"), json=TEST_USER)
+        response = await client.post(
+            url=app.url_path_for("issue_access_token"),
+            data={"username": TEST_USER["username"], "password": TEST_USER["password"]},
+        )
+        tokens = response.json()
+        issued_test_token = tokens["access_token"]
+
+        authorized_response = await client.post(
+            url=app.url_path_for("create_summary"),
+            json={"url": "https://foo.bar"},
+            headers={"Authorization": f"Bearer {issued_test_token}"},
+        )
+        summary = authorized_response.json()
+
+        response = await client.get(url=app.url_path_for("stream_summary", id=summary["id"]))
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert response.text == (
+            'event: token\ndata: {"text": "Generated "}\n\n'
+            ": keep-alive\n\n"
+            'event: token\ndata: {"text": "summary"}\n\n'
+            'event: summary\ndata: {"summary": "Generated summary"}\n\n'
+        )
+        assert redis_client.pubsub_instance.channels == [f"summaries:{summary['id']}:stream"]
+
+
+@pytest.mark.asyncio
+async def test_stream_finished_summary(test_client_with_db, monkeypatch):
+    monkeypatch.setattr(summaries_endpoint, "enqueue_summary", lambda *args, **kwargs: None)
+    monkeypatch.setattr(summaries_endpoint, "async_session", async_session)
+
+    async with test_client_with_db as client:
+        await client.post(url=app.url_path_for("create_user"), json=TEST_USER)
+        response = await client.post(
+            url=app.url_path_for("issue_access_token"),
+            data={"username": TEST_USER["username"], "password": TEST_USER["password"]},
+        )
+        tokens = response.json()
+        issued_test_token = tokens["access_token"]
+
+        authorized_response = await client.post(
+            url=app.url_path_for("create_summary"),
+            json={"url": "https://foo.bar"},
+            headers={"Authorization": f"Bearer {issued_test_token}"},
+        )
+        summary = authorized_response.json()
+        async with async_session() as db:
+            await db.execute(
+                update(Summary).where(Summary.id == summary["id"]).values(summary="Generated summary", status="done")
+            )
+            await db.commit()
+
+        response = await client.get(url=app.url_path_for("stream_summary", id=summary["id"]))
+        assert response.status_code == 200
+        assert response.text == 'event: summary\ndata: {"summary": "Generated summary"}\n\n'
+
+
+@pytest.mark.asyncio
+async def test_stream_failed_summary(test_client_with_db, monkeypatch):
+    monkeypatch.setattr(summaries_endpoint, "enqueue_summary", lambda *args, **kwargs: None)
+    monkeypatch.setattr(summaries_endpoint, "async_session", async_session)
+
+    async with test_client_with_db as client:
+        await client.post(url=app.url_path_for("create_user"), json=TEST_USER)
+        response = await client.post(
+            url=app.url_path_for("issue_access_token"),
+            data={"username": TEST_USER["username"], "password": TEST_USER["password"]},
+        )
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        response = await client.post(
+            url=app.url_path_for("create_summary"), json={"url": "https://foo.bar"}, headers=headers
+        )
+        summary = response.json()
+        async with async_session() as db:
+            await db.execute(
+                update(Summary).where(Summary.id == summary["id"]).values(status="failed", error="HTTP 404")
+            )
+            await db.commit()
+
+        response = await client.get(url=app.url_path_for("stream_summary", id=summary["id"]))
+        assert response.status_code == 200
+        assert response.text == 'event: error\ndata: {"error": "HTTP 404"}\n\n'
+
+
+@pytest.mark.asyncio
+async def test_stream_summary_being_summarized_again(test_client_with_db, monkeypatch):
+    monkeypatch.setattr(summaries_endpoint, "enqueue_summary", lambda *args, **kwargs: None)
+    monkeypatch.setattr(summaries_endpoint, "async_session", async_session)
+    messages = [
+        {"event": "token", "data": {"text": "Previous "}, "version": 1},
+        {"event": "summary", "data": {"summary": "Previous summary"}, "version": 1},
+        None,
+        {"event": "token", "data": {"text": "Partial "}, "version": 2},
+        {"event": "error", "data": {"error": "Timeout"}, "version": 2},
+    ]
+    redis_client = FakeAsyncRedis(messages)
+    monkeypatch.setattr(streaming.aioredis.Redis, "from_url", lambda url: redis_client)
+
+    async with test_client_with_db as client:
+        await client.post(url=app.url_path_for("create_user"), json=TEST_USER)
+        response = await client.post(
+            url=app.url_path_for("issue_access_token"),
+            data={"username": TEST_USER["username"], "password": TEST_USER["password"]},
+        )
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        response = await client.post(
+            url=app.url_path_for("create_summary"), json={"url": "https://foo.bar"}, headers=headers
+        )
+        summary = response.json()
+        # Updated to another article after the previous one was summarized.
+        async with async_session() as db:
+            await db.execute(
+                update(Summary).where(Summary.id == summary["id"]).values(summary="Previous summary", job_version=2)
+            )
+            await db.commit()
+
+        response = await client.get(url=app.url_path_for("stream_summary", id=summary["id"]))
+        assert response.status_code == 200
+        assert response.text == (
+            ": keep-alive\n\n"
+            'event: token\ndata: {"text": "Partial "}\n\n'
+            'event: error\ndata: {"error": "Timeout"}\n\n'
+        )
+
+
+@pytest.mark.asyncio
+async def test_stream_summary_incorrect_id(test_client_with_db, monkeypatch):
+    monkeypatch.setattr(summaries_endpoint, "async_session", async_session)
+    async with test_client_with_db as client:
+        response = await client.get(url=app.url_path_for("stream_summary", id=TEST_ID))
+        assert response.status_code == 404
+        assert response.json()["detail"] == "Summary not found"
+
+
 @pytest.mark.asyncio
 async def test_read_summary_incorrect_id(test_client_with_db):
     async with test_client_with_db as client:
@@ -131,10 +399,7 @@ async def test_read_summary_incorrect_id(test_client_with_db):
 
 @pytest.mark.asyncio
 async def test_read_all_summaries(test_client_with_db, monkeypatch):
-    def mock_delay(summary_id, url):
-        return None
-
-    monkeypatch.setattr(celery_generate_summary, "delay", mock_delay)
+    monkeypatch.setattr(summaries_endpoint, "enqueue_summary", lambda *args, **kwargs: None)
 
     async with test_client_with_db as client:
         await client.post(url=app.url_path_for("create_user"), json=TEST_USER)
@@ -166,10 +431,7 @@ async def test_read_all_summaries(test_client_with_db, monkeypatch):
 
 @pytest.mark.asyncio
 async def test_update_summary(test_client_with_db, monkeypatch):
-    def mock_delay(summary_id, url):
-        return None
-
-    monkeypatch.setattr(celery_generate_summary, "delay", mock_delay)
+    monkeypatch.setattr(summaries_endpoint, "enqueue_summary", lambda *args, **kwargs: None)
 
     async with test_client_with_db as client:
         await client.post(url=app.url_path_for("create_user"), json=TEST_USER)
@@ -211,6 +473,7 @@ async def test_update_summary(test_client_with_db, monkeypatch):
             "url": "https://updated.bar/",
             "summary": "",
             "user_id": summary["user_id"],
+            **QUEUED_JOB,
         }
 
 
@@ -308,10 +571,7 @@ async def test_update_summary_invalid_url(test_client_with_db):
 
 @pytest.mark.asyncio
 async def test_update_summary_without_rights(test_client_with_db, monkeypatch):
-    def mock_delay(summary_id, url):
-        return None
-
-    monkeypatch.setattr(celery_generate_summary, "delay", mock_delay)
+    monkeypatch.setattr(summaries_endpoint, "enqueue_summary", lambda *args, **kwargs: None)
 
     async with test_client_with_db as client:
         await client.post(url=app.url_path_for("create_user"), json=TEST_USER)
@@ -355,11 +615,84 @@ async def test_update_summary_without_rights(test_client_with_db, monkeypatch):
 
 
 @pytest.mark.asyncio
-async def test_delete_summary(test_client_with_db, monkeypatch):
-    def mock_delay(summary_id, url):
-        return None
+async def test_update_summary_coalesces_and_supersedes_jobs(test_client_with_db, monkeypatch):
+    enqueued, revoked = [], []
+
+    monkeypatch.setattr(
+        summaries_endpoint,
+        "enqueue_summary",
+        lambda summary_id, url, **kwargs: enqueued.append((url, kwargs["profile"], kwargs["version"])),
+    )
+    monkeypatch.setattr(summaries_endpoint, "revoke_summary_job", revoked.append)
+
+    async with test_client_with_db as client:
+        await client.post(url=app.url_path_for("create_user"), json=TEST_USER)
+        response = await client.post(
+            url=app.url_path_for("issue_access_token"),
+            data={"username": TEST_USER["username"], "password": TEST_USER["password"]},
+        )
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        response = await client.post(
+            url=app.url_path_for("create_summary"), json={"url": "https://foo.bar"}, headers=headers
+        )
+        summary_id = response.json()["id"]
+        async with async_session() as db:
+            task_ids = (await db.get(Summary, summary_id)).job_task_ids
+
+        # The same job is already in flight.
+        await client.put(
+            url=app.url_path_for("update_summary", id=summary_id), json={"url": "https://foo.bar"}, headers=headers
+        )
+        await client.put(
+            url=app.url_path_for("update_summary", id=summary_id),
+            json={"url": "https://foo.bar", "profile": "fast"},
+            headers=headers,
+        )
+        await client.delete(url=app.url_path_for("delete_summary", id=summary_id), headers=headers)
+
+    assert enqueued == [("https://foo.bar/", None, 1), ("https://foo.bar/", "fast", 2)]
+    assert len(task_ids.split()) == 3
+    assert revoked[0] == task_ids
+    assert revoked[1] != task_ids and len(revoked) == 2
+
 
-    monkeypatch.setattr(celery_generate_summary, "delay", mock_delay)
+@pytest.mark.asyncio
+async def test_create_summary_passes_the_lane_and_the_jobs_in_flight(test_client_with_db, monkeypatch):
+    enqueued = []
+
+    monkeypatch.setattr(
+        summaries_endpoint,
+        "enqueue_summary",
+        lambda summary_id, url, **kwargs: enqueued.append((kwargs["lane"], kwargs["jobs_in_flight"])),
+    )
+
+    async with test_client_with_db as client:
+        await client.post(url=app.url_path_for("create_user"), json=TEST_USER)
+        response = await client.post(
+            url=app.url_path_for("issue_access_token"),
+            data={"username": TEST_USER["username"], "password": TEST_USER["password"]},
+        )
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        for index in range(3):
+            response = await client.post(
+                url=app.url_path_for("create_summary"),
+                json={"url": f"https://foo.bar/{index}", "lane": "bulk"},
+                headers=headers,
+            )
+            assert response.status_code == 201
+        response = await client.post(
+            url=app.url_path_for("create_summary"), json={"url": "https://foo.bar/", "lane": "urgent"}, headers=headers
+        )
+        assert response.status_code == 422
+
+    assert enqueued == [("bulk", 0), ("bulk", 1), ("bulk", 2)]
+
+
+@pytest.mark.asyncio
+async def test_delete_summary(test_client_with_db, monkeypatch):
+    monkeypatch.setattr(summaries_endpoint, "enqueue_summary", lambda *args, **kwargs: None)
 
     async with test_client_with_db as client:
         await client.post(url=app.url_path_for("create_user"), json=TEST_USER)
@@ -397,15 +730,13 @@ async def test_delete_summary(test_client_with_db, monkeypatch):
             "url": "https://foo.bar/",
             "summary": "",
             "user_id": summary["user_id"],
+            **QUEUED_JOB,
         }
 
 
 @pytest.mark.asyncio
 async def test_delete_summary_without_rights(test_client_with_db, monkeypatch):
-    def mock_delay(summary_id, url):
-        return None
-
-    monkeypatch.setattr(celery_generate_summary, "delay", mock_delay)
+    monkeypatch.setattr(summaries_endpoint, "enqueue_summary", lambda *args, **kwargs: None)
 
     async with test_client_with_db as client:
         await client.post(url=app.url_path_for("create_user"), json=TEST_USER)
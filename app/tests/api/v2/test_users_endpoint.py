@@ -1,6 +1,6 @@
 import pytest
 
-from app.background.tasks import celery_generate_summary
+from app.api.v2.endpoints import summaries as summaries_endpoint
 from app.config import get_settings
 from app.main import app
 from app.tests.conftest import TEST_USER
@@ -149,10 +149,7 @@ async def test_read_me(test_client_with_db):
 
 @pytest.mark.asyncio
 async def test_read_my_summaries(test_client_with_db, monkeypatch):
-    def mock_delay(summary_id, url):
-        return None
-
-    monkeypatch.setattr(celery_generate_summary, "delay", mock_delay)
+    monkeypatch.setattr(summaries_endpoint, "enqueue_summary", lambda *args, **kwargs: None)
 
     async with test_client_with_db as client:
         await client.post(url=app.url_path_for("create_user"), json=TEST_USER)
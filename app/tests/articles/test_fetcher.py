@@ -0,0 +1,151 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.articles.fetcher import ArticleFetcher, ArticleFetchError, decode_page, parse_article
+
+HTML = "<html><head><title>Budget approved</title></head><body><p>The council approved the budget.</p></body></html>"
+
+
+def make_fetcher(handler, **kwargs):
+    options = {
+        "max_connections": 10,
+        "max_connections_per_host": 2,
+        "connect_timeout": 1,
+        "read_timeout": 1,
+        "max_body_size": 1024,
+        "user_agent": "test-agent",
+        "max_revalidation_items": 8,
+        "max_revalidation_chars": 1024,
+        **kwargs,
+    }
+    return ArticleFetcher(**options, transport=httpx.MockTransport(handler))
+
+
+@pytest.mark.asyncio
+async def test_fetch_downloads_the_page():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, text=HTML, headers={"Content-Type": "text/html; charset=utf-8"})
+
+    fetcher = make_fetcher(handler)
+    page = await fetcher.fetch("https://news.example/budget")
+    await fetcher.aclose()
+
+    assert page.html == HTML
+    assert not page.not_modified
+    assert requests[0].headers["User-Agent"] == "test-agent"
+
+
+@pytest.mark.asyncio
+async def test_fetch_revalidates_downloaded_pages():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(
+            200, text=HTML, headers={"ETag": '"v1"', "Last-Modified": "Mon, 02 Oct 2023 10:00:00 GMT"}
+        )
+
+    fetcher = make_fetcher(handler)
+    first = await fetcher.fetch("https://news.example/budget")
+    second = await fetcher.fetch("https://news.example/budget")
+    await fetcher.aclose()
+
+    assert second.not_modified
+    assert second.html == first.html == HTML
+    assert requests[1].headers["If-Modified-Since"] == "Mon, 02 Oct 2023 10:00:00 GMT"
+
+
+@pytest.mark.asyncio
+async def test_fetch_keeps_pages_for_revalidation_up_to_a_total_size():
+    def handler(request):
+        return httpx.Response(200, text=request.url.path[1:] * 100, headers={"ETag": '"v1"'})
+
+    fetcher = make_fetcher(handler, max_revalidation_chars=250)
+    for url in ("https://news.example/a", "https://news.example/b", "https://news.example/c"):
+        await fetcher.fetch(url)
+    await fetcher.fetch("https://news.example/" + "d" * 3)
+    await fetcher.aclose()
+
+    assert list(fetcher._pages) == ["https://news.example/b", "https://news.example/c"]
+    assert fetcher._pages_size == 200
+
+
+@pytest.mark.parametrize(
+    "content, declared_encoding",
+    [
+        ('<html><head><meta charset="windows-1251"></head><body>Бюджет принят</body></html>', None),
+        (
+            '<html><head><meta http-equiv="Content-Type" content="text/html; charset=windows-1251">'
+            "</head><body>Бюджет принят</body></html>",
+            None,
+        ),
+        ("<html><body>Бюджет принят</body></html>", "windows-1251"),
+    ],
+)
+def test_decode_page_with_the_declared_encoding(content, declared_encoding):
+    assert decode_page(content.encode("windows-1251"), declared_encoding) == content
+
+
+def test_decode_page_defaults_to_utf8():
+    assert decode_page("<p>Бюджет</p>".encode()) == "<p>Бюджет</p>"
+    assert decode_page(b'<meta charset="unknown"><p>\xd0\x91</p>') == '<meta charset="unknown"><p>Б</p>'
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("status_code", [404, 503])
+async def test_fetch_fails_on_unsuccessful_responses(status_code):
+    fetcher = make_fetcher(lambda request: httpx.Response(status_code))
+
+    with pytest.raises(ArticleFetchError, match=f"HTTP {status_code}"):
+        await fetcher.fetch("https://news.example/missing")
+
+
+@pytest.mark.asyncio
+async def test_fetch_limits_the_page_size():
+    def handler(request):
+        chunks = [b"x" * 512] * 4
+        return httpx.Response(200, stream=httpx.ByteStream(b"".join(chunks)))
+
+    fetcher = make_fetcher(handler)
+
+    with pytest.raises(ArticleFetchError, match="larger than 1024 bytes"):
+        await fetcher.fetch("https://news.example/huge")
+
+
+@pytest.mark.asyncio
+async def test_fetch_limits_concurrent_requests_per_host():
+    active, peak = {"news.example": 0, "other.example": 0}, {"news.example": 0, "other.example": 0}
+
+    async def handler(request):
+        host = request.url.host
+        active[host] += 1
+        peak[host] = max(peak[host], active[host])
+        await asyncio.sleep(0.01)
+        active[host] -= 1
+        return httpx.Response(200, text=HTML)
+
+    fetcher = make_fetcher(handler)
+    urls = [f"https://news.example/{index}" for index in range(6)] + ["https://other.example/1"]
+    await asyncio.gather(*(fetcher.fetch(url) for url in urls))
+    await fetcher.aclose()
+
+    assert peak == {"news.example": 2, "other.example": 1}
+
+
+def test_parse_article_extracts_the_text():
+    paragraph = "The city council approved the new budget on Monday after a long debate about the schools. " * 3
+    html = (
+        f"<html><head><title>Budget approved</title></head><body><article><p>{paragraph}</p></article></body></html>"
+    )
+
+    article = parse_article("https://news.example/budget", html)
+
+    assert article.title == "Budget approved"
+    assert article.text == paragraph.strip()
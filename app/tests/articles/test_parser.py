@@ -0,0 +1,48 @@
+import pytest
+
+from app.articles import parser as parser_module
+from app.articles.fetcher import ArticleFetchError
+from app.articles.parser import ArticleParser
+
+PARAGRAPH = "The city council approved the new budget on Monday after a long debate about the schools. " * 3
+HTML = f"<html><head><title>Budget approved</title></head><body><article><p>{PARAGRAPH}</p></article></body></html>"
+
+
+def test_parses_inline_without_workers():
+    parser = ArticleParser(max_workers=0, timeout=1, max_html_size=len(HTML))
+
+    assert parser.parse("https://news.example/budget", HTML) == PARAGRAPH.strip()
+    assert parser._executor is None
+
+
+def test_parses_inline_in_daemonic_processes(monkeypatch):
+    monkeypatch.setattr(parser_module, "can_have_children", lambda: False)
+    parser = ArticleParser(max_workers=2, timeout=1, max_html_size=len(HTML))
+
+    assert parser.parse("https://news.example/budget", HTML) == PARAGRAPH.strip()
+    assert parser._executor is None
+
+
+def test_truncates_large_pages(monkeypatch):
+    monkeypatch.setattr(parser_module, "extract_text", lambda url, html: html)
+    parser = ArticleParser(max_workers=0, timeout=1, max_html_size=len(HTML))
+
+    assert parser.parse("https://news.example/budget", HTML + "<p>The end.</p>" * 10) == HTML
+
+
+def test_parses_in_the_pool():
+    parser = ArticleParser(max_workers=1, timeout=60, max_html_size=len(HTML))
+    try:
+        assert parser.parse("https://news.example/budget", HTML) == PARAGRAPH.strip()
+        assert parser._executor is not None
+    finally:
+        parser.shutdown()
+
+
+def test_restarts_the_pool_after_a_timeout():
+    # Even starting the process of the pool takes longer than the timeout.
+    parser = ArticleParser(max_workers=1, timeout=0.001, max_html_size=len(HTML))
+
+    with pytest.raises(ArticleFetchError, match="took longer than"):
+        parser.parse("https://news.example/budget", HTML)
+    assert parser._executor is None
@@ -0,0 +1,103 @@
+import os
+import time
+
+import pytest
+
+from app.articles import store as store_module
+from app.articles.store import DiskArticleStore, RedisArticleStore, StoredArticle, decode_entry, encode_entry
+from app.urls import hash_url
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key, (None,))[0]
+
+    def set(self, key, value, ex=None):
+        self.data[key] = (value, ex)
+
+
+@pytest.mark.parametrize("entry", [StoredArticle(text="Article text ✓"), StoredArticle(error="HTTP 404")])
+def test_entries_survive_compression(entry):
+    assert decode_entry(encode_entry(entry)) == entry
+
+
+def test_entries_are_compressed_with_zlib_without_zstandard(monkeypatch):
+    monkeypatch.setattr(store_module, "zstandard", None)
+
+    data = encode_entry(StoredArticle(text="word " * 1000))
+
+    assert data[:1] == b"z"
+    assert len(data) < 100
+
+
+def test_disk_store_is_keyed_by_canonical_url(tmp_path):
+    store = DiskArticleStore(str(tmp_path), max_bytes=1 << 20, ttl=60, negative_ttl=10)
+
+    store.set_text("https://News.example/story?utm_source=feed", "Article text")
+
+    assert store.get("https://news.example/story") == StoredArticle(text="Article text")
+    assert store.get("https://news.example/other") is None
+    assert (store.hits, store.misses) == (1, 1)
+
+
+def test_disk_store_expires_failures_sooner_than_texts(tmp_path):
+    store = DiskArticleStore(str(tmp_path), max_bytes=1 << 20, ttl=60, negative_ttl=10)
+    store.set_text("https://news.example/alive", "Article text")
+    store.set_failure("https://news.example/dead", "HTTP 404")
+    for path in tmp_path.glob("*.article"):
+        os.utime(path, (time.time() - 30, time.time() - 30))
+
+    assert store.get("https://news.example/alive") == StoredArticle(text="Article text")
+    assert store.get("https://news.example/dead") is None
+    assert len(list(tmp_path.glob("*.article"))) == 1
+
+
+def test_disk_store_evicts_the_oldest_entries_over_the_size_limit(tmp_path):
+    store = DiskArticleStore(str(tmp_path), max_bytes=500, ttl=60, negative_ttl=10)
+    for index in range(3):
+        store.set_text(f"https://news.example/{index}", os.urandom(200).hex())
+        path = max(tmp_path.glob("*.article"), key=lambda path: path.stat().st_mtime_ns)
+        os.utime(path, (time.time() - 10 + index, time.time() - 10 + index))
+
+    assert store.get("https://news.example/0") is None
+    assert store.get("https://news.example/2") is not None
+
+
+def test_disk_store_scans_for_eviction_after_a_tenth_of_the_size_limit(tmp_path, monkeypatch):
+    store = DiskArticleStore(str(tmp_path), max_bytes=10_000, ttl=60, negative_ttl=10)
+    scans = []
+    monkeypatch.setattr(store.files, "evict", lambda: scans.append(len(list(tmp_path.glob("*.article")))))
+
+    for index in range(20):
+        store.set_text(f"https://news.example/{index}", os.urandom(100).hex())
+
+    # The files are scanned on the first write and then once per 1000 bytes written, not on every write.
+    assert scans[0] == 1
+    assert 1 < len(scans) < 10
+
+
+def test_disk_store_treats_unreadable_entries_as_missing(tmp_path, monkeypatch):
+    store = DiskArticleStore(str(tmp_path), max_bytes=1 << 20, ttl=60, negative_ttl=10)
+    store.set_text("https://news.example/corrupt", "Article text")
+    next(tmp_path.glob("*.article")).write_bytes(b"z not zlib")
+    store.files.path(hash_url("https://news.example/zstd")).write_bytes(b"s zstd")
+    monkeypatch.setattr(store_module, "zstandard", None)
+
+    assert store.get("https://news.example/corrupt") is None
+    assert store.get("https://news.example/zstd") is None
+    assert (store.hits, store.misses) == (0, 2)
+
+
+def test_redis_store_sets_the_ttl_of_the_entry(monkeypatch):
+    client = FakeRedis()
+    monkeypatch.setattr(store_module.redis.Redis, "from_url", lambda url: client)
+    store = RedisArticleStore("redis://localhost:6379", ttl=60, negative_ttl=10)
+
+    store.set_text("https://news.example/alive", "Article text")
+    store.set_failure("https://news.example/dead", "HTTP 404")
+
+    assert sorted(ttl for _, ttl in client.data.values()) == [10, 60]
+    assert store.get("https://news.example/dead") == StoredArticle(error="HTTP 404")
@@ -0,0 +1,28 @@
+import pytest
+from sqlalchemy import insert
+
+from app.background.runtime import WorkerRuntime
+from app.models import Base, Summary, User
+
+
+@pytest.fixture
+def runtime(tmp_path):
+    runtime = WorkerRuntime(
+        f"sqlite+aiosqlite:///{tmp_path}/worker.db", pool_size=1, max_overflow=0, pool_recycle=60, pool_timeout=1
+    )
+
+    async def create_rows():
+        async with runtime._engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.execute(
+                insert(User).values(id=1, username="user", email="user@example.com", full_name="", hashed_password="")
+            )
+            await conn.execute(
+                insert(Summary),
+                [{"id": id, "url": f"https://foo.bar/{id}", "summary": "", "user_id": 1} for id in (1, 2, 3)],
+            )
+
+    runtime.start()
+    runtime.run(create_rows())
+    yield runtime
+    runtime.shutdown()
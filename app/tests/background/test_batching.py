@@ -0,0 +1,114 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.background.batching import MicroBatcher
+
+
+class FakeSummarizer:
+    def __init__(self, lang):
+        self.lang = lang
+        self.batches = []
+        self.streamed = []
+
+    def can_stream(self, profile=None):
+        return profile != "quality"
+
+    def summarize(self, text, streamer=None, profile=None):
+        self.streamed.append((text, streamer, threading.current_thread().name))
+        return f"{self.lang} (streamed): {text}"
+
+    def summarize_batch(self, texts, profile=None):
+        self.batches.append(texts)
+        return [f"{self.lang}{f' ({profile})' if profile else ''}: {text}" for text in texts]
+
+
+class FakeFactory:
+    def __init__(self):
+        self.summarizers = {"en": FakeSummarizer("en"), "ru": FakeSummarizer("ru")}
+
+    def get_summarizer(self, lang):
+        if lang not in self.summarizers:
+            raise ValueError(f"Unsupported language: {lang}")
+        return self.summarizers[lang]
+
+
+def test_micro_batcher_groups_concurrent_articles_by_language():
+    factory = FakeFactory()
+    batcher = MicroBatcher(factory, max_batch_size=4, max_wait_ms=1000)
+    articles = [("en", "first"), ("ru", "second"), ("en", "third"), ("ru", "fourth")]
+
+    with ThreadPoolExecutor(max_workers=len(articles)) as executor:
+        summaries = list(executor.map(lambda article: batcher.summarize(*article), articles))
+
+    assert summaries == ["en: first", "ru: second", "en: third", "ru: fourth"]
+    assert [sorted(batch) for batch in factory.summarizers["en"].batches] == [["first", "third"]]
+    assert [sorted(batch) for batch in factory.summarizers["ru"].batches] == [["fourth", "second"]]
+
+
+def test_micro_batcher_groups_concurrent_articles_by_generation_profile():
+    factory = FakeFactory()
+    batcher = MicroBatcher(factory, max_batch_size=3, max_wait_ms=1000)
+    articles = [("en", "first", "fast"), ("en", "second", None), ("en", "third", "fast")]
+
+    with ThreadPoolExecutor(max_workers=len(articles)) as executor:
+        summaries = list(executor.map(lambda article: batcher.summarize(*article), articles))
+
+    assert summaries == ["en (fast): first", "en: second", "en (fast): third"]
+    assert sorted(sorted(batch) for batch in factory.summarizers["en"].batches) == [["first", "third"], ["second"]]
+
+
+def test_micro_batcher_does_not_wait_for_a_full_batch():
+    factory = FakeFactory()
+    batcher = MicroBatcher(factory, max_batch_size=8, max_wait_ms=10)
+
+    assert batcher.submit("en", "lonely").result(timeout=5) == "en: lonely"
+    assert factory.summarizers["en"].batches == [["lonely"]]
+
+
+def test_micro_batcher_does_not_wait_with_a_single_submitter():
+    factory = FakeFactory()
+    batcher = MicroBatcher(factory, max_batch_size=8, max_wait_ms=60_000, max_submitters=1)
+
+    assert batcher.submit("en", "lonely").result(timeout=5) == "en: lonely"
+    assert batcher.submit("ru", "next").result(timeout=5) == "ru: next"
+
+
+def test_micro_batcher_propagates_errors_to_the_failed_group_only():
+    factory = FakeFactory()
+    batcher = MicroBatcher(factory, max_batch_size=2, max_wait_ms=1000)
+
+    failed = batcher.submit("de", "unsupported")
+    succeeded = batcher.submit("en", "supported")
+
+    with pytest.raises(ValueError, match="Unsupported language: de"):
+        failed.result(timeout=5)
+    assert succeeded.result(timeout=5) == "en: supported"
+
+
+def test_micro_batcher_generates_streamed_articles_on_their_own_in_its_thread():
+    factory = FakeFactory()
+    batcher = MicroBatcher(factory, max_batch_size=3, max_wait_ms=1000)
+    streamer = object()
+
+    streamed = batcher.submit("en", "watched", streamer=streamer)
+    batched = [batcher.submit("en", "first"), batcher.submit("en", "second")]
+
+    assert streamed.result(timeout=5) == "en (streamed): watched"
+    assert [future.result(timeout=5) for future in batched] == ["en: first", "en: second"]
+    assert factory.summarizers["en"].streamed == [("watched", streamer, "summarizer-micro-batcher")]
+    assert factory.summarizers["en"].batches == [["first", "second"]]
+
+
+def test_micro_batcher_batches_the_streamed_articles_of_profiles_that_cannot_be_streamed():
+    factory = FakeFactory()
+    batcher = MicroBatcher(factory, max_batch_size=2, max_wait_ms=1000)
+
+    streamed = batcher.submit("en", "watched", "quality", streamer=object())
+    batched = batcher.submit("en", "other", "quality")
+
+    assert streamed.result(timeout=5) == "en (quality): watched"
+    assert batched.result(timeout=5) == "en (quality): other"
+    assert factory.summarizers["en"].streamed == []
+    assert factory.summarizers["en"].batches == [["watched", "other"]]
@@ -0,0 +1,60 @@
+import asyncio
+import threading
+
+from sqlalchemy import text
+
+from app.background import runtime as runtime_module
+from app.background.runtime import WorkerRuntime
+
+
+def make_runtime(tmp_path):
+    return WorkerRuntime(
+        f"sqlite+aiosqlite:///{tmp_path}/worker.db", pool_size=1, max_overflow=0, pool_recycle=60, pool_timeout=1
+    )
+
+
+def test_runs_coroutines_on_one_long_lived_loop(tmp_path):
+    runtime = make_runtime(tmp_path)
+
+    async def get_loop():
+        return asyncio.get_running_loop(), threading.current_thread()
+
+    try:
+        first_loop, thread = runtime.run(get_loop())
+        second_loop, _ = runtime.run(get_loop())
+    finally:
+        runtime.shutdown()
+
+    assert first_loop is second_loop
+    assert thread is not threading.current_thread()
+    assert first_loop.is_closed()
+    assert not thread.is_alive()
+
+
+def test_sessions_use_the_engine_of_the_worker(tmp_path):
+    runtime = make_runtime(tmp_path)
+
+    async def query():
+        async with runtime.session() as db:
+            return (await db.execute(text("SELECT 1"))).scalar_one()
+
+    try:
+        assert runtime.run(query()) == 1
+    finally:
+        runtime.shutdown()
+
+
+def test_forked_processes_start_their_own_loop_and_engine(tmp_path, monkeypatch):
+    runtime = make_runtime(tmp_path)
+    try:
+        runtime.start()
+        loop, engine = runtime._loop, runtime._engine
+        monkeypatch.setattr(runtime_module.os, "getpid", lambda: -1)
+        runtime.start()
+
+        assert runtime._loop is not loop
+        assert runtime._engine is not engine
+    finally:
+        runtime.shutdown()
+        monkeypatch.undo()
+        loop.call_soon_threadsafe(loop.stop)
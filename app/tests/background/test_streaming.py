@@ -0,0 +1,53 @@
+import json
+
+import pytest
+import torch
+
+from app.background import streaming
+from app.background.streaming import SummaryStreamPublisher, SummaryTokenStreamer, get_channel
+
+
+class FakeRedis:
+    def __init__(self, subscribers=0):
+        self.subscribers = subscribers
+        self.published = []
+
+    def pubsub_numsub(self, channel):
+        return [(channel.encode(), self.subscribers)]
+
+    def publish(self, channel, message):
+        self.published.append((channel, json.loads(message)))
+
+
+class FakeTokenizer:
+    words = ["<s>", "The", " article", " is", " short", "."]
+
+    def decode(self, ids, **kwargs):
+        return "".join(self.words[token_id] for token_id in ids if token_id)
+
+
+@pytest.mark.parametrize("subscribers, has_listeners", [(0, False), (2, True)])
+def test_publisher_checks_for_listeners(monkeypatch, subscribers, has_listeners):
+    monkeypatch.setattr(streaming.redis.Redis, "from_url", lambda url: FakeRedis(subscribers))
+
+    assert SummaryStreamPublisher("redis://localhost").has_listeners(1) is has_listeners
+
+
+def test_token_streamer_publishes_whole_words(monkeypatch):
+    monkeypatch.setattr(streaming.redis.Redis, "from_url", lambda url: FakeRedis())
+    publisher = SummaryStreamPublisher("redis://localhost")
+    streamer = publisher.streamer(1, FakeTokenizer(), version=2)
+    assert isinstance(streamer, SummaryTokenStreamer)
+
+    # The first call receives the decoder start token, the prompt of encoder-decoder models.
+    for token_id in [0, 1, 2, 3, 4, 5]:
+        streamer.put(torch.tensor([token_id]))
+    streamer.end()
+
+    channel = get_channel(1)
+    assert publisher.client.published == [
+        (channel, {"event": "token", "data": {"text": "The "}, "version": 2}),
+        (channel, {"event": "token", "data": {"text": "article "}, "version": 2}),
+        (channel, {"event": "token", "data": {"text": "is "}, "version": 2}),
+        (channel, {"event": "token", "data": {"text": "short."}, "version": 2}),
+    ]
@@ -0,0 +1,350 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+from celery.exceptions import Ignore
+from sqlalchemy import select, update
+
+from app.articles.fetcher import ArticleFetchError
+from app.articles.store import DiskArticleStore
+from app.background import tasks
+from app.models import Summary
+from app.summarization.cache import MemorySummaryCache
+
+
+def test_not_overloaded_by_default(monkeypatch):
+    monkeypatch.setattr(tasks, "get_queue_depth", lambda: 1000)
+
+    assert not tasks.is_overloaded(time.time() - 3600)
+
+
+def test_overloaded_when_the_task_waited_too_long(monkeypatch):
+    monkeypatch.setattr(tasks.settings, "EXTRACTIVE_FALLBACK_WAIT_SECONDS", 30)
+
+    assert tasks.is_overloaded(time.time() - 60)
+    assert not tasks.is_overloaded(time.time() - 10)
+    assert not tasks.is_overloaded(None)
+
+
+def test_overloaded_when_the_queue_is_too_deep(monkeypatch):
+    depth = 10
+    monkeypatch.setattr(tasks.settings, "EXTRACTIVE_FALLBACK_QUEUE_DEPTH", 50)
+    monkeypatch.setattr(tasks, "get_queue_depth", lambda: depth)
+
+    assert not tasks.is_overloaded(None)
+    depth = 100
+    assert tasks.is_overloaded(None)
+
+
+def test_enqueue_summary_chains_the_pipeline_stages(monkeypatch):
+    sent = []
+
+    class FakeChain:
+        def __init__(self, *signatures):
+            self.signatures = signatures
+
+        def on_error(self, errback):
+            self.errback = errback
+            return self
+
+        def apply_async(self, countdown=None):
+            signatures = [
+                (signature.task, signature.args, signature.options["task_id"], signature.options["priority"])
+                for signature in self.signatures
+            ]
+            errback = getattr(self, "errback", None)
+            sent.append((signatures, errback and (errback.task, errback.args), countdown))
+
+    monkeypatch.setattr(tasks, "chain", FakeChain)
+
+    tasks.enqueue_summary(1, "https://foo.bar/", "fast", "auto", 3, ["a", "b", "c"], "bulk", countdown=10)
+
+    assert sent == [
+        (
+            [
+                ("fetch_article", (1, "https://foo.bar/", "fast", "auto", 3, "bulk", 0, False), "a", 4),
+                ("summarize_article", (), "b", 4),
+                ("store_summary", (), "c", 4),
+            ],
+            ("fail_summary_job", (1, 3, False)),
+            10,
+        )
+    ]
+    # The article texts passed between the stages aren't kept in the result backend.
+    assert all(task.ignore_result for task in (tasks.fetch_article, tasks.summarize_article, tasks.store_summary))
+    routes = tasks.celery.conf.task_routes
+    assert [routes[name]["queue"] for name in ("fetch_article", "summarize_article", "store_summary")] == [
+        "fetch",
+        "inference",
+        "write",
+    ]
+
+
+@pytest.fixture
+def stages(monkeypatch):
+    stages = []
+
+    def enter_stage(summary_id, version, status):
+        stages.append((summary_id, version, status))
+        return True
+
+    monkeypatch.setattr(tasks, "enter_stage", enter_stage)
+    return stages
+
+
+@pytest.fixture
+def article_store(tmp_path, monkeypatch):
+    article_store = DiskArticleStore(str(tmp_path), max_bytes=1 << 20, ttl=60, negative_ttl=60)
+    monkeypatch.setattr(tasks, "article_store", article_store)
+    return article_store
+
+
+def test_fetch_article_passes_the_text_on(monkeypatch, article_store, stages):
+    async def fetch(url):
+        return SimpleNamespace(html=f"<html>{url}</html>")
+
+    monkeypatch.setattr(tasks, "fetcher", SimpleNamespace(fetch=fetch))
+    monkeypatch.setattr(tasks, "parser", SimpleNamespace(parse=lambda url, html: f"text of {html}"))
+
+    article = tasks.fetch_article(1, "https://foo.bar/", None, "auto")
+
+    assert stages == [(1, None, "fetching")]
+    assert sorted(article.pop("stats")) == ["fetch_seconds", "parse_seconds", "queue_wait_seconds"]
+    assert article == {
+        "summary_id": 1,
+        "url": "https://foo.bar/",
+        "profile": None,
+        "mode": "auto",
+        "version": None,
+        "text": "text of <html>https://foo.bar/</html>",
+        "backfill": False,
+    }
+    assert article_store.get("https://foo.bar/").text == "text of <html>https://foo.bar/</html>"
+
+
+def test_fetch_article_uses_stored_texts_and_failures(monkeypatch, article_store, stages):
+    async def fetch(url):
+        raise ArticleFetchError(f"Failed to download {url}: HTTP 404")
+
+    monkeypatch.setattr(tasks, "fetcher", SimpleNamespace(fetch=fetch))
+    article_store.set_text("https://foo.bar/stored", "Stored text")
+
+    assert tasks.fetch_article(1, "https://foo.bar/stored", None, "auto")["text"] == "Stored text"
+    with pytest.raises(ArticleFetchError, match="HTTP 404$"):
+        tasks.fetch_article(2, "https://foo.bar/dead", None, "auto")
+    monkeypatch.setattr(tasks, "fetcher", None)
+    with pytest.raises(ArticleFetchError, match="HTTP 404 \\(remembered failure\\)"):
+        tasks.fetch_article(3, "https://foo.bar/dead", None, "auto")
+
+
+def test_summarize_article_falls_back_to_extractive_when_overloaded(monkeypatch, stages):
+    monkeypatch.setattr(tasks, "is_overloaded", lambda enqueued_at: True)
+    article = {
+        "summary_id": 1,
+        "url": "https://foo.bar/",
+        "profile": "fast",
+        "mode": "auto",
+        "text": "Short text.",
+        "stats": {"queue_wait_seconds": 1.5, "fetch_seconds": 0.5},
+    }
+
+    result = tasks.summarize_article(article)
+
+    assert stages == [(1, None, "summarizing")]
+    stats = result.pop("stats")
+    assert stats["queue_wait_seconds"] == 1.5
+    assert stats["fetch_seconds"] == 0.5
+    assert stats["generate_seconds"] >= 0
+    assert (stats["input_tokens"], stats["output_tokens"]) == (2, 2)
+    assert result == {
+        "summary_id": 1,
+        "url": "https://foo.bar/",
+        "profile": "fast",
+        "version": None,
+        "summary": "Short text.",
+        "fallback": True,
+    }
+
+
+def test_job_keys_differ_by_the_job_parameters():
+    key = tasks.make_job_key("https://foo.bar/", None, "auto")
+
+    assert key == tasks.make_job_key("https://foo.bar/", None, "auto")
+    assert key != tasks.make_job_key("https://foo.bar/", "fast", "auto")
+    assert key != tasks.make_job_key("https://foo.bar/", None, "extractive")
+
+
+def test_stale_jobs_are_dropped_before_the_expensive_stages(monkeypatch):
+    checked = []
+
+    def enter_stage(summary_id, version, status):
+        checked.append((summary_id, version, status))
+        return False
+
+    monkeypatch.setattr(tasks, "enter_stage", enter_stage)
+    monkeypatch.setattr(tasks, "fetcher", None)
+    article = {"summary_id": 1, "url": "https://foo.bar/", "profile": None, "mode": "auto", "version": 2, "text": ""}
+
+    with pytest.raises(Ignore):
+        tasks.fetch_article(1, "https://foo.bar/", None, "auto", 1)
+    with pytest.raises(Ignore):
+        tasks.summarize_article(article)
+    assert checked == [(1, 1, "fetching"), (1, 2, "summarizing")]
+
+
+def test_job_priorities_stay_within_their_lanes():
+    assert tasks.get_job_priority("interactive") == 9
+    assert tasks.get_job_priority("bulk") == 4
+    # Users with many jobs in flight and long articles are demoted, but never below their lane.
+    assert tasks.get_job_priority("interactive", jobs_in_flight=3) == 9
+    assert tasks.get_job_priority("interactive", jobs_in_flight=13) == 8
+    assert tasks.get_job_priority("interactive", tokens=1024) == 7
+    assert tasks.get_job_priority("interactive", jobs_in_flight=1000, tokens=100_000) == 5
+    assert tasks.get_job_priority("bulk", jobs_in_flight=1000, tokens=100_000) == 0
+
+
+def test_fetch_article_reprioritizes_the_inference_by_length(monkeypatch, article_store, stages):
+    async def fetch(url):
+        return SimpleNamespace(html="")
+
+    monkeypatch.setattr(tasks, "fetcher", SimpleNamespace(fetch=fetch))
+    monkeypatch.setattr(tasks, "parser", SimpleNamespace(parse=lambda url, html: "word " * 500))
+    remaining = [{"task": "store_summary", "options": {"priority": 9}}, {"task": "summarize_article", "options": {}}]
+    tasks.fetch_article.push_request(chain=remaining)
+    try:
+        tasks.fetch_article.run(1, "https://foo.bar/", None, "auto", None, "interactive", 13)
+    finally:
+        tasks.fetch_article.pop_request()
+
+    assert [signature["options"]["priority"] for signature in remaining] == [9, 7]
+
+
+def test_stages_set_the_status_of_the_current_job_only(runtime, monkeypatch):
+    published = []
+    monkeypatch.setattr(tasks, "runtime", runtime)
+    monkeypatch.setattr(tasks.publisher, "publish", lambda *args: published.append(args))
+
+    assert tasks.enter_stage(1, 0, "fetching")
+    assert not tasks.enter_stage(2, 1, "fetching")
+    assert not tasks.enter_stage(4, None, "fetching")
+    tasks.fail_summary_job(None, ArticleFetchError("HTTP 404"), None, 1, 0)
+    tasks.fail_summary_job(None, ArticleFetchError("HTTP 500"), None, 2, 1)
+
+    async def select_statuses():
+        async with runtime.session() as db:
+            return (await db.execute(select(Summary.id, Summary.status, Summary.error).order_by(Summary.id))).all()
+
+    assert runtime.run(select_statuses()) == [(1, "failed", "HTTP 404"), (2, "queued", None), (3, "queued", None)]
+    # The streaming clients of the superseded job aren't told about its failure.
+    assert published == [(1, "error", {"error": "HTTP 404"}, 0)]
+
+
+def test_store_summary_records_the_backfill_of_extractive_summaries(runtime, monkeypatch):
+    enqueued = []
+    monkeypatch.setattr(tasks, "runtime", runtime)
+    monkeypatch.setattr(tasks, "writer", SimpleNamespace(write=lambda *args: True))
+    monkeypatch.setattr(tasks.publisher, "publish", lambda *args: None)
+    monkeypatch.setattr(tasks, "new_job_task_ids", lambda: ["d", "e", "f"])
+    monkeypatch.setattr(tasks, "enqueue_summary", lambda *args, **kwargs: enqueued.append((args, kwargs)))
+    result = {"url": "https://foo.bar/", "profile": None, "summary": "Extractive", "fallback": True}
+
+    tasks.store_summary({**result, "summary_id": 1, "version": 0})
+    # The tasks of a job superseded in the meantime aren't recorded.
+    assert not tasks.record_job_task_ids(2, 1, ["g", "h", "i"])
+
+    async def select_task_ids():
+        async with runtime.session() as db:
+            return (await db.execute(select(Summary.id, Summary.job_task_ids).order_by(Summary.id))).all()
+
+    assert runtime.run(select_task_ids()) == [(1, "d e f"), (2, None), (3, None)]
+    assert [(args[:6], kwargs["backfill"]) for args, kwargs in enqueued] == [
+        ((1, "https://foo.bar/", None, "abstractive", 0, ["d", "e", "f"]), True)
+    ]
+
+
+def test_failed_backfills_keep_the_extractive_summary(runtime, monkeypatch, article_store, stages):
+    published = []
+
+    async def fetch(url):
+        raise ArticleFetchError(f"Failed to download {url}: HTTP 500")
+
+    monkeypatch.setattr(tasks, "runtime", runtime)
+    monkeypatch.setattr(tasks.publisher, "publish", lambda *args: published.append(args))
+    monkeypatch.setattr(tasks, "fetcher", SimpleNamespace(fetch=fetch))
+
+    async def finish_extractive_summary():
+        async with runtime.session() as db:
+            await db.execute(
+                update(Summary)
+                .where(Summary.id == 1)
+                .values(summary="Extractive", status="done", job_task_ids="d e f")
+            )
+            await db.commit()
+
+    runtime.run(finish_extractive_summary())
+    with pytest.raises(ArticleFetchError):
+        tasks.fetch_article(1, "https://foo.bar/1", None, "abstractive", 0, "bulk", 0, True)
+    tasks.fail_summary_job(None, ArticleFetchError("HTTP 500"), None, 1, 0, True)
+
+    async def select_summary():
+        async with runtime.session() as db:
+            return (
+                await db.execute(select(Summary.summary, Summary.status, Summary.error, Summary.job_task_ids))
+            ).first()
+
+    # The backfill doesn't move the summary back through the stages.
+    assert stages == [(1, 0, "done")]
+    assert runtime.run(select_summary()) == ("Extractive", "done", None, None)
+    assert published == []
+
+
+def test_token_counts_wait_for_the_batcher_to_release_the_tokenizer(monkeypatch):
+    def tokenizer(text, add_special_tokens=True):
+        return {"input_ids": text.split()}
+
+    monkeypatch.setattr(
+        tasks, "factory", SimpleNamespace(get_summarizer=lambda lang: SimpleNamespace(tokenizer=tokenizer))
+    )
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        with tasks.batcher.model_lock:
+            counted = executor.submit(tasks.count_tokens, "three short words", "en")
+            time.sleep(0.05)
+            assert not counted.done()
+        assert counted.result(timeout=5) == 3
+
+
+def test_store_summary_drops_the_summaries_of_superseded_jobs(monkeypatch):
+    published = []
+    monkeypatch.setattr(tasks, "writer", SimpleNamespace(write=lambda *args: False))
+    monkeypatch.setattr(tasks.publisher, "publish", lambda *args: published.append(args))
+    monkeypatch.setattr(tasks, "enqueue_summary", lambda *args, **kwargs: pytest.fail("Backfilled a stale job"))
+
+    tasks.store_summary(
+        {"summary_id": 1, "version": 0, "url": "https://foo.bar/", "profile": None, "summary": "", "fallback": True}
+    )
+
+    assert published == []
+
+
+def test_watched_summaries_are_generated_by_the_batcher_and_cached(monkeypatch):
+    submitted = []
+    summarizer = SimpleNamespace(tokenizer=None, get_fingerprint=lambda profile: f"fake-{profile}")
+    monkeypatch.setattr(tasks, "factory", SimpleNamespace(get_summarizer=lambda lang: summarizer))
+    monkeypatch.setattr(tasks, "summary_cache", MemorySummaryCache(max_items=10))
+    monkeypatch.setattr(tasks.settings, "SUMMARIZER_CHUNKING", False)
+    monkeypatch.setattr(tasks.publisher, "has_listeners", lambda summary_id: True)
+    monkeypatch.setattr(tasks.publisher, "streamer", lambda summary_id, tokenizer, version: (summary_id, version))
+
+    def summarize(lang, text, profile, streamer):
+        submitted.append(streamer)
+        return f"summary of {text}"
+
+    monkeypatch.setattr(tasks, "batcher", SimpleNamespace(summarize=summarize))
+
+    summaries = [tasks.generate_abstractive_summary(1, "article", "quality", "en", 2) for _ in range(2)]
+
+    assert summaries == ["summary of article"] * 2
+    # The batcher decides whether the profile can be streamed, and the summary is reused either way.
+    assert submitted == [(1, 2)]
@@ -0,0 +1,133 @@
+import gc
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.background import tasks, worker
+
+
+class FakeDetector:
+    loaded = False
+
+    def get_detector(self):
+        self.loaded = True
+
+
+class FakeFactory:
+    def __init__(self):
+        self.languages = []
+
+    def get_summarizer(self, lang):
+        self.languages.append(lang)
+
+
+def test_preload_models_on_worker_init(monkeypatch):
+    detector, factory = FakeDetector(), FakeFactory()
+    monkeypatch.setattr(tasks, "detector", detector)
+    monkeypatch.setattr(tasks, "factory", factory)
+    monkeypatch.setattr(worker.settings, "WORKER_PRELOAD_LANGUAGES", ["en", "ru"])
+
+    try:
+        worker.preload_models()
+    finally:
+        gc.unfreeze()
+
+    assert detector.loaded
+    assert factory.languages == ["en", "ru"]
+
+
+def test_preload_models_can_be_disabled(monkeypatch):
+    detector, factory = FakeDetector(), FakeFactory()
+    monkeypatch.setattr(tasks, "detector", detector)
+    monkeypatch.setattr(tasks, "factory", factory)
+    monkeypatch.setattr(worker.settings, "WORKER_PRELOAD_MODELS", False)
+
+    worker.preload_models()
+
+    assert not detector.loaded
+    assert factory.languages == []
+
+
+def make_worker(pool, concurrency, queues):
+    return SimpleNamespace(
+        pool_cls=pool,
+        concurrency=concurrency,
+        app=SimpleNamespace(amqp=SimpleNamespace(queues=SimpleNamespace(consume_from=queues))),
+    )
+
+
+@pytest.mark.parametrize("pool, concurrency, max_submitters", [("prefork", 4, 1), ("solo", 1, 1), ("threads", 8, 8)])
+def test_batches_are_limited_to_the_concurrent_tasks_of_a_process(monkeypatch, pool, concurrency, max_submitters):
+    monkeypatch.setattr(tasks.batcher, "max_submitters", None)
+    monkeypatch.setattr(tasks.writer, "max_submitters", None)
+
+    worker.limit_batch_submitters(sender=make_worker(pool, concurrency, {"write": None}))
+
+    assert tasks.batcher.max_submitters == max_submitters
+    assert tasks.writer.max_submitters == max_submitters
+
+
+@pytest.mark.parametrize(
+    "pool, server_socket, warned",
+    [("prefork", None, True), ("prefork", "/run/inference.sock", False), ("threads", None, False)],
+)
+def test_unbatched_inference_is_warned_about(monkeypatch, caplog, pool, server_socket, warned):
+    monkeypatch.setattr(tasks.batcher, "max_submitters", None)
+    monkeypatch.setattr(tasks.writer, "max_submitters", None)
+    monkeypatch.setattr(worker.settings, "INFERENCE_SERVER_SOCKET", server_socket)
+
+    with caplog.at_level("WARNING", logger=worker.__name__):
+        worker.limit_batch_submitters(sender=make_worker(pool, 4, {worker.settings.INFERENCE_QUEUE: None}))
+
+    assert bool(caplog.messages) == warned
+
+
+def test_lookup_stats_are_logged_on_shutdown(monkeypatch, caplog):
+    monkeypatch.setattr(tasks, "article_store", SimpleNamespace(hits=0, misses=4))
+    monkeypatch.setattr(tasks, "summary_cache", SimpleNamespace(hits=3, misses=1))
+    monkeypatch.setattr(tasks, "detector", SimpleNamespace(stats={"predetected": 5, "model": 2}))
+
+    with caplog.at_level("INFO", logger=worker.__name__):
+        worker.log_lookup_stats()
+
+    assert caplog.messages == [
+        "Article store: 0 hits, 4 misses",
+        "Summary cache: 3 hits, 1 misses",
+        "Language detection: 5 predetected, 2 by the model",
+    ]
+
+
+@pytest.mark.parametrize(
+    "signal, pool, stopped", [(None, "prefork", True), ("shutdown", "prefork", False), ("shutdown", "threads", True)]
+)
+def test_runtime_is_stopped_in_the_processes_running_tasks_only(monkeypatch, signal, pool, stopped):
+    stops = []
+    monkeypatch.setattr(
+        tasks, "runtime", SimpleNamespace(run=lambda coroutine: coroutine.close(), shutdown=lambda: stops.append(pool))
+    )
+    monkeypatch.setattr(tasks, "parser", SimpleNamespace(shutdown=lambda: None))
+    signal = worker.worker_shutdown if signal else worker.worker_process_shutdown
+
+    worker.stop_runtime(sender=SimpleNamespace(pool_cls=pool), signal=signal)
+
+    assert stops == ([pool] if stopped else [])
+
+
+def test_published_tasks_are_stamped_with_the_enqueue_time():
+    headers = {"enqueued_at": 1.0}
+    worker.stamp_enqueue_time(headers=headers)
+    assert headers == {"enqueued_at": 1.0}
+
+    headers = {}
+    worker.stamp_enqueue_time(headers=headers)
+    assert time.time() - headers["enqueued_at"] < 5
+
+
+def test_delayed_tasks_are_stamped_with_the_time_they_are_due():
+    headers = {"eta": datetime.fromtimestamp(time.time() + 600, timezone.utc).isoformat()}
+
+    worker.stamp_enqueue_time(headers=headers)
+
+    assert 595 < headers["enqueued_at"] - time.time() <= 600
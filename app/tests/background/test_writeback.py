@@ -0,0 +1,102 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import event, select
+
+from app.background.writeback import SummaryWriter
+from app.models import Summary
+
+
+def get_summaries(runtime):
+    async def select_summaries():
+        async with runtime.session() as db:
+            return dict((await db.execute(select(Summary.id, Summary.summary))).all())
+
+    return runtime.run(select_summaries())
+
+
+def test_writes_concurrent_summaries_in_one_statement(runtime):
+    statements = []
+    event.listen(
+        runtime._engine.sync_engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+    writer = SummaryWriter(runtime, max_batch_size=3, flush_interval_ms=1000)
+
+    with ThreadPoolExecutor(3) as executor:
+        list(executor.map(lambda id: writer.write(id, f"summary {id}"), (1, 2, 3)))
+
+    assert statements == [
+        "UPDATE summaries SET summary=?, job_key=?, job_task_ids=?, status=?, error=?, queue_wait_seconds=?, "
+        "fetch_seconds=?, parse_seconds=?, detect_seconds=?, generate_seconds=?, input_tokens=?, output_tokens=?, "
+        "modified_at=CURRENT_TIMESTAMP WHERE summaries.id = ?",
+        "UPDATE summaries SET write_seconds=?, modified_at=CURRENT_TIMESTAMP WHERE summaries.id IN (?, ?, ?)",
+    ]
+    assert get_summaries(runtime) == {1: "summary 1", 2: "summary 2", 3: "summary 3"}
+
+
+def test_flushes_incomplete_batches_after_the_interval(runtime):
+    writer = SummaryWriter(runtime, max_batch_size=64, flush_interval_ms=10)
+
+    writer.write(2, "first")
+    writer.write(2, "second")
+
+    assert get_summaries(runtime)[2] == "second"
+
+
+def test_does_not_wait_with_a_single_submitter(runtime):
+    writer = SummaryWriter(runtime, max_batch_size=64, flush_interval_ms=60_000, max_submitters=1)
+
+    writer.submit(1, "first").result(timeout=5)
+    writer.submit(2, "second").result(timeout=5)
+
+    assert get_summaries(runtime) == {1: "first", 2: "second", 3: ""}
+
+
+def test_write_failures_are_raised_to_the_tasks(runtime):
+    writer = SummaryWriter(runtime, max_batch_size=2, flush_interval_ms=10)
+
+    with pytest.raises(Exception):
+        writer.write(1, None)
+
+
+def test_drops_the_summaries_of_superseded_jobs(runtime):
+    writer = SummaryWriter(runtime, max_batch_size=2, flush_interval_ms=1000)
+
+    with ThreadPoolExecutor(2) as executor:
+        written = list(executor.map(lambda args: writer.write(*args), [(1, "current", 0), (2, "superseded", -1)]))
+
+    assert written == [True, False]
+    assert get_summaries(runtime) == {1: "current", 2: "", 3: ""}
+
+
+def test_only_looks_up_the_rows_when_some_were_not_written(runtime):
+    statements = []
+    event.listen(
+        runtime._engine.sync_engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement.split()[0]),
+    )
+    writer = SummaryWriter(runtime, max_batch_size=1, flush_interval_ms=10)
+
+    assert writer.write(1, "current", 0)
+    assert statements == ["UPDATE", "UPDATE"]
+    assert not writer.write(2, "superseded", -1)
+    assert statements == ["UPDATE", "UPDATE", "UPDATE", "SELECT"]
+
+
+def test_writes_the_status_and_statistics_of_the_job(runtime):
+    writer = SummaryWriter(runtime, max_batch_size=1, flush_interval_ms=10)
+
+    writer.write(1, "summary", stats={"fetch_seconds": 0.5, "input_tokens": 600, "output_tokens": 60})
+
+    async def select_summary():
+        async with runtime.session() as db:
+            return await db.get(Summary, 1)
+
+    summary = runtime.run(select_summary())
+    assert (summary.status, summary.error) == ("done", None)
+    assert (summary.fetch_seconds, summary.parse_seconds) == (0.5, None)
+    assert (summary.input_tokens, summary.output_tokens) == (600, 60)
+    assert summary.write_seconds >= 0
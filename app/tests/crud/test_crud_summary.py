@@ -0,0 +1,98 @@
+import pytest
+from sqlalchemy import event, text, update
+
+from app.crud import crud_summary
+from app.models import Summary
+from app.tests.conftest import async_engine
+from app.urls import hash_url
+
+
+@pytest.fixture
+def statements():
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+
+@pytest.mark.asyncio
+async def test_start_job_increments_the_job_version(session, statements):
+    async with session as db:
+        summary = Summary(url="https://foo.bar/", summary="", user_id=1, status="failed", error="Timeout")
+        db.add(summary)
+        await db.commit()
+
+        first = await crud_summary.start_job(summary_id=summary.id, job_key="a", task_ids=["1", "2", "3"], db=db)
+        second = await crud_summary.start_job(summary_id=summary.id, job_key="b", task_ids=["4", "5", "6"], db=db)
+        await db.refresh(summary)
+
+    assert (first, second) == (1, 2)
+    assert summary.job_version == 2
+    assert summary.job_key == "b"
+    assert summary.job_task_ids == "4 5 6"
+    assert summary.status == "queued"
+    assert summary.error is None
+    # MySQL, the production database, doesn't support UPDATE ... RETURNING.
+    updates = [statement for statement in statements if statement.startswith("UPDATE")]
+    assert len(updates) == 2
+    assert not [statement for statement in updates if "RETURNING" in statement]
+
+
+def make_summary(url: str, summary: str, **columns) -> Summary:
+    return Summary(url=url, canonical_url_hash=hash_url(url), summary=summary, user_id=1, **columns)
+
+
+@pytest.mark.asyncio
+async def test_get_fresh_by_url_only_returns_finished_recent_summaries(session):
+    async with session as db:
+        db.add_all(
+            [
+                # A summary updated to this article keeps the summary of the previous one until its job is done.
+                make_summary("https://foo.bar/a", "Previous article", status="queued", job_key="a"),
+                make_summary("https://foo.bar/a", "Failed", status="failed", error="Timeout"),
+                make_summary("https://foo.bar/b", "Other article", status="done"),
+            ]
+        )
+        await db.commit()
+        assert await crud_summary.get_fresh_by_url(url="https://foo.bar/a", max_age=60, db=db) is None
+
+        done = make_summary("https://foo.bar/a", "Done", status="done")
+        db.add(done)
+        await db.commit()
+        fresh = await crud_summary.get_fresh_by_url(url="https://foo.bar/a/?utm_source=feed", max_age=60, db=db)
+        assert fresh.id == done.id
+
+        await db.execute(
+            update(Summary).where(Summary.id == done.id).values(modified_at=text("DATETIME('now', '-2 minutes')"))
+        )
+        await db.commit()
+        assert await crud_summary.get_fresh_by_url(url="https://foo.bar/a", max_age=60, db=db) is None
+        assert await crud_summary.get_fresh_by_url(url="https://foo.bar/a", max_age=300, db=db) is not None
+
+
+@pytest.mark.asyncio
+async def test_get_fresh_by_url_matches_the_profile_and_the_mode(session):
+    async with session as db:
+        db.add_all(
+            [
+                make_summary("https://foo.bar/", "Fast", status="done", profile="fast"),
+                make_summary("https://foo.bar/", "Extractive", status="done", mode="extractive"),
+            ]
+        )
+        await db.commit()
+
+        async def get_fresh(profile, mode="auto"):
+            fresh = await crud_summary.get_fresh_by_url(
+                url="https://foo.bar/", max_age=60, profile=profile, mode=mode, db=db
+            )
+            return fresh.summary if fresh else None
+
+        assert await get_fresh("fast") == "Fast"
+        assert await get_fresh(None, "extractive") == "Extractive"
+        assert await get_fresh(None) is None
+        assert await get_fresh("quality") is None
+        assert await get_fresh("fast", "abstractive") is None
@@ -0,0 +1,156 @@
+import multiprocessing
+import threading
+
+import pytest
+
+from app.background.batching import MicroBatcher
+from app.background.streaming import SummaryTokenStreamer
+from app.inference.client import InferenceClient
+from app.inference.server import InferenceServer
+from app.summarization.summarizer import RemoteSummarizer, SummarizerFactory
+
+AUTHKEY = b"secret"
+
+
+class FakeSummarizer:
+    tokenizer = None
+
+    def __init__(self, lang):
+        self.lang = lang
+        self.batches = []
+        self.streamers = []
+
+    def get_fingerprint(self, profile=None):
+        return f"{self.lang}-{profile}"
+
+    def can_stream(self, profile=None):
+        return True
+
+    def summarize(self, text, streamer=None, profile=None):
+        self.streamers.append(streamer)
+        # The models are only used by the thread of the batcher.
+        assert threading.current_thread().name == "summarizer-micro-batcher"
+        return f"{self.lang}: {text}"
+
+    def summarize_batch(self, texts, profile=None):
+        self.batches.append(texts)
+        return [f"{self.lang}: {text}" for text in texts]
+
+
+class FakeFactory:
+    def __init__(self):
+        self.summarizers = {"en": FakeSummarizer("en"), "ru": FakeSummarizer("ru")}
+
+    def get_summarizer(self, lang):
+        if lang not in self.summarizers:
+            raise ValueError(f"Unsupported language: {lang}")
+        return self.summarizers[lang]
+
+
+class FakeDetector:
+    def detect_with_model(self, texts):
+        return [("ru", 0.9) if "привет" in text else ("en", 0.8) for text in texts]
+
+
+class FakePublisher:
+    def streamer(self, summary_id, tokenizer, version=None):
+        return SummaryTokenStreamer(self, summary_id, tokenizer, version)
+
+
+@pytest.fixture
+def server(tmp_path):
+    factory = FakeFactory()
+    server = InferenceServer(
+        address=str(tmp_path / "inference.sock"),
+        authkey=AUTHKEY,
+        factory=factory,
+        detector=FakeDetector(),
+        batcher=MicroBatcher(factory, max_batch_size=4, max_wait_ms=200),
+        publisher=FakePublisher(),
+    )
+    ready = threading.Event()
+    threading.Thread(target=server.serve_forever, args=(ready,), daemon=True).start()
+    assert ready.wait(timeout=5)
+    return server
+
+
+def test_client_detects_and_summarizes_with_server_models(server):
+    client = InferenceClient(server.address, AUTHKEY)
+
+    assert client.detect_with_model(["hello world", "привет мир"]) == [("en", 0.8), ("ru", 0.9)]
+    assert client.summarize("ru", ["first", "second"]) == ["ru: first", "ru: second"]
+    assert client.get_fingerprint("en", "fast") == "en-fast"
+
+
+def test_server_batches_requests_of_all_clients(server):
+    clients = [InferenceClient(server.address, AUTHKEY) for _ in range(4)]
+    summaries = [None] * len(clients)
+
+    def summarize(index):
+        summaries[index] = clients[index].summarize("en", [f"article {index}"])[0]
+
+    threads = [threading.Thread(target=summarize, args=(index,)) for index in range(len(clients))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert summaries == [f"en: article {index}" for index in range(len(clients))]
+    assert sorted(map(sorted, server.factory.summarizers["en"].batches)) == [
+        [f"article {index}" for index in range(len(clients))]
+    ]
+
+
+def test_server_errors_are_raised_by_the_client(server):
+    client = InferenceClient(server.address, AUTHKEY)
+
+    with pytest.raises(ValueError, match="Unsupported language: de"):
+        client.summarize("de", ["text"])
+    with pytest.raises(ValueError, match="Unknown inference method: translate"):
+        client.call("translate", "text")
+    assert client.detect_with_model(["still connected"]) == [("en", 0.8)]
+
+
+def test_remote_summarizer_streams_through_the_server(server, monkeypatch):
+    monkeypatch.setattr(SummarizerFactory, "remote", True)
+    monkeypatch.setattr(SummarizerFactory, "_instances", {})
+    monkeypatch.setattr("app.summarization.summarizer.get_inference_client", lambda: client)
+    client = InferenceClient(server.address, AUTHKEY)
+
+    summarizer = SummarizerFactory.get_summarizer("en")
+    streamer = FakePublisher().streamer(42, summarizer.tokenizer, 3)
+
+    assert isinstance(summarizer, RemoteSummarizer)
+    assert summarizer.summarize("text", streamer=streamer) == "en: text"
+    assert summarizer.summarize_batch(["a", "b"], profile="fast") == ["en: a", "en: b"]
+    assert summarizer.get_fingerprint("fast") == "en-fast"
+    (server_streamer,) = server.factory.summarizers["en"].streamers
+    assert (server_streamer.summary_id, server_streamer.version) == (42, 3)
+    with pytest.raises(ValueError, match="Only summary streams"):
+        summarizer.summarize("text", streamer=object())
+
+
+def test_server_batches_the_articles_of_prefork_children(server, monkeypatch):
+    monkeypatch.setattr(SummarizerFactory, "remote", True)
+    monkeypatch.setattr(SummarizerFactory, "_instances", {})
+    monkeypatch.setattr("app.summarization.summarizer.get_inference_client", lambda: client)
+    client = InferenceClient(server.address, AUTHKEY)
+    context = multiprocessing.get_context("fork")
+    started = context.Barrier(4)
+
+    def run_task(index):
+        # Like a prefork child, every process runs one task at a time and so submits batches of one.
+        batcher = MicroBatcher(SummarizerFactory(), max_batch_size=8, max_wait_ms=0, max_submitters=1)
+        started.wait(timeout=5)
+        assert batcher.summarize("en", f"article {index}") == f"en: article {index}"
+
+    processes = [context.Process(target=run_task, args=(index,)) for index in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=10)
+
+    assert [process.exitcode for process in processes] == [0] * 4
+    assert sorted(map(sorted, server.factory.summarizers["en"].batches)) == [
+        [f"article {index}" for index in range(4)]
+    ]
@@ -0,0 +1,70 @@
+import sys
+from types import SimpleNamespace
+
+import pytest
+import torch
+
+from app.summarization import backends
+from app.summarization.backends import estimate_model_size, load_model
+
+
+class FakeORTModel:
+    @classmethod
+    def from_pretrained(cls, model_dir, **kwargs):
+        return SimpleNamespace(model_dir=model_dir, kwargs=kwargs)
+
+
+@pytest.fixture
+def onnx_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(backends.settings, "SUMMARIZER_ONNX_DIR", str(tmp_path))
+    monkeypatch.setitem(sys.modules, "optimum.onnxruntime", SimpleNamespace(ORTModelForSeq2SeqLM=FakeORTModel))
+    return tmp_path
+
+
+def test_load_model_with_torch_backend(monkeypatch):
+    monkeypatch.setattr(backends.AutoModelForSeq2SeqLM, "from_pretrained", lambda name, **kwargs: f"torch:{name}")
+
+    assert load_model("facebook/bart-large-cnn", "torch") == "torch:facebook/bart-large-cnn"
+
+
+def test_load_model_with_unsupported_backend():
+    with pytest.raises(ValueError, match="Unsupported summarizer backend: tensorrt"):
+        load_model("facebook/bart-large-cnn", "tensorrt")
+
+
+def test_load_model_without_onnx_extra(monkeypatch):
+    monkeypatch.setitem(sys.modules, "optimum.onnxruntime", None)
+
+    with pytest.raises(RuntimeError, match="requires the onnx extra"):
+        load_model("facebook/bart-large-cnn", "onnx")
+
+
+@pytest.mark.parametrize(
+    "backend, encoder_file_name",
+    [("onnx", "encoder_model.onnx"), ("onnx-int8", "encoder_model_quantized.onnx")],
+)
+def test_load_model_with_onnx_backends(onnx_dir, monkeypatch, backend, encoder_file_name):
+    exports = []
+    monkeypatch.setattr(
+        backends, "export_onnx_model", lambda *args: exports.append(args) or args[1].mkdir(parents=True)
+    )
+
+    first = load_model("facebook/bart-large-cnn", backend)
+    second = load_model("facebook/bart-large-cnn", backend)
+
+    export_dir = onnx_dir / backend / "facebook--bart-large-cnn"
+    assert exports == [("facebook/bart-large-cnn", export_dir, backend == "onnx-int8")]
+    assert first.model_dir == second.model_dir == export_dir
+    assert first.kwargs["encoder_file_name"] == encoder_file_name
+    assert set(first.kwargs) == {"encoder_file_name", "decoder_file_name", "decoder_with_past_file_name"}
+
+
+def test_estimate_model_size(tmp_path):
+    torch_model = torch.nn.Linear(4, 2)
+    (tmp_path / "encoder_model.onnx").write_bytes(b"\0" * 100)
+    (tmp_path / "decoder_model.onnx").write_bytes(b"\0" * 50)
+    (tmp_path / "config.json").write_text("{}")
+
+    assert estimate_model_size(torch_model) == (4 * 2 + 2) * 4
+    assert estimate_model_size(SimpleNamespace(model_save_dir=tmp_path)) == 150
+    assert estimate_model_size(SimpleNamespace()) == 0
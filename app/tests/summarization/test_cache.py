@@ -0,0 +1,135 @@
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.summarization import cache as cache_module
+from app.summarization.cache import (
+    DiskSummaryCache,
+    MemorySummaryCache,
+    RedisSummaryCache,
+    get_summary_cache,
+    make_cache_key,
+)
+
+BART = SimpleNamespace(
+    get_fingerprint=lambda profile=None: f'{{"model": "facebook/bart-large-cnn", "profile": "{profile}"}}'
+)
+MBART = SimpleNamespace(get_fingerprint=lambda profile=None: '{"model": "IlyaGusev/mbart_ru_sum_gazeta"}')
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key, (None,))[0]
+
+    def set(self, key, value, ex=None):
+        self.data[key] = (value.encode(), ex)
+
+
+def test_make_cache_key_ignores_cosmetic_whitespace():
+    assert make_cache_key("Some  article\n text ", BART) == make_cache_key("Some article text", BART)
+    assert make_cache_key("Some article text", BART) != make_cache_key("Other article text", BART)
+
+
+def test_make_cache_key_depends_on_the_summarizer():
+    assert make_cache_key("Some article text", BART) != make_cache_key("Some article text", MBART)
+
+
+def test_make_cache_key_depends_on_the_generation_profile():
+    assert make_cache_key("Some article text", BART, "fast") != make_cache_key("Some article text", BART, "quality")
+
+
+def test_memory_cache_counts_hits_and_misses():
+    cache = MemorySummaryCache(max_items=2)
+
+    assert cache.get("key") is None
+    cache.set("key", "summary")
+    assert cache.get("key") == "summary"
+
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_memory_cache_evicts_the_least_recently_used_entry():
+    cache = MemorySummaryCache(max_items=2)
+    cache.set("first", "1")
+    cache.set("second", "2")
+    cache.get("first")
+
+    cache.set("third", "3")
+
+    assert cache.get("second") is None
+    assert cache.get("first") == "1"
+    assert cache.get("third") == "3"
+
+
+def test_disk_cache_is_shared_between_instances(tmp_path):
+    DiskSummaryCache(str(tmp_path), max_items=10, ttl=60).set("key", "summary")
+
+    assert DiskSummaryCache(str(tmp_path), max_items=10, ttl=60).get("key") == "summary"
+
+
+def test_disk_cache_evicts_the_least_recently_used_entry(tmp_path):
+    cache = DiskSummaryCache(str(tmp_path), max_items=2, ttl=60)
+    cache.set("first", "1")
+    cache.set("second", "2")
+    os.utime(tmp_path / "first.txt", (time.time() - 10, time.time() - 10))
+
+    cache.set("third", "3")
+
+    assert cache.get("first") is None
+    assert cache.get("second") == "2"
+
+
+def test_disk_cache_expires_entries(tmp_path):
+    cache = DiskSummaryCache(str(tmp_path), max_items=10, ttl=60)
+    cache.set("key", "summary")
+    os.utime(tmp_path / "key.txt", (time.time() - 61, time.time() - 61))
+
+    assert cache.get("key") is None
+    assert not (tmp_path / "key.txt").exists()
+
+
+def test_disk_cache_scans_for_eviction_after_a_tenth_of_the_entries(tmp_path, monkeypatch):
+    cache = DiskSummaryCache(str(tmp_path), max_items=50, ttl=60)
+    scans = []
+    monkeypatch.setattr(cache.files, "evict", lambda: scans.append(len(list(tmp_path.glob("*.txt")))))
+
+    for index in range(12):
+        cache.set(f"key{index}", "summary")
+
+    assert scans == [1, 6, 11]
+
+
+def test_disk_cache_treats_unreadable_entries_as_missing(tmp_path):
+    cache = DiskSummaryCache(str(tmp_path), max_items=10, ttl=60)
+    cache.set("key", "summary")
+    (tmp_path / "key.txt").write_bytes(b"\xff\xfe summary")
+
+    assert cache.get("key") is None
+    assert (cache.hits, cache.misses) == (0, 1)
+
+
+def test_redis_cache_sets_ttl(monkeypatch):
+    client = FakeRedis()
+    monkeypatch.setattr(cache_module.redis.Redis, "from_url", lambda url: client)
+    cache = RedisSummaryCache("redis://redis", ttl=60)
+
+    cache.set("key", "summary")
+
+    assert cache.get("key") == "summary"
+    assert client.data["summary-cache:key"] == (b"summary", 60)
+
+
+@pytest.mark.parametrize(
+    "backend, cache_class",
+    [("none", type(None)), ("memory", MemorySummaryCache), ("disk", DiskSummaryCache), ("redis", RedisSummaryCache)],
+)
+def test_get_summary_cache(monkeypatch, backend, cache_class):
+    monkeypatch.setattr(cache_module.settings, "SUMMARY_CACHE_BACKEND", backend)
+    monkeypatch.setattr(cache_module.settings, "SUMMARY_CACHE_REDIS_URL", "redis://localhost")
+
+    assert isinstance(get_summary_cache(), cache_class)
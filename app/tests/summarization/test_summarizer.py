@@ -0,0 +1,424 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import torch
+from transformers import GenerationConfig
+
+from app.config import GenerationProfile, SummarizerModel
+from app.summarization import summarizer as summarizer_module
+from app.summarization.summarizer import (
+    EnglishSummarizer,
+    ExtractiveSummarizer,
+    RussianSummarizer,
+    SummarizerFactory,
+)
+
+
+class FakeTokenizer:
+    """Whitespace tokenizer that maps every new word to the next free token ID."""
+
+    model_max_length = 1024
+    pad_token_id = 0
+
+    def __init__(self):
+        self.words = ["<pad>"]
+
+    def encode(self, text, max_length=None):
+        ids = []
+        for word in text.split():
+            if word not in self.words:
+                self.words.append(word)
+            ids.append(self.words.index(word))
+        return ids[:max_length] if max_length else ids
+
+    def __call__(self, texts, max_length=None, truncation=False, stride=0, return_overflowing_tokens=False, **kwargs):
+        texts = [texts] if isinstance(texts, str) else texts
+        if return_overflowing_tokens:
+            input_ids, mapping = [], []
+            for index, text in enumerate(texts):
+                ids = self.encode(text)
+                for start in range(0, max(len(ids) - stride, 1), max_length - stride):
+                    input_ids.append(ids[start : start + max_length])
+                    mapping.append(index)
+            encodings = {"input_ids": input_ids, "attention_mask": [[1] * len(ids) for ids in input_ids]}
+            return {**encodings, "overflow_to_sample_mapping": mapping}
+        input_ids = [self.encode(text, max_length if truncation else None) for text in texts]
+        encodings = {"input_ids": input_ids, "attention_mask": [[1] * len(ids) for ids in input_ids]}
+        if kwargs.get("padding"):
+            return self.pad([dict(zip(encodings, values)) for values in zip(*encodings.values())], **kwargs)
+        return encodings
+
+    def pad(self, features, padding="longest", return_tensors="pt", pad_to_multiple_of=None, **kwargs):
+        length = max(len(feature["input_ids"]) for feature in features)
+        if pad_to_multiple_of:
+            length = -(-length // pad_to_multiple_of) * pad_to_multiple_of
+        return {
+            key: torch.tensor([feature[key] + [0] * (length - len(feature[key])) for feature in features])
+            for key in ("input_ids", "attention_mask")
+        }
+
+    def num_special_tokens_to_add(self):
+        return 0
+
+    def decode(self, ids, skip_special_tokens=True):
+        ids = ids.tolist() if isinstance(ids, torch.Tensor) else ids
+        return " ".join(self.words[token_id] for token_id in ids if token_id != self.pad_token_id)
+
+    def batch_decode(self, sequences, skip_special_tokens=True):
+        return [self.decode(ids, skip_special_tokens) for ids in sequences]
+
+
+class FakeModel:
+    """Seq2seq model stand-in that echoes the input IDs, or their beginning, and records every generate call."""
+
+    def __init__(self):
+        self.calls = []
+        self.generation_config = GenerationConfig()
+        self.output_length = None
+
+    def generate(self, input_ids, attention_mask=None, **kwargs):
+        self.calls.append({"input_ids": input_ids, "attention_mask": attention_mask, **kwargs})
+        return input_ids[:, : self.output_length]
+
+
+class FakePipeline:
+    """Summarization pipeline stand-in whose construction is as slow as resolving a real one."""
+
+    construction_time = 0.05
+    instances = 0
+
+    def __init__(self, task, model, tokenizer):
+        time.sleep(self.construction_time)
+        FakePipeline.instances += 1
+        self.model = model
+        self.tokenizer = tokenizer
+
+    def __call__(self, text, truncation=False, **generate_kwargs):
+        inputs = self.tokenizer(
+            text, max_length=self.tokenizer.model_max_length, truncation=truncation, padding="longest"
+        )
+        output_ids = self.model.generate(**inputs, **generate_kwargs)
+        return [{"summary_text": self.tokenizer.decode(output_ids[0])}]
+
+
+@pytest.fixture
+def fake_models(monkeypatch):
+    monkeypatch.setattr(summarizer_module.AutoTokenizer, "from_pretrained", lambda *args, **kwargs: FakeTokenizer())
+    monkeypatch.setattr(summarizer_module, "load_model", lambda *args, **kwargs: FakeModel())
+    monkeypatch.setattr(summarizer_module, "pipeline", FakePipeline)
+    monkeypatch.setattr(FakePipeline, "instances", 0)
+
+
+@pytest.mark.parametrize("summarizer_class", [EnglishSummarizer, RussianSummarizer])
+def test_summarize_batch_keeps_input_order(fake_models, summarizer_class):
+    summarizer = summarizer_class("fake-model")
+    texts = ["one two three four five", "six", "seven eight nine", "ten eleven"]
+
+    summaries = summarizer.summarize_batch(texts, batch_size=2)
+
+    assert summaries == texts
+    assert len(summarizer.model.calls) == 2
+
+
+def test_summarize_batch_pads_buckets_to_their_longest_text(fake_models):
+    summarizer = EnglishSummarizer("fake-model")
+    texts = ["a b c d e f g h", "i", "j k", "l m n o p q r s t"]
+
+    summarizer.summarize_batch(texts, batch_size=2)
+
+    short_bucket, long_bucket = summarizer.model.calls
+    assert short_bucket["input_ids"].shape == (2, 2)
+    assert long_bucket["input_ids"].shape == (2, 9)
+    assert short_bucket["attention_mask"].tolist() == [[1, 0], [1, 1]]
+    assert short_bucket["generation_config"].max_length == 200
+
+
+def test_summarize_batch_truncates_to_max_input_length(fake_models):
+    summarizer = RussianSummarizer("fake-model")
+
+    summarizer.summarize_batch([" ".join(str(number) for number in range(1000))])
+
+    (call,) = summarizer.model.calls
+    assert call["input_ids"].shape == (1, RussianSummarizer.max_input_length)
+    assert call["generation_config"].no_repeat_ngram_size == 4
+
+
+def test_summarize_batch_with_no_texts(fake_models):
+    assert EnglishSummarizer("fake-model").summarize_batch([]) == []
+
+
+def test_english_summarizer_reuses_its_pipeline(fake_models):
+    started = time.perf_counter()
+    summarizer = EnglishSummarizer("fake-model")
+    construction = time.perf_counter() - started
+    calls = 20
+
+    started = time.perf_counter()
+    summaries = [summarizer.summarize(f"article number {number}") for number in range(calls)]
+    per_call = (time.perf_counter() - started) / calls
+
+    assert summaries[-1] == f"article number {calls - 1}"
+    assert FakePipeline.instances == 1
+    assert len(summarizer.model.calls) == calls
+    # Compared to the construction measured on the same machine, with a wide margin for noisy runners.
+    assert per_call < construction / 2
+    assert all(call["generation_config"] is summarizer.generation_config for call in summarizer.model.calls)
+
+
+@pytest.mark.parametrize("streamer", [None, object()])
+def test_english_summarizer_truncates_long_articles(fake_models, streamer):
+    summarizer = EnglishSummarizer("fake-model")
+
+    summarizer.summarize(" ".join(str(number) for number in range(2000)), streamer=streamer)
+
+    (call,) = summarizer.model.calls
+    assert call["input_ids"].shape == (1, FakeTokenizer.model_max_length)
+    assert call.get("streamer") is streamer
+
+
+def test_generation_config_does_not_leak_into_the_model_defaults(fake_models):
+    summarizer = RussianSummarizer("fake-model")
+
+    assert summarizer.generation_config.no_repeat_ngram_size == 4
+    assert summarizer.model.generation_config.no_repeat_ngram_size == 0
+
+
+def test_russian_summarizer_pads_to_the_input_length(fake_models):
+    summarizer = RussianSummarizer("fake-model")
+
+    assert summarizer.summarize("short news item") == "short news item"
+
+    (call,) = summarizer.model.calls
+    assert call["input_ids"].shape == (1, 3)
+    assert call["attention_mask"].tolist() == [[1, 1, 1]]
+
+
+@pytest.mark.parametrize("multiple, length", [(8, 8), (64, 64)])
+def test_padding_is_rounded_to_a_multiple(fake_models, monkeypatch, multiple, length):
+    monkeypatch.setattr(summarizer_module.settings, "SUMMARIZER_PAD_TO_MULTIPLE_OF", multiple)
+    summarizer = RussianSummarizer("fake-model")
+
+    summarizer.summarize("short news item")
+    summarizer.summarize_batch(["short news item", "another one"])
+
+    single, batch = summarizer.model.calls
+    assert single["input_ids"].shape == (1, length)
+    assert batch["input_ids"].shape == (2, length)
+    assert single["attention_mask"].sum() == 3
+
+
+@pytest.fixture
+def chunking(monkeypatch):
+    monkeypatch.setattr(summarizer_module.settings, "SUMMARIZER_CHUNKING", True)
+    monkeypatch.setattr(summarizer_module.settings, "SUMMARIZER_CHUNK_OVERLAP", 2)
+    monkeypatch.setattr(summarizer_module.settings, "SUMMARIZER_MAX_CHUNKS", 3)
+    monkeypatch.setattr(RussianSummarizer, "max_input_length", 4)
+
+
+def test_chunked_summarization_covers_the_whole_article(fake_models, chunking):
+    summarizer = RussianSummarizer("fake-model")
+
+    (summary,) = summarizer.summarize_batch(["a b c d e f g h"])
+
+    map_step, reduce_step = summarizer.model.calls
+    assert map_step["input_ids"].tolist() == [[1, 2, 3, 4], [3, 4, 5, 6], [5, 6, 7, 8]]
+    # The chunk summaries don't fit into the input together, so every chunk gets an equal share of it.
+    assert reduce_step["input_ids"].tolist() == [[1, 3, 5]]
+    assert summary == "a c e"
+
+
+def test_chunked_summarization_reduces_the_chunk_summaries_level_by_level(fake_models, chunking):
+    summarizer = RussianSummarizer("fake-model")
+    summarizer.model.output_length = 2
+
+    (summary,) = summarizer.summarize_batch(["a b c d e f g h"])
+
+    map_step, first_level, second_level = summarizer.model.calls
+    assert map_step["input_ids"].tolist() == [[1, 2, 3, 4], [3, 4, 5, 6], [5, 6, 7, 8]]
+    assert first_level["input_ids"].tolist() == [[5, 6, 0, 0], [1, 2, 3, 4]]
+    assert second_level["input_ids"].tolist() == [[1, 2, 5, 6]]
+    assert summary == "a b"
+
+
+def test_chunked_summarization_batches_chunks_of_all_articles(fake_models, chunking):
+    summarizer = RussianSummarizer("fake-model")
+    texts = [" ".join(f"long{number}" for number in range(20)), "short article", "x y z w v"]
+
+    summaries = summarizer.summarize_batch(texts, batch_size=16)
+
+    map_step, reduce_step = summarizer.model.calls
+    assert map_step["input_ids"].shape[0] == 3 + 1 + 2
+    assert reduce_step["input_ids"].shape[0] == 2
+    assert summaries[1] == "short article"
+    assert summaries[0] == "long0 long2 long4"
+
+
+def test_fingerprint_covers_model_and_generation_parameters(fake_models):
+    english, russian = EnglishSummarizer("fake-model"), RussianSummarizer("fake-model")
+    fingerprint = english.get_fingerprint()
+
+    english.generation_config.num_beams = 2
+
+    assert english.get_fingerprint() != fingerprint
+    assert english.get_fingerprint() != russian.get_fingerprint()
+    assert english.get_fingerprint("fast") != english.get_fingerprint("quality")
+    assert EnglishSummarizer("other-model").get_fingerprint() != EnglishSummarizer("fake-model").get_fingerprint()
+
+
+@pytest.fixture
+def profiles(monkeypatch):
+    monkeypatch.setattr(
+        summarizer_module.settings,
+        "GENERATION_PROFILES",
+        {
+            "fast": GenerationProfile(num_beams=1, max_new_tokens=40, min_new_tokens=4, length_ratio=0.5),
+            "balanced": GenerationProfile(),
+            "quality": GenerationProfile(num_beams=6, max_new_tokens=256, early_stopping=True),
+        },
+    )
+
+
+def test_generation_profile_overrides_summarizer_defaults(fake_models, profiles):
+    summarizer = EnglishSummarizer("fake-model")
+
+    quality = summarizer.get_generation_config("quality")
+
+    assert (quality.num_beams, quality.max_new_tokens, quality.early_stopping) == (6, 256, True)
+    assert quality.min_length == 0
+    assert summarizer.get_generation_config("balanced").to_diff_dict() == summarizer.generation_config.to_diff_dict()
+    assert summarizer.generation_config.num_beams == 1
+    with pytest.raises(ValueError, match="Unknown generation profile: slow"):
+        summarizer.get_generation_config("slow")
+
+
+@pytest.mark.parametrize("input_length, max_new_tokens", [(10, 5), (60, 30), (200, 40), (2, 4)])
+def test_generation_profile_scales_output_length_with_input(fake_models, profiles, input_length, max_new_tokens):
+    summarizer = RussianSummarizer("fake-model")
+
+    assert summarizer.get_generation_config("fast", input_length).max_new_tokens == max_new_tokens
+
+
+@pytest.mark.parametrize("summarizer_class", [EnglishSummarizer, RussianSummarizer])
+def test_summarize_with_generation_profile(fake_models, profiles, summarizer_class):
+    summarizer = summarizer_class("fake-model")
+
+    summarizer.summarize(" ".join(f"word{number}" for number in range(20)), profile="fast")
+    summarizer.summarize_batch(["a b c d", " ".join(f"word{number}" for number in range(30))], profile="quality")
+
+    single, batch = summarizer.model.calls
+    assert single["generation_config"].max_new_tokens == 10
+    assert batch["generation_config"].num_beams == 6
+
+
+@pytest.mark.parametrize("summarizer_class", [EnglishSummarizer, RussianSummarizer])
+def test_only_greedy_profiles_can_be_streamed(fake_models, profiles, summarizer_class):
+    summarizer = summarizer_class("fake-model")
+    streamer = object()
+
+    summarizer.summarize("short news item", streamer=streamer, profile="fast")
+
+    assert summarizer.can_stream("fast")
+    assert not summarizer.can_stream("quality")
+    (call,) = summarizer.model.calls
+    assert call["streamer"] is streamer
+    # The streamed summary is generated with the parameters of its profile.
+    assert call["generation_config"].max_new_tokens == 4
+
+
+def test_extractive_summarizer_picks_central_sentences_in_original_order():
+    summarizer = ExtractiveSummarizer(num_sentences=2)
+    text = (
+        "The city council approved the new budget on Monday. Cats like warm windowsills.\n\n"
+        "The budget raises spending on city schools. Critics of the council said the budget is too large."
+    )
+
+    summary = summarizer.summarize(text)
+
+    assert "Cats" not in summary
+    assert summary.startswith("The city council approved the new budget on Monday. ")
+
+
+def test_extractive_summarizer_keeps_short_texts():
+    summarizer = ExtractiveSummarizer(num_sentences=3)
+
+    assert summarizer.summarize("  Only one sentence here.\n") == "Only one sentence here."
+    assert summarizer.summarize_batch(["First. Second!", "Третье предложение?"]) == [
+        "First. Second!",
+        "Третье предложение?",
+    ]
+
+
+def test_extractive_summarizer_is_shared_across_languages(monkeypatch):
+    monkeypatch.setattr(SummarizerFactory, "_instances", {})
+
+    summarizer = SummarizerFactory.get_extractive_summarizer()
+
+    assert isinstance(summarizer, ExtractiveSummarizer)
+    assert SummarizerFactory.get_extractive_summarizer() is summarizer
+
+
+@pytest.fixture
+def registry(fake_models, monkeypatch):
+    monkeypatch.setattr(SummarizerFactory, "remote", False)
+    monkeypatch.setattr(
+        SummarizerFactory, "stats", {"loads": 0, "evictions": 0, "load_seconds": 0.0, "resident_bytes": 0}
+    )
+    for attribute in ("_instances", "_sizes", "_last_used", "_loading_locks"):
+        monkeypatch.setattr(SummarizerFactory, attribute, {})
+    monkeypatch.setattr(summarizer_module, "estimate_model_size", lambda model: 600 << 20)
+    monkeypatch.setattr(
+        summarizer_module.settings,
+        "SUMMARIZER_MODELS",
+        {
+            "en": SummarizerModel(model="fake-en"),
+            "ru": SummarizerModel(model="fake-ru", summarizer="russian"),
+            "de": SummarizerModel(model="fake-de", backend="onnx", profile="fast"),
+        },
+    )
+    monkeypatch.setattr(summarizer_module.settings, "SUMMARIZER_MEMORY_BUDGET_MB", 1000)
+    monkeypatch.setattr(summarizer_module.settings, "SUMMARIZER_MIN_IDLE_SECONDS", 0)
+
+
+def test_factory_creates_summarizers_from_configuration(registry):
+    german = SummarizerFactory.get_summarizer("de")
+
+    assert isinstance(german, EnglishSummarizer)
+    assert (german.model_name_or_path, german.backend) == ("fake-de", "onnx")
+    assert isinstance(SummarizerFactory.get_summarizer("ru"), RussianSummarizer)
+    assert SummarizerFactory.get_model_config("de").profile == "fast"
+    with pytest.raises(ValueError, match="Unsupported language: fr"):
+        SummarizerFactory.get_summarizer("fr")
+
+
+def test_factory_loads_a_model_once_for_concurrent_threads(registry):
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        summarizers = list(executor.map(SummarizerFactory.get_summarizer, ["en"] * 4))
+
+    assert all(summarizer is summarizers[0] for summarizer in summarizers)
+    assert SummarizerFactory.stats["loads"] == 1
+    assert FakePipeline.instances == 1
+
+
+def test_factory_evicts_least_recently_used_models_over_budget(registry):
+    english = SummarizerFactory.get_summarizer("en")
+    SummarizerFactory.get_summarizer("ru")
+
+    assert list(SummarizerFactory._instances) == ["ru"]
+    assert SummarizerFactory.stats["evictions"] == 1
+    assert SummarizerFactory.stats["resident_bytes"] == 600 << 20
+
+    assert SummarizerFactory.get_summarizer("en") is not english
+    assert list(SummarizerFactory._instances) == ["en"]
+    assert SummarizerFactory.stats["loads"] == 3
+
+
+def test_factory_keeps_recently_used_models_over_budget(registry, monkeypatch, caplog):
+    monkeypatch.setattr(summarizer_module.settings, "SUMMARIZER_MIN_IDLE_SECONDS", 60)
+
+    SummarizerFactory.get_summarizer("en")
+    SummarizerFactory.get_summarizer("ru")
+
+    assert list(SummarizerFactory._instances) == ["en", "ru"]
+    assert SummarizerFactory.stats["evictions"] == 0
+    assert "over the budget of 1000 MB" in caplog.text
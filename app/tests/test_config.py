@@ -1,6 +1,6 @@
 import logging
 
-from app.config import get_settings
+from app.config import Settings, SummarizerModel, get_settings
 
 
 def test_get_settings_logging(caplog):
@@ -9,3 +9,14 @@ def test_get_settings_logging(caplog):
     get_settings.cache_clear()
     get_settings()
     assert "Loading config settings from the environment..." in caplog.text
+
+
+def test_summarizer_models_default_to_the_language_models(monkeypatch):
+    monkeypatch.setenv("SUMMARIZER_MODEL_EN", "english-model")
+    monkeypatch.setenv("SUMMARIZER_MODELS", '{"de": {"model": "german-model", "backend": "onnx-int8"}}')
+
+    models = Settings().SUMMARIZER_MODELS
+
+    assert models["en"] == SummarizerModel(model="english-model")
+    assert models["ru"].summarizer == "russian"
+    assert models["de"] == SummarizerModel(model="german-model", backend="onnx-int8")
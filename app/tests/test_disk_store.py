@@ -0,0 +1,37 @@
+import os
+import time
+
+from app.disk_store import DiskStore
+
+
+def test_write_replaces_the_entry_without_leaving_temporary_files(tmp_path):
+    store = DiskStore(str(tmp_path), ".entry", max_size=1 << 20, entry_size=lambda size: size)
+    store.write("key", b"first")
+    store.write("key", b"second")
+
+    assert store.path("key").read_bytes() == b"second"
+    assert [path.name for path in tmp_path.iterdir()] == ["key.entry"]
+
+
+def test_evict_removes_the_least_recently_modified_files_over_the_limit(tmp_path):
+    store = DiskStore(str(tmp_path), ".entry", max_size=2, entry_size=lambda size: 1)
+    for index in range(4):
+        store.write(f"key{index}", b"data")
+        os.utime(store.path(f"key{index}"), (time.time() - 10 + index, time.time() - 10 + index))
+    (tmp_path / "other.txt").write_bytes(b"not an entry")
+
+    store.evict()
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["key2.entry", "key3.entry", "other.txt"]
+
+
+def test_evict_bounds_the_total_size_of_the_files(tmp_path):
+    store = DiskStore(str(tmp_path), ".entry", max_size=250, entry_size=lambda size: size)
+    for index, size in enumerate([100, 100, 100]):
+        store.write(f"key{index}", b"x" * size)
+        os.utime(store.path(f"key{index}"), (time.time() - 10 + index, time.time() - 10 + index))
+
+    store.evict()
+
+    assert not store.path("key0").exists()
+    assert store.path("key1").exists() and store.path("key2").exists()
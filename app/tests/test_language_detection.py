@@ -0,0 +1,131 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+import torch
+
+from app.language_detection import LanguageDetector
+
+LABELS = {0: "en", 1: "ru"}
+
+
+class FakeTokenizer:
+    """Tokenizer marking every text by whether it contains Cyrillic letters."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts, max_length=None, padding=None, truncation=False, return_tensors=None):
+        self.calls.append(texts)
+        cyrillic = [[float(any("а" <= char.lower() <= "я" for char in text))] for text in texts]
+        return {"input_ids": torch.tensor(cyrillic)}
+
+
+class FakeModel:
+    config = SimpleNamespace(id2label=LABELS)
+
+    def __call__(self, input_ids):
+        return SimpleNamespace(logits=torch.cat([1 - input_ids, input_ids], dim=-1) * 4)
+
+
+@pytest.fixture
+def fake_detector(monkeypatch):
+    detector = SimpleNamespace(tokenizer=FakeTokenizer(), model=FakeModel())
+    monkeypatch.setattr(LanguageDetector, "remote", False)
+    monkeypatch.setattr(LanguageDetector, "detector", detector)
+    monkeypatch.setattr(LanguageDetector, "stats", {"predetected": 0, "model": 0})
+    return detector
+
+
+def test_detect_with_model_batches_texts_and_returns_confidences(fake_detector):
+    texts = ["Hello world", "Привет мир", "Another one"]
+
+    detections = LanguageDetector.detect_with_model(texts, batch_size=2)
+
+    assert [label for label, _ in detections] == ["en", "ru", "en"]
+    assert all(
+        confidence == pytest.approx(torch.tensor([4.0, 0.0]).softmax(0)[0].item()) for _, confidence in detections
+    )
+    assert fake_detector.tokenizer.calls == [texts[:2], texts[2:]]
+
+
+def test_detect_with_model_serializes_concurrent_calls(fake_detector, monkeypatch):
+    borrowed = threading.Lock()
+    tokenize = fake_detector.tokenizer.__call__
+
+    def exclusive_tokenize(*args, **kwargs):
+        if not borrowed.acquire(blocking=False):
+            raise RuntimeError("Already borrowed")
+        try:
+            time.sleep(0.001)
+            return tokenize(*args, **kwargs)
+        finally:
+            borrowed.release()
+
+    monkeypatch.setattr(fake_detector, "tokenizer", exclusive_tokenize)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        detections = list(executor.map(lambda text: LanguageDetector.detect_with_model([text]), ["Hello"] * 32))
+
+    assert [label for ((label, _),) in detections] == ["en"] * 32
+
+
+def test_detect_delegates_to_detect_many(fake_detector):
+    assert LanguageDetector.detect("Привет мир") == "ru"
+    assert fake_detector.tokenizer.calls == [["Привет мир"]]
+    assert LanguageDetector.stats == {"predetected": 0, "model": 1}
+
+
+ENGLISH = (
+    "The city council approved the new budget on Monday after a long debate. The plan raises spending on schools "
+    "and public transport, while cutting administrative costs."
+)
+RUSSIAN = (
+    "Городской совет в понедельник утвердил новый бюджет после долгих обсуждений. План предусматривает увеличение "
+    "расходов на школы и общественный транспорт, а также сокращение административных затрат."
+)
+
+
+@pytest.mark.parametrize(
+    "text, lang, confident",
+    [
+        (ENGLISH, "en", True),
+        (RUSSIAN, "ru", True),
+        ("Der Stadtrat hat am Montag nach langer Debatte den neuen Haushalt verabschiedet.", "en", False),
+    ],
+)
+def test_predetect_is_confident_about_unambiguous_texts_only(text, lang, confident):
+    guess, confidence = LanguageDetector.predetect(text)
+
+    assert guess == lang
+    assert (confidence >= 0.9) is confident
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "Міська рада в понеділок затвердила новий бюджет після довгих обговорень.",
+        "Общинският съвет одобри новия бюджет в понеделник след дълъг дебат. Планът увеличава разходите за "
+        "училища и обществен транспорт, като намалява административните разходи.",
+    ],
+)
+def test_predetect_requires_the_letters_specific_to_russian(text):
+    _, confidence = LanguageDetector.predetect(text)
+
+    assert confidence == 0.0
+
+
+def test_predetect_skips_short_texts():
+    assert LanguageDetector.predetect("Hi there, 2024!") is None
+
+
+def test_detect_many_runs_the_model_for_ambiguous_texts_only(fake_detector):
+    ambiguous = "Der Stadtrat hat am Montag den neuen Haushalt verabschiedet."
+
+    detections = LanguageDetector.detect_many([ENGLISH, ambiguous, RUSSIAN])
+
+    assert [label for label, _ in detections] == ["en", "en", "ru"]
+    assert fake_detector.tokenizer.calls == [[ambiguous]]
+    assert LanguageDetector.stats == {"predetected": 2, "model": 1}
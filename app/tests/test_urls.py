@@ -0,0 +1,24 @@
+import pytest
+
+from app.urls import canonicalize_url, hash_url
+
+
+@pytest.mark.parametrize(
+    "url, canonical_url",
+    [
+        ["https://foo.bar", "https://foo.bar/"],
+        ["HTTPS://Foo.BAR/Article/", "https://foo.bar/Article"],
+        ["https://foo.bar:443/article#comments", "https://foo.bar/article"],
+        ["http://foo.bar:8080/article", "http://foo.bar:8080/article"],
+        ["https://foo.bar/article?utm_source=feed&utm_medium=rss&fbclid=123", "https://foo.bar/article"],
+        ["https://foo.bar/article?page=2&id=1&utm_campaign=x", "https://foo.bar/article?id=1&page=2"],
+    ],
+)
+def test_canonicalize_url(url, canonical_url):
+    assert canonicalize_url(url) == canonical_url
+
+
+def test_hash_url():
+    assert hash_url("https://Foo.bar/article/?utm_source=feed") == hash_url("https://foo.bar/article")
+    assert hash_url("https://foo.bar/article") != hash_url("https://foo.bar/other-article")
+    assert len(hash_url("https://foo.bar")) == 64
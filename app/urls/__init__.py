@@ -0,0 +1,46 @@
+import hashlib
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+TRACKING_PARAMS = {"fbclid", "gclid", "yclid", "mc_cid", "mc_eid", "igshid", "_ga", "_hsenc", "_hsmi"}
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def canonicalize_url(url: str) -> str:
+    """Brings a URL to a canonical form, so that links to the same article compare equal.
+
+    The scheme and host are lowercased, default ports, fragments, trailing slashes
+    and tracking parameters (utm_* and the like) are dropped, and the remaining
+    query parameters are sorted.
+
+    Args:
+        url (str): URL to canonicalize.
+
+    Returns:
+        str: Canonical form of the URL.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = (parts.hostname or "").rstrip(".")
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        netloc = f"{netloc}:{parts.port}"
+    path = parts.path.rstrip("/") or "/"
+    query = urlencode(
+        sorted(
+            (key, value)
+            for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+        )
+    )
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+def hash_url(url: str) -> str:
+    """Hashes the canonical form of a URL.
+
+    Args:
+        url (str): URL to hash.
+
+    Returns:
+        str: SHA-256 hex digest of the canonical URL.
+    """
+    return hashlib.sha256(canonicalize_url(url).encode()).hexdigest()